@@ -1,104 +1,90 @@
 import streamlit as st
-import requests
-import pandas as pd
 import plotly.graph_objects as go
-from datetime import datetime
-import random  # تم إضافة هذه المكتبة المفقودة
+from datetime import date, datetime
+from tdwl.fear import market_fear, sector_fear, sentiment_labels
+from tdwl.fear import sentiment as fear_sentiment
+from tdwl.fear_history import HISTORY_WEIGHTS, MARKET, FearStore
+from tdwl.fear_stream import ENDED, FAILED, StreamingFearIndex, source_from_spec, start_consumer
+from tdwl import profiling
+from tdwl.market_data import get_provider
+from tdwl.warm import warm
+
+# صفحات المحفظة تجد وحداتها محمّلة عند الانتقال إليها
+warm()
+profile = profiling.page("app")
 
 st.set_page_config(page_title="مؤشر الخوف السعودي", layout="centered")
 
 st.title("📉 مؤشر الخوف في السوق السعودي (SFI)")
 
 @st.cache_data(ttl=3600)
-def fetch_market_data():
+def fetch_market_data(day):
     try:
-        # جلب بيانات المؤشر العام (بيانات وهمية في هذا المثال)
-        st.warning("⚠️ يتم استخدام بيانات تجريبية لأغراض العرض. للتطبيق الفعلي، يلزم تفعيل واجهة برمجة التطبيقات (API) من تداول.")
-        
-        # بيانات وهمية للمؤشر العام
-        tasi_data = {
-            "change_percent": round(random.uniform(-2.5, 1.5), 2),
-            "volume": random.randint(10000000, 30000000),
-            "avg_volume": random.randint(15000000, 25000000),
-            "declines": random.randint(50, 200),
-            "advances": random.randint(20, 150),
-            "market_cap": random.uniform(2000000000000, 3000000000000)
-        }
-        
-        # بيانات وهمية للقطاعات
-        sectors = [
-            "البنوك", "البتروكيماويات", "التأمين", "الاتصالات", 
-            "الطاقة", "الأسمنت", "التجزئة", "الخدمات"
-        ]
-        
-        sectors_data = []
-        for sector in sectors:
-            sectors_data.append({
-                "name": sector,
-                "change_percent": round(random.uniform(-3.0, 2.0), 2),
-                "volume": random.randint(1000000, 5000000),
-                "declines": random.randint(5, 30),
-                "total_stocks": random.randint(10, 40),
-                "volatility": round(random.uniform(0.5, 3.5), 2)
-            })
-        
-        return tasi_data, pd.DataFrame(sectors_data)
+        provider = get_provider()
+        if getattr(provider, "synthetic", False):
+            # بيانات وهمية حتمية (نفس اليوم يعطي نفس الأرقام)
+            st.warning("⚠️ يتم استخدام بيانات تجريبية لأغراض العرض. للتطبيق الفعلي، يلزم تفعيل واجهة برمجة التطبيقات (API) من تداول.")
+        return provider.snapshot(day)
     
     except Exception as e:
         st.error(f"فشل في جلب البيانات: {str(e)}")
         return None, None
 
-def calculate_fear_index(data):
-    if data is None:
-        return 0
-    
-    down_ratio = data['declines'] / (data['declines'] + data['advances'])
-    volume_ratio = data['volume'] / data['avg_volume']
-    tasi_drop = abs(min(0, data['change_percent']))
-    
-    fear_score = (
-        down_ratio * 30 +
-        (1 - min(volume_ratio, 1)) * 20 +
-        tasi_drop * 15 +
-        (1 - (data['market_cap'] / 3000000000000)) * 15 +
-        (random.uniform(0, 1) * 20)  # عنصر عشوائي لتمثيل التقلب
-    )
-    
-    return min(round(fear_score, 2), 100)
+@st.cache_resource
+def get_history_store():
+    return FearStore()
 
-def calculate_sector_fear(sector):
-    down_ratio = sector['declines'] / sector['total_stocks']
-    change = abs(min(0, sector['change_percent']))
-    
-    fear_score = (
-        down_ratio * 40 +
-        change * 30 +
-        (sector['volatility'] / 5) * 30
-    )
-    
-    return min(round(fear_score, 2), 100)
+@st.cache_resource
+def get_stream(spec):
+    # مستهلك واحد لكل مصدر في العملية يتشاركه كل المستخدمين
+    index = StreamingFearIndex()
+    start_consumer(source_from_spec(spec, on_error=index.reject), index)
+    return index
+
+# وضع البث: مصدر أحداث (ملف JSON lines أو host:port) يحدّث المؤشر مع كل حدث
+stream_spec = st.sidebar.text_input("📡 مصدر البث المباشر (ملف أو host:port)", "").strip()
+stream = get_stream(stream_spec) if stream_spec else None
 
 # جلب البيانات
-tasi_data, sectors_df = fetch_market_data()
+with profiling.stage("market_data"):
+    if stream is not None:
+        tasi_data, sectors_df = stream.snapshot()
+        st.sidebar.caption(f"عدد الأحداث المستلمة: {stream.events:,} — المرفوضة: {stream.rejected:,}")
+        if stream.rejected:
+            st.sidebar.caption(f"آخر حدث مرفوض: {stream.last_rejection}")
+        if stream.status == FAILED:
+            st.sidebar.error(f"❌ توقف البث، المعروض آخر لقطة: {stream.error}")
+        elif stream.status == ENDED:
+            st.sidebar.warning("⏹️ انتهى البث، المعروض آخر لقطة.")
+        if stream.status in (FAILED, ENDED):
+            if st.sidebar.button("🔁 إعادة الاتصال"):
+                get_stream.clear()
+                st.rerun()
+        else:
+            st.sidebar.button("🔄 تحديث")
+    else:
+        tasi_data, sectors_df = fetch_market_data(date.today())
 
-if tasi_data is not None and sectors_df is not None:
-    # حساب مؤشر الخوف العام
-    fear_score = calculate_fear_index(tasi_data)
+if tasi_data is not None and sectors_df is not None and not sectors_df.empty:
+    # حساب مؤشر الخوف العام (عنصر التقلب noise يأتي مع بيانات المزود)
+    fear_score = stream.market_score if stream is not None else market_fear(tasi_data)
     
     # تفسير النتيجة
-    if fear_score < 25:
-        sentiment = "🟢 السوق مطمئن جدًا"
-    elif fear_score < 50:
-        sentiment = "🟢 السوق مستقر"
-    elif fear_score < 75:
-        sentiment = "🟠 قلق في السوق"
-    else:
-        sentiment = "🔴 خوف شديد في السوق"
+    sentiment = fear_sentiment(fear_score)
+
+    # آخر قيمة محفوظة في السجل التاريخي هي مرجع التغير في المؤشر. السجل بلا عنصر noise،
+    # فالتغير يُحسب بين درجتين بنفس الأوزان ثم يُزاح المرجع بمساهمة noise اليوم
+    history_store = get_history_store()
+    previous_score = history_store.previous_score(datetime.now())
+    if previous_score is not None:
+        comparable = stream.market_score if stream is not None else market_fear(tasi_data, HISTORY_WEIGHTS)
+        previous_score += fear_score - comparable
 
     # عرض المؤشر العام
     fig = go.Figure(go.Indicator(
         mode="gauge+number+delta",
         value=fear_score,
+        delta={'reference': previous_score} if previous_score is not None else None,
         title={'text': "مؤشر الخوف السعودي (SFI)", 'font': {'size': 24}},
         gauge={
             'axis': {'range': [0, 100]},
@@ -115,6 +101,14 @@ if tasi_data is not None and sectors_df is not None:
     st.plotly_chart(fig, use_container_width=True)
     st.markdown(f"### 🧠 تحليل: {sentiment}")
     
+    # السجل التاريخي للمؤشر من المخزن المحلي
+    market_history = history_store.load(MARKET)
+    if not market_history.empty:
+        with st.expander("السجل التاريخي للمؤشر"):
+            history_fig = go.Figure(go.Scatter(x=market_history['date'], y=market_history['fear_score'], mode='lines'))
+            history_fig.update_layout(yaxis_range=[0, 100], yaxis_title="مؤشر الخوف")
+            st.plotly_chart(history_fig, use_container_width=True)
+
     # تفاصيل المؤشر العام
     with st.expander("تفاصيل المؤشر العام"):
         st.write(f"📅 تاريخ التحديث: {datetime.now().strftime('%Y-%m-%d %H:%M')}")
@@ -127,10 +121,8 @@ if tasi_data is not None and sectors_df is not None:
     st.markdown("## 📊 مؤشر الخوف حسب القطاعات")
     
     # حساب مؤشر الخوف لكل قطاع
-    sectors_df['Fear Score'] = sectors_df.apply(calculate_sector_fear, axis=1)
-    sectors_df['Sentiment'] = pd.cut(sectors_df['Fear Score'],
-                                    bins=[0, 25, 50, 75, 100],
-                                    labels=["🟢 مطمئن", "🟢 مستقر", "🟠 قلق", "🔴 خوف شديد"])
+    sectors_df['Fear Score'] = sector_fear(sectors_df)
+    sectors_df['Sentiment'] = sentiment_labels(sectors_df['Fear Score'])
     
     # عرض جدول القطاعات
     st.dataframe(sectors_df[['name', 'Fear Score', 'Sentiment', 'change_percent', 'volatility']]
@@ -184,3 +176,5 @@ st.markdown("""
 2. إضافة معايير أكثر دقة لحساب مؤشر الخوف
 3. تحسين خوارزميات حساب التقلبات
 """)
+
+profiling.debug_panel(profile)
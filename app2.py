@@ -1,37 +1,30 @@
 import streamlit as st
-import random
+from datetime import date
 import plotly.graph_objects as go
+from tdwl.fear import APP2_MARKET_WEIGHTS, market_fear
+from tdwl.fear import sentiment as fear_sentiment
+from tdwl import profiling
+from tdwl.market_data import get_provider
 
+profile = profiling.page("app2")
 st.set_page_config(page_title="مؤشر الخوف السعودي", layout="centered")
 
 st.title("📉 مؤشر الخوف في السوق السعودي (SFI)")
 
-# توليد بيانات وهمية تماثل الوضع الحقيقي
-down_ratio = random.uniform(0.2, 0.9)  # نسبة الأسهم الهابطة
-volume_ratio = random.uniform(0.4, 1.0)  # حجم التداول الحالي مقابل المتوسط
-big_sell_ratio = random.uniform(0.1, 0.6)  # نسبة أوامر البيع الكبيرة
-tasi_drop = random.uniform(-2.5, 0.0)  # نسبة نزول مؤشر TASI
-volatility_score = random.uniform(0, 1)  # تقلب الأسعار اللحظي
-
-# حساب مؤشر الخوف
-fear_score = (
-    down_ratio * 30 +
-    (1 - volume_ratio) * 20 +
-    big_sell_ratio * 20 +
-    abs(tasi_drop) * 8 +
-    volatility_score * 10
-)
-fear_score = min(round(fear_score, 2), 100)
+# بيانات اليوم من مزود البيانات (تجريبية حتمية ما لم يُضبط مصدر حقيقي)
+with profiling.stage("market_data"):
+    tasi_data, _ = get_provider().snapshot(date.today())
+down_ratio = tasi_data["declines"] / (tasi_data["declines"] + tasi_data["advances"])  # نسبة الأسهم الهابطة
+volume_ratio = min(tasi_data["volume"] / tasi_data["avg_volume"], 1)  # حجم التداول الحالي مقابل المتوسط
+big_sell_ratio = tasi_data.get("big_sell_ratio", 0.0)  # نسبة أوامر البيع الكبيرة
+tasi_drop = min(tasi_data["change_percent"], 0.0)  # نسبة نزول مؤشر TASI
+volatility_score = tasi_data.get("volatility_score", 0.0)  # تقلب الأسعار اللحظي
+
+# حساب مؤشر الخوف بأوزان هذه الصفحة
+fear_score = market_fear(tasi_data, weights=APP2_MARKET_WEIGHTS)
 
 # تفسير النتيجة
-if fear_score < 25:
-    sentiment = "🟢 السوق مطمئن جدًا"
-elif fear_score < 50:
-    sentiment = "🟢 السوق مستقر"
-elif fear_score < 75:
-    sentiment = "🟠 قلق في السوق"
-else:
-    sentiment = "🔴 خوف شديد في السوق"
+sentiment = fear_sentiment(fear_score)
 
 # عرض المؤشر
 fig = go.Figure(go.Indicator(
@@ -61,3 +54,4 @@ with st.expander("تفاصيل الحساب (بيانات تجريبية)"):
     st.write(f"📊 نزول المؤشر العام: `{tasi_drop:.2f}%`")
     st.write(f"⚡ تقلب الأسعار اللحظي: `{volatility_score:.2f}`")
 
+profiling.debug_panel(profile)
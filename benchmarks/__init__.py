@@ -0,0 +1 @@
+"""قياسات أداء؛ تُشغّل من جذر المستودع مثل: python -m benchmarks.bench_ingest"""
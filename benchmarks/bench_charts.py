@@ -0,0 +1,72 @@
+"""الرسم الدائري: matplotlib إلى PNG في كل إعادة تشغيل مقابل مواصفة plotly من tdwl.charts.
+
+python -m benchmarks.bench_charts --positions 500
+"""
+import argparse
+import io
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from tdwl.charts import MAX_SLICES, _specs, pie_chart
+
+
+def legacy_pie(values):
+    # كما في الصفحات قبل التحسين: pyplot وشريحة بتسمية لكل مركز ثم تحويل لصورة
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots()
+    ax.pie(values, labels=values.index, autopct="%1.1f%%", startangle=90)
+    ax.axis("equal")
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png")
+    plt.close("all")
+    return buffer.getvalue()
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--positions", type=int, default=500)
+    parser.add_argument("--reruns", type=int, default=50)
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(0)
+    values = pd.Series(rng.lognormal(10, 1.5, args.positions), index=[f"شركة {i}" for i in range(args.positions)])
+
+    # الوحدة لا تستورد مكتبة رسم: يُقاس في عملية جديدة
+    loaded = subprocess.run([sys.executable, "-c", "import sys, tdwl.charts; "
+                             "print(sorted(m for m in ('matplotlib', 'plotly') if m in sys.modules))"],
+                            capture_output=True, text=True, check=True).stdout.strip()
+    assert loaded == "[]", loaded
+
+    _specs.clear()
+    cold, spec = timed(lambda: pie_chart(values))
+    warm, _ = timed(lambda: [pie_chart(values) for _ in range(args.reruns)])
+    assert len(spec["data"][0]["labels"]) <= MAX_SLICES
+    assert np.isclose(sum(spec["data"][0]["values"]), values.sum(), rtol=1e-6)
+    print(f"plotly spec {args.positions} positions: cold {cold * 1000:.2f}ms, "
+          f"cached {warm / args.reruns * 1000:.3f}ms per rerun — {len(spec['data'][0]['labels'])} slices")
+
+    try:
+        legacy, png = timed(lambda: legacy_pie(values))
+    except ImportError:
+        print("matplotlib غير مثبت — تخطي المقارنة")
+        return
+    print(f"matplotlib png: {legacy * 1000:.0f}ms per rerun ({len(png) // 1024} KB, {args.positions} slices) — "
+          f"{legacy / (warm / args.reruns):.0f}x")
+
+
+if __name__ == "__main__":
+    main()
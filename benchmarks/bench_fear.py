@@ -0,0 +1,91 @@
+"""مقارنة حساب مؤشر الخوف: apply صفاً صفاً كما في app.py مقابل tdwl.fear.
+
+python -m benchmarks.bench_fear --rows 1000 10000 100000
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from tdwl.fear import market_fear, sector_fear
+
+
+def legacy_sector_fear(sector):
+    # نسخة app.py قبل التحسين
+    down_ratio = sector['declines'] / sector['total_stocks']
+    change = abs(min(0, sector['change_percent']))
+    fear_score = (
+        down_ratio * 40 +
+        change * 30 +
+        (sector['volatility'] / 5) * 30
+    )
+    return min(round(fear_score, 2), 100)
+
+
+def legacy_market_fear(data):
+    down_ratio = data['declines'] / (data['declines'] + data['advances'])
+    volume_ratio = data['volume'] / data['avg_volume']
+    tasi_drop = abs(min(0, data['change_percent']))
+    fear_score = (
+        down_ratio * 30 +
+        (1 - min(volume_ratio, 1)) * 20 +
+        tasi_drop * 15 +
+        (1 - (data['market_cap'] / 3000000000000)) * 15 +
+        data['noise'] * 20
+    )
+    return min(round(fear_score, 2), 100)
+
+
+def synthetic_sectors(rows, rng):
+    return pd.DataFrame({
+        "change_percent": rng.uniform(-3.0, 2.0, rows).round(2),
+        "volume": rng.integers(1_000_000, 5_000_000, rows),
+        "declines": rng.integers(5, 30, rows),
+        "total_stocks": rng.integers(10, 40, rows),
+        "volatility": rng.uniform(0.5, 3.5, rows).round(2),
+    })
+
+
+def synthetic_days(rows, rng):
+    return pd.DataFrame({
+        "change_percent": rng.uniform(-2.5, 1.5, rows).round(2),
+        "volume": rng.integers(10_000_000, 30_000_000, rows),
+        "avg_volume": rng.integers(15_000_000, 25_000_000, rows),
+        "declines": rng.integers(50, 200, rows),
+        "advances": rng.integers(20, 150, rows),
+        "market_cap": rng.uniform(2e12, 3e12, rows),
+        "noise": rng.uniform(0, 1, rows),
+    })
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    rng = np.random.default_rng(args.seed)
+
+    print(f"{'case':<8} {'rows':>8} {'apply s':>10} {'vector s':>10} {'speedup':>8}")
+    for rows in args.rows:
+        sectors = synthetic_sectors(rows, rng)
+        legacy, expected = timed(lambda: sectors.apply(legacy_sector_fear, axis=1))
+        fast, scores = timed(lambda: sector_fear(sectors))
+        assert np.allclose(expected, scores, atol=0.011)
+        print(f"{'sectors':<8} {rows:>8} {legacy:>10.4f} {fast:>10.4f} {legacy / fast:>7.0f}x")
+
+        days = synthetic_days(rows, rng)
+        legacy, expected = timed(lambda: days.apply(legacy_market_fear, axis=1))
+        fast, scores = timed(lambda: market_fear(days))
+        assert np.allclose(expected, scores, atol=0.011)
+        print(f"{'market':<8} {rows:>8} {legacy:>10.4f} {fast:>10.4f} {legacy / fast:>7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
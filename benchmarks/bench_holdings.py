@@ -0,0 +1,126 @@
+"""ذاكرة صفحات الوسطاء: ما تحتفظ به الصفحة مع الإطار ونسخه المصفاة مقابل CompactHoldings وحده.
+
+يُقاس بـ tracemalloc مع مجمّع ذاكرة pyarrow (أعمدة النص في pandas خارج tracemalloc) ما يبقى
+في العملية بين إعادات التشغيل (ذاكرات الملفات) وما تمسكه الصفحة حتى نهاية التشغيل (المحفوظ
++ متغيراتها)، بعد تفريغ ذاكرات ingest و holdings.
+
+python -m benchmarks.bench_holdings --rows 100000 500000
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+
+import numpy as np
+import pyarrow as pa
+
+from benchmarks import synthetic
+from tdwl import holdings as holdings_cache, ingest
+from tdwl.holdings import DISPLAY_FIELDS, CompactHoldings, compact_export
+from tdwl.ingest import read_canonical, read_export
+from tdwl.quotes import StubBackend, fetch_quotes
+from tdwl.schemas import ARABIC_BROKER
+from tdwl.valuation import ARABIC_COLUMNS, portfolio_totals, value_portfolio
+
+BROKER_DISPLAY = ["الرمز", "الشركة", "المحفظة", "متوسط التكلفة", "سعر السوق",
+                  "إجمالي التكلفة", "القيمة السوقية", "الربح/الخسارة", "العائد"]
+
+
+def legacy_views(df, pnl, pnl_percent):
+    # القوائم المصفاة كما بنتها الصفحات من الإطار: نسخة لكل قائمة
+    winners = df[df[pnl] > 0].sort_values(pnl, ascending=False)
+    losers = df[df[pnl] < 0].sort_values(pnl)
+    gainers = df[df[pnl_percent] >= 10]
+    decliners = df[df[pnl_percent] <= -10]
+    return winners, losers, gainers, decliners
+
+
+def compact_views(book):
+    gainers, decliners = book.movers(10)
+    return book.winners(), book.losers(), gainers, decliners
+
+
+def frame_page(payload):
+    """الصفحة قبل التحسين: read_export (الإطار محفوظ ونسخة منه للصفحة) ثم نسخ للقوائم والعرض."""
+    df = read_export(payload, ARABIC_BROKER)
+    totals = portfolio_totals(df, **ARABIC_COLUMNS)
+    views = legacy_views(df, "الربح/الخسارة", "العائد")
+    table = df[BROKER_DISPLAY].round(2)
+    held = df[df["المحفظة"] > 0]
+    return totals, views, table, held, df
+
+
+def book_page(payload):
+    """الصفحة الحالية: الكتاب وحده محفوظ، والجدول ومدخلات إعادة التوازن تُبنى منه للتشغيل."""
+    book = compact_export(payload, ARABIC_BROKER)
+    totals = book.totals()
+    views = compact_views(book)
+    table = book.frame(DISPLAY_FIELDS)
+    display = table.round(2)
+    held = book.where(book.column("shares") > 0).frame(["symbol", "shares", "price"])
+    return totals, views, table, display, held, book
+
+
+def measure(page, payload):
+    """(زمن، المحفوظ بين التشغيلات، المُمسك أثناء التشغيل، النتيجة) بذاكرات فارغة."""
+    ingest._frames.clear()
+    holdings_cache._books.clear()
+    gc.collect()
+    arrow = pa.total_allocated_bytes()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = page(payload)
+    elapsed = time.perf_counter() - start
+    running = tracemalloc.get_traced_memory()[0] + pa.total_allocated_bytes() - arrow
+    result = None
+    gc.collect()
+    kept = tracemalloc.get_traced_memory()[0] + pa.total_allocated_bytes() - arrow
+    tracemalloc.stop()
+    return elapsed, kept, running, page(payload)
+
+
+def check(views, copies, pnl):
+    # نفس الصفوف ونفس الترتيب (عدا تبادل المتساويات) من التمثيلين
+    for view, frame in zip(views, copies):
+        assert np.array_equal(np.sort(view.rows), np.sort(frame.index.to_numpy()))
+    assert np.allclose(views[0].frame(["pnl"]).iloc[:, 0], copies[0][pnl])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 500_000])
+    args = parser.parse_args(argv)
+    prices, sectors = synthetic.quotes()
+    backend = StubBackend(prices, sectors)
+
+    mb = 2 ** 20
+    print(f"{'page':<6} {'rows':>8} {'kept MB':>8} {'running MB':>11} {'run ms':>8}")
+    for rows in args.rows:
+        data, name = synthetic.export(rows, ARABIC_BROKER)
+
+        # التمثيل نفسه من إطار التقييم: نفس الإجماليات والقطاعات
+        df = read_canonical((data, name))
+        valuation = value_portfolio(df, fetch_quotes(df["symbol"], backend=backend))
+        book = CompactHoldings.from_frame(valuation.holdings)
+        check(compact_views(book), legacy_views(valuation.holdings, "pnl", "pnl_percent"), "pnl")
+        assert np.allclose(book.totals(), portfolio_totals(valuation.holdings), rtol=1e-9)
+        assert np.allclose(book.group_values("sector").sort_index(), valuation.sectors.sort_index(), rtol=1e-9)
+
+        results = {}
+        for label, page in (("frame", frame_page), ("book", book_page)):
+            elapsed, kept, running, result = measure(page, (data, name))
+            results[label] = (kept, running, result)
+            print(f"{label:<6} {rows:>8} {kept / mb:>8.1f} {running / mb:>11.1f} {elapsed * 1000:>8.1f}")
+
+        (kept, running, legacy), (compact_kept, compact_running, current) = results["frame"], results["book"]
+        check(current[1], legacy[1], "الربح/الخسارة")
+        assert current[0] == legacy[0]
+        # الجدول المعروض بمبالغ الملف نفسها
+        assert np.array_equal(current[3].iloc[:, 2:].to_numpy(dtype="float64", na_value=np.nan),
+                              legacy[2].iloc[:, 2:].to_numpy(dtype="float64", na_value=np.nan), equal_nan=True)
+        assert not ingest._frames, "compact_export يجب ألا يحفظ إطار read_export"
+        print(f"{'':<6} {rows:>8} {kept / compact_kept:>7.1f}x {running / compact_running:>10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""زمن الاستيراد البارد لكل صفحة: الاستيرادات في أعلى الملف فقط، كل قياس في عملية جديدة.
+
+يفشل (رمز خروج 1) إذا حمّلت صفحة محفظة مكتبة ثقيلة قبل رفع ملف، أو إذا زاد الزمن عن خط الأساس.
+
+python -m benchmarks.bench_import
+python -m benchmarks.bench_import --update   # تحديث خط الأساس بعد تغيير مقصود
+"""
+import argparse
+import ast
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+BASELINE = Path(__file__).with_name("import_baseline.json")
+SCRIPTS = ("app.py", "app2.py", *sorted(str(p.relative_to(ROOT)) for p in (ROOT / "pages").glob("*.py")))
+HEAVY = ("pandas", "numpy", "pyarrow", "fpdf", "yfinance", "matplotlib", "plotly", "aiohttp")
+# إطار التشغيل نفسه ليس من مسؤولية الصفحة وقد لا يكون مثبتاً في بيئة القياس
+FRAMEWORK = ("streamlit",)
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+{imports}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "heavy": sorted(m for m in {heavy!r} if m in sys.modules)}}))
+"""
+
+
+def top_level_imports(path):
+    """استيرادات المستوى الأعلى فقط؛ ما داخل if أو الدوال يُحمّل عند الحاجة ولا يدخل في القياس."""
+    tree = ast.parse(path.read_text(encoding="utf-8"))
+    imports = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            names = [alias for alias in node.names if alias.name.split(".")[0] not in FRAMEWORK]
+            if names:
+                imports.append(ast.unparse(ast.Import(names=names)))
+        elif isinstance(node, ast.ImportFrom) and (node.module or "").split(".")[0] not in FRAMEWORK:
+            imports.append(ast.unparse(node))
+    return imports
+
+
+def measure(code, runs):
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+        samples.append(json.loads(output.stdout))
+    return statistics.median(s["seconds"] for s in samples), samples[0]["heavy"]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--tolerance", type=float, default=0.5, help="زيادة نسبية مسموحة عن خط الأساس")
+    parser.add_argument("--slack-ms", type=float, default=25, help="هامش مطلق لضجيج القياس")
+    parser.add_argument("--update", action="store_true", help="كتابة خط الأساس من هذا القياس")
+    args = parser.parse_args(argv)
+
+    baseline = json.loads(BASELINE.read_text()) if BASELINE.exists() else {}
+    results, failures = {}, []
+    print(f"{'script':<32} {'ms':>8} {'baseline':>9}  heavy")
+    for script in SCRIPTS:
+        code = PROBE.format(imports="\n".join(top_level_imports(ROOT / script)), heavy=HEAVY)
+        seconds, heavy = measure(code, args.runs)
+        ms = seconds * 1000
+        results[script] = round(ms, 1)
+        base = baseline.get(script)
+        print(f"{script:<32} {ms:>8.1f} {base if base is not None else '-':>9}  {', '.join(heavy) or '-'}")
+        if script.startswith("pages/") and heavy:
+            failures.append(f"{script} يستورد {', '.join(heavy)} قبل رفع ملف")
+        if base is not None and not args.update and ms > base * (1 + args.tolerance) + args.slack_ms:
+            failures.append(f"{script}: {ms:.1f}ms مقابل خط أساس {base}ms")
+
+    # بعد التحميل الخلفي يصبح استيراد مسار التقييم في الصفحة شبه مجاني
+    warmed, _ = measure(PROBE.format(imports="from tdwl.warm import wait\nwait()\nstart = time.perf_counter()\n"
+                                             "from tdwl.valuation import valuate_upload\nfrom tdwl.report import font_files",
+                                     heavy=HEAVY), args.runs)
+    cold, _ = measure(PROBE.format(imports="from tdwl.valuation import valuate_upload\nfrom tdwl.report import font_files",
+                                   heavy=HEAVY), args.runs)
+    print(f"valuation + report imports on upload: cold {cold * 1000:.1f}ms, after warm() {warmed * 1000:.2f}ms")
+
+    if args.update:
+        BASELINE.write_text(json.dumps(results, indent=2, ensure_ascii=False) + "\n")
+        print(f"✅ خط الأساس: {BASELINE.relative_to(ROOT)}")
+    for failure in failures:
+        print(f"❌ {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
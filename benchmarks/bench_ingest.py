@@ -0,0 +1,91 @@
+"""مقارنة قراءة ملفات الوسطاء: المسار الحالي في الصفحات مقابل read_export.
+
+python -m benchmarks.bench_ingest --rows 1000 20000 100000 [--excel]
+"""
+import argparse
+import time
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+
+from tdwl.ingest import check_layout, parse_export
+from tdwl.schemas import ARABIC_BROKER
+
+
+def synthetic_export(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    codes = rng.integers(1010, 9999, rows)
+    qty = rng.integers(1, 50_000, rows)
+    avg = rng.uniform(5, 300, rows).round(2)
+    price = (avg * rng.uniform(0.6, 1.5, rows)).round(2)
+    cost = qty * avg
+    value = qty * price
+    df = pd.DataFrame({
+        "الرمز": codes.astype(str),
+        "الشركة": [f"شركة {c}" for c in codes],
+        "المحفظة": qty,
+        "مرهون": 0,
+        "متوسط التكلفة": avg,
+        "بيع تحت التسوية": 0,
+        "شراء تحت التسوية": 0,
+        "سعر السوق": price,
+        "إجمالي التكلفة": cost,
+        "القيمة السوقية": value,
+        "الربح/الخسارة": value - cost,
+        "العائد": (value - cost) / cost * 100,
+        "سعر الإغلاق": price,
+    })
+    # ملفات الوسطاء تحمل فواصل الآلاف كنص
+    for col in ("المحفظة", "إجمالي التكلفة", "القيمة السوقية", "الربح/الخسارة"):
+        df[col] = df[col].map("{:,.2f}".format)
+    return df
+
+
+def legacy_read(data, name):
+    # نفس خطوات صفحة محلل_المحفظة.py قبل التحسين
+    if name.endswith(".csv"):
+        df = pd.read_csv(BytesIO(data), encoding="utf-8-sig", thousands=",")
+    else:
+        df = pd.read_excel(BytesIO(data), thousands=",")
+    for col in ARABIC_BROKER.numeric_columns:
+        if df[col].dtype == object:
+            df[col] = df[col].astype(str).str.replace(",", "")
+        df[col] = pd.to_numeric(df[col], errors="coerce")
+    return df
+
+
+def best_of(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000, 20_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--excel", action="store_true", help="قياس xlsx أيضاً (أبطأ في التوليد)")
+    args = parser.parse_args(argv)
+
+    print(f"{'format':<6} {'rows':>8} {'legacy s':>10} {'fast s':>10} {'speedup':>8}")
+    for rows in args.rows:
+        frame = synthetic_export(rows)
+        payloads = [("csv", frame.to_csv(index=False).encode("utf-8-sig"), "export.csv")]
+        if args.excel:
+            buffer = BytesIO()
+            frame.to_excel(buffer, index=False)
+            payloads.append(("xlsx", buffer.getvalue(), "export.xlsx"))
+        for fmt, data, name in payloads:
+            legacy = best_of(lambda: legacy_read(data, name), args.repeat)
+            # مسار الصفحة: التحقق من العناوين ثم التحليل (Excel يُقرأ مرة واحدة للاثنين)
+            fast = best_of(lambda: (check_layout((data, name), ARABIC_BROKER),
+                                    parse_export(data, name, ARABIC_BROKER)), args.repeat)
+            print(f"{fmt:<6} {rows:>8} {legacy:>10.4f} {fast:>10.4f} {legacy / fast:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""عميل الأسعار غير المتزامن مقابل طلب لكل رمز بالتتابع، على خادم Yahoo محلي.
+
+python -m benchmarks.bench_market_client --symbols 200 --latency 0.02
+"""
+import argparse
+import json
+import time
+from urllib.request import urlopen
+
+from tdwl.market_client import CHART_PATH, RetryPolicy, fetch_prices, parse_chart
+from tdwl.stub_server import StubQuoteServer, synthetic_prices
+
+
+def legacy_fetch(base_url, symbols):
+    # اتصال جديد لكل رمز والخطأ يُبتلع كما في الصفحات قبل التحسين
+    prices = {}
+    for symbol in symbols:
+        try:
+            with urlopen(base_url + CHART_PATH.format(symbol=symbol), timeout=10) as response:
+                prices[symbol] = parse_chart(json.load(response))
+        except Exception:
+            prices[symbol] = None
+    return prices
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--symbols", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.02, help="تأخير الخادم لكل طلب بالثواني")
+    parser.add_argument("--flaky", type=int, default=10, help="عدد الرموز التي ترد 503 مرة واحدة")
+    args = parser.parse_args(argv)
+
+    prices = synthetic_prices(args.symbols)
+    symbols = list(prices) + ["0000.SR"]
+    flaky = {symbol: 1 for symbol in symbols[:args.flaky]}
+
+    with StubQuoteServer(prices, flaky=dict(flaky), slow=args.latency) as server:
+        start = time.perf_counter()
+        legacy = legacy_fetch(server.url, symbols)
+        legacy_time = time.perf_counter() - start
+    with StubQuoteServer(prices, flaky=dict(flaky), slow=args.latency) as server:
+        report = fetch_prices(symbols, base_url=server.url, rate=1000, burst=1000,
+                              retry=RetryPolicy(base_delay=0.05))
+
+    missing = sum(price is None for price in legacy.values())
+    print(f"{'client':<8} {'seconds':>8} {'ok':>6} {'none':>6}")
+    print(f"{'legacy':<8} {legacy_time:>8.3f} {len(symbols) - missing:>6} {missing:>6}")
+    print(f"{'async':<8} {report.elapsed:>8.3f} {len(report.prices):>6} {len(report.failures):>6}")
+    print(f"speedup {legacy_time / report.elapsed:.1f}x — {report.summary()}")
+    assert all(report.prices[s] == prices[s] for s in report.prices)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""مقارنة تقرير PDF: cell لكل قيمة مع iterrows كما في الصفحات مقابل tdwl.report.
+
+python -m benchmarks.bench_report --rows 500 5000
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from tdwl.report import FONT_FAMILY, font_files, portfolio_report, summary_lines
+
+
+def synthetic_holdings(rows, rng):
+    return pd.DataFrame({
+        "symbol": [f"{code}.SR" for code in rng.integers(1010, 9999, rows)],
+        "sector": rng.choice(["Financial Services", "Energy", "Basic Materials", "البنوك"], rows),
+        "shares": rng.integers(1, 5_000, rows),
+        "buy_price": rng.uniform(5, 300, rows).round(2),
+        "current_price": rng.uniform(5, 300, rows).round(2),
+        "pnl_percent": rng.uniform(-50, 50, rows).round(2),
+    })
+
+
+def legacy_report(data, summary):
+    # نسخة generate_pdf في الصفحات قبل التحسين (مع تقسيم صفحات تلقائي)
+    from fpdf import FPDF
+
+    pdf = FPDF()
+    pdf.add_page()
+    pdf.add_font(FONT_FAMILY, "", str(font_files()[""]))
+    pdf.set_font(FONT_FAMILY, "", 12)
+    for line in summary:
+        pdf.cell(200, 10, text=line, new_x="LMARGIN", new_y="NEXT")
+    col_widths = [35, 35, 25, 30, 30, 25]
+    pdf.set_font(FONT_FAMILY, "", 10)
+    for _, row in data.iterrows():
+        values = [
+            row["symbol"],
+            row["sector"][:15],
+            str(row["shares"]),
+            f"{row['buy_price']:.2f}",
+            f"{row['current_price']:.2f}",
+            f"{row['pnl_percent']:.2f}%"
+        ]
+        for i, val in enumerate(values):
+            pdf.cell(col_widths[i], 10, val, 1)
+        pdf.ln()
+    return bytes(pdf.output())
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[500, 5_000])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    rng = np.random.default_rng(args.seed)
+    summary = summary_lines((1_000_000.0, 1_100_000.0, 100_000.0, 10.0))
+
+    print(f"{'rows':>8} {'legacy s':>10} {'report s':>10} {'speedup':>8} {'pages':>6}")
+    for rows in args.rows:
+        data = synthetic_holdings(rows, rng)
+        legacy, _ = timed(lambda: legacy_report(data, summary))
+        fast, pdf_bytes = timed(lambda: portfolio_report(data, summary))
+        pages = pdf_bytes.count(b"/Type /Page\n")
+        print(f"{rows:>8} {legacy:>10.4f} {fast:>10.4f} {legacy / fast:>7.1f}x {pages:>6}")
+
+
+if __name__ == "__main__":
+    main()
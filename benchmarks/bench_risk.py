@@ -0,0 +1,96 @@
+"""مقاييس المخاطر: حلقات على الرموز بأسلوب pandas مقابل tdwl.risk المصفوفي.
+
+python -m benchmarks.bench_risk --symbols 500 --years 10
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from tdwl.risk import TRADING_DAYS, portfolio_risk
+
+
+def synthetic_prices(symbols, days, seed=0):
+    rng = np.random.default_rng(seed)
+    # عامل سوق مشترك + عوامل قطاعية حتى تظهر مجموعات مترابطة
+    market = rng.normal(0.0003, 0.01, (days, 1))
+    sectors = rng.normal(0, 0.012, (days, 10))
+    membership = rng.integers(0, 10, symbols)
+    loadings = rng.uniform(0.5, 1.5, symbols)
+    returns = market * loadings + sectors[:, membership] + rng.normal(0, 0.004, (days, symbols))
+    dates = pd.bdate_range("2015-01-04", periods=days, freq="C", weekmask="Sun Mon Tue Wed Thu")
+    columns = [f"{1010 + i}.SR" for i in range(symbols)]
+    prices = pd.DataFrame(50 * np.exp(np.cumsum(returns, axis=0)), index=dates, columns=columns)
+    benchmark = pd.Series(7000 * np.exp(np.cumsum(market[:, 0])), index=dates)
+    weights = pd.Series(rng.uniform(1, 10, symbols), index=columns)
+    return prices, benchmark, weights / weights.sum()
+
+
+def legacy_risk(prices, benchmark, weights, level=0.95, threshold=0.7):
+    # أسلوب شائع: تباين مشترك بحلقتين، عوائد المحفظة صفاً صفاً، مجموعات بالبحث في الرسم
+    returns = prices.pct_change().dropna()
+    symbols = list(returns.columns)
+    cov = returns.cov()
+    variance = 0.0
+    for a in symbols:
+        for b in symbols:
+            variance += weights[a] * weights[b] * cov.loc[a, b]
+    portfolio = returns.apply(lambda row: sum(row[s] * weights[s] for s in symbols), axis=1)
+    bench = benchmark.pct_change().reindex(returns.index)
+    beta = portfolio.cov(bench) / bench.var()
+    var_hist = -portfolio.quantile(1 - level)
+    wealth = (1 + portfolio).cumprod()
+    drawdown = (wealth / wealth.cummax() - 1).min()
+    corr = returns.corr()
+    seen, clusters = set(), []
+    for s in symbols:
+        if s in seen:
+            continue
+        stack, group = [s], []
+        seen.add(s)
+        while stack:
+            current = stack.pop()
+            group.append(current)
+            for other in symbols:
+                if other not in seen and corr.loc[current, other] >= threshold:
+                    seen.add(other)
+                    stack.append(other)
+        clusters.append(group)
+    return np.sqrt(variance * TRADING_DAYS), beta, var_hist, drawdown, len(clusters)
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--symbols", type=int, default=500)
+    parser.add_argument("--years", type=int, default=10)
+    parser.add_argument("--legacy-symbols", type=int, default=100, help="الحلقات بطيئة جداً عند 500 رمز")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    days = args.years * TRADING_DAYS
+
+    prices, benchmark, weights = synthetic_prices(args.symbols, days, args.seed)
+    fast, report = timed(lambda: portfolio_risk(prices, weights, benchmark))
+    print(f"vectorized {args.symbols} x {days}: {fast:.3f}s — vol {report.volatility:.2%} beta {report.beta:.2f} "
+          f"VaR {report.var_historical:.2%}/{report.var_parametric:.2%} MDD {report.max_drawdown:.1%} "
+          f"clusters {report.clusters.nunique()}")
+
+    n = min(args.legacy_symbols, args.symbols)
+    small_prices, small_weights = prices.iloc[:, :n], weights.iloc[:n] / weights.iloc[:n].sum()
+    fast_small, small = timed(lambda: portfolio_risk(small_prices, small_weights, benchmark))
+    legacy, expected = timed(lambda: legacy_risk(small_prices, benchmark, small_weights))
+    assert np.isclose(expected[0], small.volatility, rtol=1e-6)
+    assert np.isclose(expected[1], small.beta, rtol=1e-6)
+    assert np.isclose(expected[3], small.max_drawdown, rtol=1e-9)
+    assert expected[4] == small.clusters.nunique()
+    print(f"legacy {n} x {days}: {legacy:.3f}s vs vectorized {fast_small:.3f}s ({legacy / fast_small:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
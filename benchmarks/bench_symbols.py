@@ -0,0 +1,147 @@
+"""فهرس الرموز المضمّن: زمن التحميل، البحث بالرمز والاسم، والقطاع دون طلب info لكل رمز.
+
+python -m benchmarks.bench_symbols --rows 100000 --info-latency 0.05
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from benchmarks import synthetic
+from tdwl.holdings import CompactHoldings
+from tdwl.ingest import read_export
+from tdwl.quotes import StubBackend, fetch_quotes, fetch_sectors
+from tdwl.schemas import ARABIC_BROKER
+from tdwl.cache import SECTOR, QuoteCache
+from tdwl.symbols import DEFAULT_SECTOR, SymbolIndex
+
+# أسماء كما تكتبها ملفات الوسطاء ← الرمز المتوقع (None: ملتبس أو غير مدرج)
+NAMES = {
+    "مصرف الراجحي": "1120", "الراجحى": "1120", "البنك الأهلي السعودي": "1180", "البنك الأهلى": "1180",
+    "شركة الاتصالات السعودية": "7010", "ارامكو": "2222", "Saudi Aramco": "2222", "جرير للتسويق": "4190",
+    "بنك البلاد": "1140", "شركة المراعي": "2280", "مجموعة تداول السعودية القابضة": "1111",
+    "ساب": "1060", "Jarir": "4190", "Al Rajhi": None, "اسمنت": None, "شركة 9999": None,
+}
+# info من Yahoo لرموز خارج الفهرس ← مجموعة تداول المتوقعة
+YAHOO_INFO = [
+    ({"sector": "Financial Services", "industry": "Banks—Regional"}, "البنوك"),
+    ({"sector": "Financial Services", "industry": "Insurance - Diversified"}, "التأمين"),
+    ({"sector": "Basic Materials", "industry": "Specialty Chemicals"}, "المواد الأساسية"),
+    ({"sector": "Consumer Defensive", "industry": "Grocery Stores"}, "تجزئة الأغذية"),
+    ({"sector": "Industrials", "industry": "Conglomerates"}, DEFAULT_SECTOR),
+    ({"sector": "Real Estate", "industry": "REIT—Diversified"}, "الصناديق العقارية المتداولة"),
+    ({}, DEFAULT_SECTOR),
+]
+
+
+class SlowInfoBackend(StubBackend):
+    """StubBackend بتأخير لكل طلب info كما في yf.Ticker(symbol).info، وبـ info كامل للرموز في infos."""
+
+    def __init__(self, prices, sectors, latency, infos=None):
+        super().__init__(prices, sectors)
+        self.latency = latency
+        self.infos = dict(infos or {})
+
+    def fetch_info(self, symbol):
+        time.sleep(self.latency)
+        info = super().fetch_info(symbol)
+        return self.infos.get(symbol, info)
+
+
+def market(index, unlisted, seed=0):
+    """شركات الفهرس مع رموز غير مدرجة فيه (تبقى لمصدر البيانات) بأسعار وأوزان تجريبية."""
+    rng = np.random.default_rng(seed)
+    listed = list(index)
+    codes = [company.code for company in listed] + [str(9900 + i) for i in range(unlisted)]
+    size = len(codes)
+    return pd.DataFrame({
+        "code": codes,
+        "ticker": [f"{code}.SR" for code in codes],
+        "name_ar": [company.name_ar for company in listed] + [f"شركة {code}" for code in codes[len(listed):]],
+        "name_en": [company.name_en for company in listed] + [f"Company {code}" for code in codes[len(listed):]],
+        "sector": [company.sector for company in listed] + ["Industrials"] * unlisted,
+        "price": rng.lognormal(3.6, 0.8, size).clip(2, 500).round(2),
+        "weight": rng.pareto(1.2, size) + 1,
+    })
+
+
+def timed(func, repeat=1):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--unlisted", type=int, default=len(YAHOO_INFO), help="رموز خارج الفهرس تُطلب من المصدر")
+    parser.add_argument("--info-latency", type=float, default=0.05, help="زمن طلب info الواحد بالثواني")
+    parser.add_argument("--lookups", type=int, default=100_000)
+    args = parser.parse_args(argv)
+
+    load, index = timed(SymbolIndex.load, repeat=5)
+    print(f"load: {load * 1000:.1f}ms — {len(index)} companies, version {index.version}")
+
+    codes = [company.code for company in index]
+    keys = [f"{codes[i % len(codes)]}.SR" for i in range(args.lookups)]
+    lookup, found = timed(lambda: [index.get(key) for key in keys], repeat=3)
+    assert all(found)
+    print(f"get: {lookup / args.lookups * 1e9:.0f}ns per symbol")
+
+    cold, matches = timed(lambda: {name: index.by_name(name) for name in NAMES})
+    warm, _ = timed(lambda: {name: index.by_name(name) for name in NAMES}, repeat=3)
+    for name, code in NAMES.items():
+        assert getattr(matches[name], "code", None) == code, f"{name}: {matches[name]}"
+    print(f"by_name: {cold / len(NAMES) * 1e6:.0f}µs per name cold, {warm / len(NAMES) * 1e6:.1f}µs memoized")
+
+    # القطاع لرموز محفظة: طلب info لكل رمز (قبل الفهرس) مقابل الفهرس ثم المصدر للباقي فقط
+    companies = market(index, args.unlisted)
+    prices, sectors = synthetic.quotes(companies)
+    symbols = list(prices)
+    unlisted = symbols[len(index):]
+    infos = {symbol: YAHOO_INFO[i % len(YAHOO_INFO)][0] for i, symbol in enumerate(unlisted)}
+    backend = SlowInfoBackend(prices, sectors, args.info_latency, infos)
+    legacy, expected = timed(lambda: fetch_sectors(symbols, backend))
+    backend.info_calls = 0
+    indexed, quotes = timed(lambda: fetch_quotes(symbols, backend=backend))
+    assert backend.info_calls == args.unlisted, backend.info_calls
+    assert quotes["sector"].to_dict() == expected
+    # مفردات واحدة: قطاعات Yahoo تصبح مجموعات تداول أو "غير معروف"
+    assert set(quotes["sector"]) <= index.sector_names | {DEFAULT_SECTOR}
+    for i, symbol in enumerate(unlisted):
+        assert quotes.at[symbol, "sector"] == YAHOO_INFO[i % len(YAHOO_INFO)][1], symbol
+    print(f"sectors for {len(symbols)} symbols: {legacy * 1000:.0f}ms per-symbol info → {indexed * 1000:.0f}ms "
+          f"({backend.info_calls} info calls)")
+
+    # الذاكرة المؤقتة: "غير معروف" من info يُخزّن فلا يُطلب مجدداً، والمتعذر لا يُخزّن
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = QuoteCache(Path(tmp) / "quotes.sqlite3")
+        cache.put_many("sector", {unlisted[0]: "Financial Services"})
+        cache = QuoteCache(Path(tmp) / "quotes.sqlite3")
+        assert not cache.get_many("sector", [unlisted[0]]), "قيم Yahoo المخزنة قبل التوحيد تُحذف"
+        fetch_quotes(symbols, backend=backend, cache=cache)
+        backend.info_calls = 0
+        again = fetch_quotes(symbols, backend=backend, cache=cache)
+        assert backend.info_calls == 0 and again["sector"].to_dict() == expected
+        assert set(cache.get_many(SECTOR, unlisted)) == set(unlisted)
+
+    # ملف وسيط بلا عمود قطاع: القطاع لكل صف من الفهرس
+    frame = synthetic.to_layout(synthetic.holdings(args.rows, companies=companies), ARABIC_BROKER)
+    raw = read_export((frame.to_csv(index=False).encode(ARABIC_BROKER.encoding), "broker.csv"), ARABIC_BROKER)
+    book = CompactHoldings.from_export(raw, ARABIC_BROKER)
+    attach, book = timed(lambda: book.with_sectors(index), repeat=3)
+    summary = book.group_values("sector")
+    known = summary.drop(DEFAULT_SECTOR, errors="ignore")
+    assert DEFAULT_SECTOR in summary and len(known) > 10
+    print(f"with_sectors: {attach * 1000:.1f}ms for {args.rows} rows — {len(known)} sectors, "
+          f"{summary[DEFAULT_SECTOR] / summary.sum():.1%} of value unlisted")
+
+
+if __name__ == "__main__":
+    main()
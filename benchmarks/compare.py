@@ -0,0 +1,86 @@
+"""مقارنة نتيجتي benchmarks.run: أي مرحلة أبطأ من الحد تُفشل المقارنة (رمز خروج 1).
+
+python -m benchmarks.compare                    # آخر نتيجتين محفوظتين
+python -m benchmarks.compare c3f9b6c HEAD       # بالإيداع (أو مسار ملف النتيجة)
+python -m benchmarks.compare main               # main مقابل آخر تشغيل
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+from benchmarks.run import RESULTS, git
+
+
+def resolve(ref):
+    """مسار ملف، أو إيداع محفوظ باسمه المختصر (مع -dirty إن لم يوجد غيره)، أو أي مرجع git."""
+    path = Path(ref)
+    if path.is_file():
+        return path
+    commit = git("rev-parse", "--short", ref) or ref
+    for name in (f"{commit}.json", f"{commit}-dirty.json"):
+        if (RESULTS / name).is_file():
+            return RESULTS / name
+    raise SystemExit(f"❌ لا توجد نتيجة محفوظة لـ {ref} — شغّل python -m benchmarks.run على ذلك الإيداع")
+
+
+def load(path):
+    return json.loads(Path(path).read_text(encoding="utf-8"))
+
+
+def latest(count=2):
+    runs = sorted((load(path) | {"path": path} for path in RESULTS.glob("*.json")), key=lambda run: run["ts"])
+    if len(runs) < count:
+        raise SystemExit(f"❌ تحتاج المقارنة {count} نتائج في {RESULTS} على الأقل")
+    return [run["path"] for run in runs[-count:]]
+
+
+def compare(base, head, tolerance, slack_ms):
+    """صفوف المقارنة للمراحل المشتركة: (المفتاح، الأساس، الجديد، النسبة، تراجع؟)."""
+    before = {(r["stage"], r["layout"], r["rows"]): r["best"] for r in base["results"]}
+    rows = []
+    for record in head["results"]:
+        key = (record["stage"], record["layout"], record["rows"])
+        if key not in before:
+            continue
+        old, new = before[key], record["best"]
+        regressed = new > old * (1 + tolerance) + slack_ms / 1000
+        rows.append((key, old, new, new / old if old else float("inf"), regressed))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("refs", nargs="*", help="الأساس ثم الجديد (إيداعات أو ملفات)؛ افتراضياً آخر نتيجتين")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="زيادة نسبية مسموحة")
+    parser.add_argument("--slack-ms", type=float, default=10, help="هامش مطلق لضجيج القياس")
+    args = parser.parse_args(argv)
+
+    if len(args.refs) > 2:
+        parser.error("مرجعان على الأكثر")
+    paths = latest() if not args.refs else [resolve(ref) for ref in args.refs]
+    if len(paths) == 1:
+        # مرجع واحد: الأساس، والجديد آخر نتيجة محفوظة
+        paths.append(latest(1)[0])
+    base, head = load(paths[0]), load(paths[1])
+    if (base["python"], base["cpus"]) != (head["python"], head["cpus"]):
+        print(f"⚠️ بيئتان مختلفتان: {base['python']}/{base['cpus']}cpu مقابل {head['python']}/{head['cpus']}cpu")
+
+    print(f"{base['commit']} ({base['subject'][:40]}) → {head['commit']} ({head['subject'][:40]})")
+    print(f"{'stage':<10} {'layout':<15} {'rows':>8} {'base ms':>10} {'head ms':>10} {'change':>8}")
+    rows = compare(base, head, args.tolerance, args.slack_ms)
+    for (stage, layout, size), old, new, ratio, regressed in rows:
+        print(f"{stage:<10} {layout:<15} {size:>8} {old * 1000:>10.2f} {new * 1000:>10.2f} "
+              f"{(ratio - 1) * 100:>+7.1f}% {'❌' if regressed else ''}")
+    regressions = sum(row[-1] for row in rows)
+    if not rows:
+        print("⚠️ لا مراحل مشتركة بين النتيجتين")
+    elif regressions:
+        print(f"❌ {regressions} تراجع أكبر من {args.tolerance:.0%} + {args.slack_ms:g}ms")
+    else:
+        print(f"✅ لا تراجع في {len(rows)} قياس")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
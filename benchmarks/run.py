@@ -0,0 +1,159 @@
+"""مجموعة القياس الكاملة على محافظ تجريبية وخادم أسعار محلي؛ النتيجة تُحفظ باسم الإيداع الحالي.
+
+المراحل: قراءة الملف، جلب الأسعار والقطاعات، التقييم، الرسم، تقرير PDF، ومؤشر الخوف.
+كل مرحلة تُقاس بذاكرة مؤقتة فارغة (تشغيل بارد) وتُسجل أفضل زمن ووسيطه من --repeat محاولات.
+
+python -m benchmarks.run
+python -m benchmarks.run --sizes 10 1000 --layouts simple --stages ingest valuation
+python -m benchmarks.compare   # مقارنة آخر نتيجتين
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+from benchmarks import synthetic
+from tdwl import charts, ingest
+from tdwl.fear import market_fear, sector_fear
+from tdwl.market_client import AsyncYahooBackend
+from tdwl.market_data import SyntheticProvider
+from tdwl.quotes import StubBackend, fetch_quotes
+from tdwl.report import portfolio_report, summary_lines
+from tdwl.stub_server import StubQuoteServer
+from tdwl.valuation import group_values, value_portfolio
+
+ROOT = Path(__file__).resolve().parent.parent
+RESULTS = Path(__file__).with_name("results")
+STAGES = ("ingest", "quotes", "valuation", "chart", "pdf", "fear")
+# سنة وعشر سنوات تداول
+FEAR_DAYS = (250, 2_500)
+# تاريخ ثابت حتى لا تتغير بيانات المؤشر التجريبية بين يوم وآخر
+FEAR_END = "2024-12-31"
+
+
+def git(*args):
+    output = subprocess.run(["git", *args], cwd=ROOT, capture_output=True, text=True)
+    return output.stdout.strip() if output.returncode == 0 else ""
+
+
+def revision():
+    """الإيداع المختصر؛ -dirty إذا كانت هناك تعديلات غير مودعة على الملفات المتتبعة."""
+    commit = git("rev-parse", "--short", "HEAD") or "unknown"
+    return commit + ("-dirty" if git("status", "--porcelain", "--untracked-files=no") else "")
+
+
+def measure(func, repeat, reset=None):
+    """(أفضل زمن، الوسيط، نتيجة آخر تشغيل)؛ reset يفرغ الذاكرة المؤقتة قبل كل محاولة."""
+    timings = []
+    for _ in range(repeat):
+        if reset is not None:
+            reset()
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return min(timings), statistics.median(timings), result
+
+
+def portfolio_stages(layout, rows, backend, stages, args):
+    """يقيس مسار الصفحة لملف واحد: كل مرحلة تأخذ ناتج السابقة."""
+    data, name = synthetic.export(rows, layout, seed=args.seed)
+    results = {}
+
+    best, median, df = measure(lambda: ingest.read_canonical((data, name)), args.repeat, ingest._frames.clear)
+    results["ingest"] = best, median
+    best, median, quotes = measure(lambda: fetch_quotes(df["symbol"], backend=backend), args.repeat)
+    results["quotes"] = best, median
+    best, median, valuation = measure(lambda: value_portfolio(df, quotes), args.repeat)
+    results["valuation"] = best, median
+
+    holdings = valuation.holdings
+    assert len(holdings) == rows and holdings["current_price"].notna().all(), f"{name}: أسعار ناقصة"
+    if layout is not synthetic.SIMPLE:
+        assert np.allclose(holdings["current_price"], holdings["market_price"]), f"{name}: سعر الخادم لا يطابق الملف"
+
+    if "chart" in stages:
+        best, median, _ = measure(lambda: charts.pie_chart(group_values(holdings, by="symbol")), args.repeat,
+                                  charts._specs.clear)
+        results["chart"] = best, median
+    if "pdf" in stages and rows <= args.pdf_max:
+        summary = summary_lines(valuation.totals)
+        best, median, pdf = measure(lambda: portfolio_report(holdings, summary), args.repeat)
+        assert pdf.startswith(b"%PDF")
+        results["pdf"] = best, median
+    return {stage: timing for stage, timing in results.items() if stage in stages}
+
+
+def fear_stages(days, repeat, seed):
+    panel = SyntheticProvider(seed).panel(days, end=FEAR_END)
+
+    def score():
+        return market_fear(panel.market), sector_fear(panel.sector)
+
+    best, median, (market, sectors) = measure(score, repeat)
+    assert market.shape == (days,) and sectors.shape == (days, len(panel.sectors))
+    return best, median
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(synthetic.SIZES))
+    parser.add_argument("--layouts", nargs="+", default=list(synthetic.layouts()), choices=list(synthetic.layouts()))
+    parser.add_argument("--stages", nargs="+", default=list(STAGES), choices=STAGES)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--pdf-max", type=int, default=10_000, help="أكبر محفظة يُقاس تقريرها (آلاف الصفحات بعدها)")
+    parser.add_argument("--output", type=Path, default=None, help="ملف النتيجة (افتراضياً results/<commit>.json)")
+    args = parser.parse_args(argv)
+
+    layouts = synthetic.layouts()
+    prices, sectors = synthetic.quotes(seed=args.seed)
+    records = []
+
+    def record(stage, layout, rows, timing):
+        best, median = timing
+        records.append({"stage": stage, "layout": layout, "rows": rows,
+                        "best": round(best, 6), "median": round(median, 6)})
+        print(f"{stage:<10} {layout:<15} {rows:>8} {best * 1000:>10.2f} {median * 1000:>10.2f}")
+
+    print(f"{'stage':<10} {'layout':<15} {'rows':>8} {'best ms':>10} {'median ms':>10}")
+    # الأسعار من خادم HTTP محلي عبر نفس العميل غير المتزامن الذي تستخدمه الصفحات؛ القطاعات من StubBackend
+    with StubQuoteServer(prices) as server:
+        backend = AsyncYahooBackend(info_backend=StubBackend(sectors=sectors), base_url=server.url,
+                                    rate=10_000, burst=10_000)
+        for layout_name in args.layouts:
+            for rows in args.sizes:
+                timings = portfolio_stages(layouts[layout_name], rows, backend, args.stages, args)
+                for stage, timing in timings.items():
+                    record(stage, layout_name, rows, timing)
+    if "fear" in args.stages:
+        for days in FEAR_DAYS:
+            record("fear", "market", days, fear_stages(days, args.repeat, args.seed))
+
+    commit = revision()
+    result = {
+        "commit": commit,
+        "subject": git("log", "-1", "--format=%s"),
+        "ts": round(time.time(), 3),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "seed": args.seed,
+        "repeat": args.repeat,
+        "results": records,
+    }
+    output = args.output or RESULTS / f"{commit}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(result, indent=1, ensure_ascii=False) + "\n", encoding="utf-8")
+    print(f"✅ {output.relative_to(ROOT) if output.is_relative_to(ROOT) else output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
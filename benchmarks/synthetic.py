@@ -0,0 +1,89 @@
+"""محافظ وبيانات سوق تجريبية قابلة للتكرار لكل صيغ التصدير الثلاث.
+
+نفس البذرة ونفس الحجم يعطيان نفس البايتات دائماً، فتُقارن القياسات بين الإيداعات.
+الصفوف تُسحب من سوق ثابت بحجم تداول (~250 شركة)؛ الكتب الكبيرة متعددة العملاء تكرر الرموز
+بأوزان غير متساوية كما في الواقع (الشركات الكبرى تظهر أكثر).
+"""
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+
+from tdwl.market_data import SECTORS
+from tdwl.schemas import ARABIC_BROKER, LAYOUTS, SIMPLE
+
+UNIVERSE_SIZE = 250
+SIZES = (10, 1_000, 10_000, 100_000)
+# سعر الإغلاق ليس في المخطط الموحد لكنه في ملفات الوسطاء
+CLOSING = {"سعر الإغلاق": "market_price", "Closing Price": "market_price"}
+
+
+def universe(size=UNIVERSE_SIZE, seed=0):
+    """الشركات المدرجة: رمز رقمي، رمز Yahoo، اسمان، قطاع، سعر ووزن ظهور."""
+    rng = np.random.default_rng([seed, size])
+    codes = np.sort(rng.choice(np.arange(1010, 9999), size=size, replace=False))
+    return pd.DataFrame({
+        "code": codes.astype(str),
+        "ticker": [f"{code}.SR" for code in codes],
+        "name_ar": [f"شركة {code}" for code in codes],
+        "name_en": [f"Company {code}" for code in codes],
+        "sector": rng.choice(SECTORS, size),
+        "price": rng.lognormal(3.6, 0.8, size).clip(2, 500).round(2),
+        "weight": rng.pareto(1.2, size) + 1,
+    })
+
+
+def holdings(rows, seed=0, companies=None):
+    """صفوف المحفظة بالحقول الأساسية قبل تحويلها إلى صيغة ملف."""
+    companies = universe(seed=seed) if companies is None else companies
+    rng = np.random.default_rng([seed, rows])
+    weight = companies["weight"].to_numpy()
+    pick = rng.choice(len(companies), size=rows, p=weight / weight.sum())
+    chosen = companies.iloc[pick].reset_index(drop=True)
+    market = chosen["price"].to_numpy()
+    buy = (market * rng.uniform(0.6, 1.4, rows)).round(2)
+    shares = rng.integers(1, 20_000, rows)
+    cost = shares * buy
+    value = shares * market
+    return chosen[["code", "ticker", "name_ar", "name_en", "sector"]].assign(
+        shares=shares, buy_price=buy, market_price=market, cost=cost.round(2), value=value.round(2),
+        pnl=(value - cost).round(2), return_pct=((value - cost) / cost * 100).round(2),
+    )
+
+
+def to_layout(frame, layout):
+    """نفس الصفوف بعناوين الصيغة المطلوبة؛ أعمدة الوسطاء بفواصل الآلاف كنص كما تصدرها المنصات."""
+    if layout is SIMPLE:
+        return pd.DataFrame({"symbol": frame["ticker"], "shares": frame["shares"], "buy_price": frame["buy_price"]})
+    name = "name_ar" if layout is ARABIC_BROKER else "name_en"
+    fields = {"symbol": frame["code"], "name": frame[name], **{field: frame[field] for field in
+              ("shares", "buy_price", "market_price", "cost", "value", "pnl", "return_pct")}}
+    mapping = {**CLOSING, **layout.canonical}
+    # الأعمدة خارج المخطط الموحد (المرهون وغير المسوّى) أصفار
+    out = pd.DataFrame({column: fields[mapping[column]] if column in mapping else 0 for column in layout.columns})
+    money = [column for column, canonical in layout.canonical.items() if canonical in ("shares", "cost", "value", "pnl")]
+    for column in money:
+        out[column] = out[column].map("{:,.2f}".format)
+    return out
+
+
+def export(rows, layout, seed=0, fmt="csv"):
+    """(بايتات، اسم ملف) لملف تصدير جاهز لـ read_canonical أو valuate_upload."""
+    frame = to_layout(holdings(rows, seed), layout)
+    name = f"{layout.name}_{rows}.{fmt}"
+    if fmt == "csv":
+        return frame.to_csv(index=False).encode(layout.encoding), name
+    buffer = BytesIO()
+    frame.to_excel(buffer, index=False)
+    return buffer.getvalue(), name
+
+
+def quotes(companies=None, seed=0):
+    """أسعار وقطاعات السوق التجريبي بمفاتيح رموز Yahoo (لخادم الأسعار المحلي و StubBackend)."""
+    companies = universe(seed=seed) if companies is None else companies
+    prices = dict(zip(companies["ticker"], companies["price"].astype(float)))
+    return prices, dict(zip(companies["ticker"], companies["sector"]))
+
+
+def layouts():
+    return {layout.name: layout for layout in LAYOUTS}
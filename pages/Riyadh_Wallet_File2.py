@@ -1,40 +1,43 @@
 import streamlit as st
-import pandas as pd
-import matplotlib.pyplot as plt
-from fpdf import FPDF
-from io import BytesIO
+from tdwl import profiling
+from tdwl.warm import warm
+
+# pandas وبقية الوحدات تُحمّل في الخلفية وتُستورد عند رفع ملف فقط
+warm()
+profile = profiling.page("Riyadh_Wallet_File2")
+
 st.set_page_config(page_title="📊 تحليل المحفظة الاستثمارية", layout="wide")
 st.title("📈 تقييم المحفظة - السوق السعودي")
 
 uploaded_file = st.file_uploader("📥 قم بتحميل ملف Excel أو CSV يحتوي على المحفظة", type=["xlsx", "csv"])
 
 if uploaded_file:
-    if uploaded_file.name.endswith(".csv"):
-        df = pd.read_csv(uploaded_file, encoding="utf-8-sig", thousands=",")
-    else:
-        df = pd.read_excel(uploaded_file, thousands=",")
-
-    # التأكد من الأعمدة
-    required_cols = {
-        "الرمز", "الشركة", "المحفظة", "مرهون", "متوسط التكلفة",
-        "بيع تحت التسوية", "شراء تحت التسوية", "سعر السوق",
-        "إجمالي التكلفة", "القيمة السوقية", "الربح/الخسارة", "العائد", "سعر الإغلاق"
-    }
-
-    if not required_cols.issubset(set(df.columns)):
-        st.error(f"❌ الملف يجب أن يحتوي على الأعمدة التالية:\n{required_cols}")
+    from tdwl.charts import pie_chart
+    from tdwl.holdings import DISPLAY_FIELDS, compact_export
+    from tdwl.render_queue import default_service
+    from tdwl.report import BROKER_REPORT_COLUMNS, BROKER_SUMMARY_LABELS, summary_lines
+    from tdwl.ingest import check_layout, to_ticker
+    from tdwl.risk import holdings_risk, risk_alerts
+    from tdwl.schemas import ARABIC_BROKER
+    from tdwl.symbols import symbol_index
+
+    # التأكد من الأعمدة من صف العناوين فقط قبل قراءة الملف
+    missing_cols = check_layout(uploaded_file, ARABIC_BROKER)
+
+    if missing_cols:
+        st.error(f"❌ الملف يجب أن يحتوي على الأعمدة التالية:\n{ARABIC_BROKER.required}")
     else:
-        # تحويل الأعمدة الرقمية
-        numeric_cols = ["المحفظة", "مرهون", "متوسط التكلفة", "بيع تحت التسوية", "شراء تحت التسوية",
-                        "سعر السوق", "إجمالي التكلفة", "القيمة السوقية", "الربح/الخسارة", "العائد", "سعر الإغلاق"]
-        for col in numeric_cols:
-            df[col] = pd.to_numeric(df[col], errors="coerce")
+        # قراءة بمخطط أعمدة صريح في تمثيل مضغوط هو وحده المحفوظ مع الملف؛ الجداول تُبنى منه للعرض
+        book = compact_export(uploaded_file, ARABIC_BROKER)
+        table = book.frame(DISPLAY_FIELDS)
 
         # حساب الإجماليات
-        total_cost = df["إجمالي التكلفة"].sum()
-        total_value = df["القيمة السوقية"].sum()
-        total_gain = df["الربح/الخسارة"].sum()
-        total_return = (total_gain / total_cost) * 100 if total_cost else 0
+        total_cost, total_value, total_gain, total_return = book.totals()
+
+        # التقرير يُرسم في عملية الخدمة الخلفية بينما تُعرض بقية الصفحة
+        render_service = default_service()
+        summary = summary_lines((total_cost, total_value, total_gain, total_return), labels=BROKER_SUMMARY_LABELS)
+        report_key = render_service.report(table, summary, columns=BROKER_REPORT_COLUMNS)
 
         # عرض ملخص المحفظة
         col1, col2, col3 = st.columns(3)
@@ -44,128 +47,77 @@ if uploaded_file:
 
         # عرض جدول المحفظة
         st.subheader("📋 تفاصيل الأسهم في المحفظة")
-        selected_cols = [
-            "الرمز", "الشركة", "المحفظة", "متوسط التكلفة", "سعر السوق",
-            "إجمالي التكلفة", "القيمة السوقية", "الربح/الخسارة", "العائد"
-        ]
-        st.dataframe(df[selected_cols].round(2), use_container_width=True)
+        st.dataframe(table.round(2), use_container_width=True)
 
         # توزيع الأسهم
         st.subheader("📊 توزيع المحفظة حسب الأسهم")
-        weights = df.set_index("الشركة")["القيمة السوقية"].dropna()
-        weights = weights[weights > 0]
+        weights = book.group_values("name")
         if not weights.empty:
-            fig, ax = plt.subplots()
-            ax.pie(weights, labels=weights.index, autopct="%1.1f%%", startangle=90)
-            ax.axis("equal")
-            st.pyplot(fig)
+            st.plotly_chart(pie_chart(weights), use_container_width=True)
         else:
             st.warning("⚠️ لا توجد بيانات صالحة للرسم البياني.")
 
         # الأسهم الرابحة والخاسرة
         st.subheader("🔍 الأسهم الرابحة والخاسرة")
-        winners = df[df["الربح/الخسارة"] > 0].sort_values("الربح/الخسارة", ascending=False)
-        losers = df[df["الربح/الخسارة"] < 0].sort_values("الربح/الخسارة")
+        winners, losers = book.winners(), book.losers()
 
         col1, col2 = st.columns(2)
         with col1:
             st.success("🟢 الأسهم الرابحة")
-            st.dataframe(winners[["الرمز", "الشركة", "الربح/الخسارة", "العائد"]].round(2))
+            st.dataframe(winners.frame(["symbol", "name", "pnl", "pnl_percent"]).round(2))
         with col2:
             st.error("🔴 الأسهم الخاسرة")
-            st.dataframe(losers[["الرمز", "الشركة", "الربح/الخسارة", "العائد"]].round(2))
+            st.dataframe(losers.frame(["symbol", "name", "pnl", "pnl_percent"]).round(2))
 
     # تنبيهات ذكية
         st.subheader("🚦 توصيات وتنبيهات ذكية")
         col1, col2 = st.columns(2)
+        gainers, losers = book.movers(10)
 
         with col1:
-            gainers = df[df["العائد"] >= 10]
             st.success(f"🟢 أسهم رابحة (+10%): {len(gainers)}")
-            st.dataframe(gainers[["الرمز", "المحفظة"]].round(2))
+            st.dataframe(gainers.frame(["symbol", "shares"]).round(2))
 
         with col2:
-            losers = df[df["العائد"] <= -10]
             st.error(f"🔴 أسهم خاسرة (-10%): {len(losers)}")
-            st.dataframe(losers[["الرمز", "المحفظة"]].round(2))
-
-        # رسم بياني للقطاعات
-        #st.subheader("📊 توزيع المحفظة حسب القطاعات")
-        #sector_summary = df.groupby("sector")["current_value"].sum()
-        #fig, ax = plt.subplots()
-        #ax.pie(sector_summary, labels=sector_summary.index, autopct="%1.1f%%", startangle=90)
-        #ax.axis("equal")
-        #st.pyplot(fig)
-        
-        sector_summary = df.groupby("الشركة")["القيمة السوقية"].sum()
+            st.dataframe(losers.frame(["symbol", "shares"]).round(2))
+
+        # مخاطر المحفظة من تاريخ الأسعار المحلي دون طلبات شبكة
+        positions = book.frame(["symbol", "value"])
+        risk = holdings_risk(positions.assign(symbol=to_ticker(positions["الرمز"])), value="القيمة السوقية")
+        if risk is None:
+            st.caption("ℹ️ لا يوجد تاريخ أسعار محلي كافٍ لحساب المخاطر. شغّل: python -m tdwl.ohlcv --file <ملف المحفظة>")
+        else:
+            col1, col2, col3, col4 = st.columns(4)
+            col1.metric("📉 التقلب السنوي", f"{risk.volatility:.1%}")
+            col2.metric("📈 Beta مقابل تاسي", f"{risk.beta:.2f}")
+            col3.metric("🛡️ VaR يومي (95%)", f"{risk.var_historical:.2%}")
+            col4.metric("⬇️ أقصى تراجع", f"{risk.max_drawdown:.1%}")
+            st.caption(f"ℹ️ على {risk.coverage:.0%} من قيمة المحفظة ({risk.days} يوم تداول)؛ "
+                       "الرموز بلا تاريخ أسعار محلي مستبعدة")
+            for alert in risk_alerts(risk):
+                st.warning(alert)
+
+        # توزيع القطاعات من فهرس الرموز المضمّن (الملف لا يحمل قطاعاً) دون طلبات شبكة
+        st.subheader("📊 توزيع المحفظة حسب القطاعات")
+        sector_summary = book.group_values("sector")
 
         st.write("بيانات القطاعات:", sector_summary)  # عرض البيانات
-        
-        # تنظيف البيانات
-        sector_summary = sector_summary.dropna()
-        sector_summary = sector_summary[sector_summary > 0]
-        
+
         if sector_summary.empty:
             st.warning("⚠️ لا توجد بيانات صحيحة للرسم البياني.")
         else:
-            import matplotlib.pyplot as plt
-            plt.close('all')
-            fig, ax = plt.subplots()
-            ax.pie(sector_summary, labels=sector_summary.index, autopct="%1.1f%%", startangle=90)
-            ax.axis("equal")
-            st.pyplot(fig)
-#----------------------99999999999999999--------------------------
+            st.plotly_chart(pie_chart(sector_summary), use_container_width=True)
+        st.caption(symbol_index().coverage(sector_summary))
+
         # تقرير PDF
         st.subheader("📄 تحميل تقرير PDF")
-        from fpdf import FPDF
-
-    def generate_pdf(data):
-        pdf = FPDF()
-        pdf.add_page()
-        pdf.add_font('Cairo', '', 'Cairo-Regular.ttf', uni=True)
-        pdf.set_font("Cairo", "", 14)
-    
-        pdf.cell(200, 10, txt="تقرير المحفظة الاستثمارية - السوق السعودي", ln=True, align="C")
-        pdf.ln(10)
-    
-        # ملخص
-        pdf.set_font("Cairo", "", 12)
-        pdf.cell(200, 10, txt=f"إجمالي الشراء: {total_initial:,.2f} ريال", ln=True)
-        pdf.cell(200, 10, txt=f"القيمة الحالية: {total_current:,.2f} ريال", ln=True)
-        pdf.cell(200, 10, txt=f"الربح / الخسارة: {total_pnl:,.2f} ريال ({total_pnl_percent:.2f}%)", ln=True)
-        pdf.ln(10)
-    
-        # رؤوس الجدول
-        pdf.set_font("Cairo", "B", 11)
-        headers = ["السهم", "القطاع", "الكمية", "سعر الشراء", "السعر الحالي", "الربح %"]
-        col_widths = [35, 35, 25, 30, 30, 25]
-        for i, header in enumerate(headers):
-            pdf.cell(col_widths[i], 10, header, 1)
-        pdf.ln()
-    
-        # الصفوف
-        pdf.set_font("Cairo", "", 10)
-        for _, row in data.iterrows():
-            values = [
-                row["symbol"],
-                row["sector"][:15],
-                str(row["shares"]),
-                f"{row['buy_price']:.2f}",
-                f"{row['current_price']:.2f}",
-                f"{row['pnl_percent']:.2f}%"
-            ]
-            for i, val in enumerate(values):
-                pdf.cell(col_widths[i], 10, val, 1)
-            pdf.ln()
-    
-        # حفظ الملف في الذاكرة
-        buffer = BytesIO()
-        pdf.output(buffer)
-        buffer.seek(0)
-        return buffer
-        
-        pdf_buffer = generate_pdf(df)
-        st.download_button("📥 تحميل التقرير كـ PDF", data=pdf_buffer.getvalue(), file_name="portfolio_report.pdf", mime="application/pdf")
+        report_progress = st.progress(0.0, text="⏳ يتم إعداد التقرير...")
+        pdf_bytes = render_service.wait(report_key, on_progress=report_progress.progress)
+        report_progress.empty()
+        st.download_button("📥 تحميل التقرير كـ PDF", data=pdf_bytes, file_name="portfolio_report.pdf", mime="application/pdf")
 
 else:
     st.info("👈 يرجى رفع ملف محفظتك للبدء.")
+
+profiling.debug_panel(profile)
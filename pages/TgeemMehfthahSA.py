@@ -1,10 +1,11 @@
 # مكتبات التحليل والتقارير
 import streamlit as st
-import pandas as pd
-import yfinance as yf
-import matplotlib.pyplot as plt
-from fpdf import FPDF
-from io import BytesIO
+from tdwl import profiling
+from tdwl.warm import warm
+
+# pandas وبقية الوحدات تُحمّل في الخلفية وتُستورد عند رفع ملف فقط
+warm()
+profile = profiling.page("TgeemMehfthahSA")
 
 # إعداد الصفحة
 st.set_page_config(page_title="📊 تقييم المحفظة السعودية الذكي", layout="wide")
@@ -14,42 +15,32 @@ st.title("📊 تقييم محفظة استثمارية في السوق السع
 uploaded_file = st.file_uploader("📥 قم بتحميل ملف CSV يحتوي على بيانات المحفظة", type=["csv"])
 
 if uploaded_file:
-    df = pd.read_csv(uploaded_file)
-
-    required_cols = {"symbol", "shares", "buy_price"}
-    if not required_cols.issubset(df.columns):
-        st.error(f"❌ الملف يجب أن يحتوي على الأعمدة التالية: {required_cols}")
-    else:
+    from tdwl.charts import pie_chart
+    from tdwl.cache import default_cache
+    from tdwl.quotes import price_failures
+    from tdwl.render_queue import default_service
+    from tdwl.report import summary_lines
+    from tdwl.valuation import movers, valuate_upload
+
+    try:
         with st.spinner("🔄 يتم الآن تحميل الأسعار والقطاعات..."):
-
-            def fetch_data(symbol):
-                try:
-                    ticker = yf.Ticker(symbol)
-                    hist = ticker.history(period="1d")
-                    info = ticker.info
-                    return {
-                        "price": hist["Close"].iloc[-1] if not hist.empty else None,
-                        "sector": info.get("sector", "غير معروف")
-                    }
-                except:
-                    return {"price": None, "sector": "غير معروف"}
-
-            results = df["symbol"].apply(fetch_data)
-            df["current_price"] = [r["price"] for r in results]
-            df["sector"] = [r["sector"] for r in results]
-
-        df["initial_value"] = df["shares"] * df["buy_price"]
-        df["current_value"] = df["shares"] * df["current_price"]
-        df["pnl"] = df["current_value"] - df["initial_value"]
-        df["pnl_percent"] = (df["pnl"] / df["initial_value"]) * 100
-
-        # إجماليات
-        total_initial = df["initial_value"].sum()
-        total_current = df["current_value"].sum()
-        total_pnl = df["pnl"].sum()
-        total_pnl_percent = (total_pnl / total_initial) * 100 if total_initial else 0
+            # التقييم يُحسب مرة واحدة لكل محتوى ملف ويُعاد استخدامه في إعادة التشغيل
+            valuation = valuate_upload(uploaded_file.getvalue(), uploaded_file.name, cache=default_cache())
+    except ValueError as e:
+        st.error(str(e))
+    else:
+        df = valuation.holdings
+        # التقرير يبدأ في الخلفية فوراً بينما تُعرض بقية الصفحة
+        render_service = default_service()
+        report_key = render_service.report(df, summary_lines(valuation.totals))
+        total_initial, total_current, total_pnl, total_pnl_percent = valuation.totals
 
         st.success("✅ تم حساب المحفظة وتحليلها بنجاح!")
+        unpriced = df.loc[df["current_price"].isna(), "symbol"]
+        if not unpriced.empty:
+            failures = price_failures(unpriced)
+            st.warning("⚠️ تعذر جلب سعر: " + "، ".join(
+                f"{s} ({failures[s].reason})" if s in failures else s for s in unpriced.unique()))
 
         # جدول التحليل
         st.subheader("📋 تفاصيل المحفظة")
@@ -59,13 +50,12 @@ if uploaded_file:
         st.subheader("🚦 توصيات وتنبيهات ذكية")
         col1, col2 = st.columns(2)
 
+        gainers, losers = movers(df, "pnl_percent", 10)
         with col1:
-            gainers = df[df["pnl_percent"] >= 10]
             st.success(f"🟢 أسهم رابحة (+10%): {len(gainers)}")
             st.dataframe(gainers[["symbol", "pnl_percent"]].round(2))
 
         with col2:
-            losers = df[df["pnl_percent"] <= -10]
             st.error(f"🔴 أسهم خاسرة (-10%): {len(losers)}")
             st.dataframe(losers[["symbol", "pnl_percent"]].round(2))
 
@@ -77,75 +67,24 @@ if uploaded_file:
         #ax.axis("equal")
         #st.pyplot(fig)
         
-        sector_summary = df.groupby("sector")["current_value"].sum()
+        sector_summary = valuation.sectors
 
         st.write("بيانات القطاعات:", sector_summary)  # عرض البيانات
         
-        # تنظيف البيانات
-        sector_summary = sector_summary.dropna()
-        sector_summary = sector_summary[sector_summary > 0]
-        
         if sector_summary.empty:
             st.warning("⚠️ لا توجد بيانات صحيحة للرسم البياني.")
         else:
-            import matplotlib.pyplot as plt
-            plt.close('all')
-            fig, ax = plt.subplots()
-            ax.pie(sector_summary, labels=sector_summary.index, autopct="%1.1f%%", startangle=90)
-            ax.axis("equal")
-            st.pyplot(fig)
-#----------------------99999999999999999--------------------------
-        # تقرير PDF
-        st.subheader("📄 تحميل تقرير PDF")
-        from fpdf import FPDF
+            # مواصفة plotly محفوظة ببصمة البيانات؛ المتصفح يرسمها دون صورة من الخادم
+            st.plotly_chart(pie_chart(sector_summary), use_container_width=True)
 
-    def generate_pdf(data):
-        pdf = FPDF()
-        pdf.add_page()
-        pdf.add_font('Cairo', '', 'Cairo-Regular.ttf', uni=True)
-        pdf.set_font("Cairo", "", 14)
-    
-        pdf.cell(200, 10, txt="تقرير المحفظة الاستثمارية - السوق السعودي", ln=True, align="C")
-        pdf.ln(10)
-    
-        # ملخص
-        pdf.set_font("Cairo", "", 12)
-        pdf.cell(200, 10, txt=f"إجمالي الشراء: {total_initial:,.2f} ريال", ln=True)
-        pdf.cell(200, 10, txt=f"القيمة الحالية: {total_current:,.2f} ريال", ln=True)
-        pdf.cell(200, 10, txt=f"الربح / الخسارة: {total_pnl:,.2f} ريال ({total_pnl_percent:.2f}%)", ln=True)
-        pdf.ln(10)
-    
-        # رؤوس الجدول
-        pdf.set_font("Cairo", "B", 11)
-        headers = ["السهم", "القطاع", "الكمية", "سعر الشراء", "السعر الحالي", "الربح %"]
-        col_widths = [35, 35, 25, 30, 30, 25]
-        for i, header in enumerate(headers):
-            pdf.cell(col_widths[i], 10, header, 1)
-        pdf.ln()
-    
-        # الصفوف
-        pdf.set_font("Cairo", "", 10)
-        for _, row in data.iterrows():
-            values = [
-                row["symbol"],
-                row["sector"][:15],
-                str(row["shares"]),
-                f"{row['buy_price']:.2f}",
-                f"{row['current_price']:.2f}",
-                f"{row['pnl_percent']:.2f}%"
-            ]
-            for i, val in enumerate(values):
-                pdf.cell(col_widths[i], 10, val, 1)
-            pdf.ln()
-    
-        # حفظ الملف في الذاكرة
-        buffer = BytesIO()
-        pdf.output(buffer)
-        buffer.seek(0)
-        return buffer
-        
-        pdf_buffer = generate_pdf(df)
-        st.download_button("📥 تحميل التقرير كـ PDF", data=pdf_buffer.getvalue(), file_name="portfolio_report.pdf", mime="application/pdf")
+        # تقرير PDF (الجدول يُنسّق عمودياً ويُرسم صفاً صفاً دون iterrows)
+        st.subheader("📄 تحميل تقرير PDF")
+        report_progress = st.progress(0.0, text="⏳ يتم إعداد التقرير...")
+        pdf_bytes = render_service.wait(report_key, on_progress=report_progress.progress)
+        report_progress.empty()
+        st.download_button("📥 تحميل التقرير كـ PDF", data=pdf_bytes, file_name="portfolio_report.pdf", mime="application/pdf")
 
 else:
     st.info("👈 يرجى رفع ملف محفظتك للبدء.")
+
+profiling.debug_panel(profile)
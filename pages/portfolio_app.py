@@ -1,6 +1,10 @@
 import streamlit as st
-import pandas as pd
-import yfinance as yf
+from tdwl import profiling
+from tdwl.warm import warm
+
+# pandas وبقية الوحدات تُحمّل في الخلفية وتُستورد عند رفع ملف فقط
+warm()
+profile = profiling.page("portfolio_app")
 
 st.set_page_config(page_title="📊 تقييم المحفظة - السوق السعودي", layout="wide")
 st.title("📊 تقييم محفظة استثمارية في السوق السعودي")
@@ -9,43 +13,32 @@ st.title("📊 تقييم محفظة استثمارية في السوق السع
 uploaded_file = st.file_uploader("📥 قم بتحميل ملف CSV أو Excel يحتوي على بيانات المحفظة", type=["csv", "xlsx"])
 
 if uploaded_file:
-    # قراءة الملف
-    if uploaded_file.name.endswith(".csv"):
-        df = pd.read_csv(uploaded_file)
-    else:
-        df = pd.read_excel(uploaded_file)
-
-    # التحقق من الأعمدة المطلوبة
-    required_cols = {"symbol", "shares", "buy_price"}
-    if not required_cols.issubset(df.columns):
-        st.error(f"❌ الملف يجب أن يحتوي على الأعمدة التالية: {required_cols}")
-    else:
-        # جلب الأسعار الحالية من Yahoo Finance
-        def get_price(symbol):
-            try:
-                ticker = yf.Ticker(symbol)
-                hist = ticker.history(period="1d")
-                return hist["Close"].iloc[-1]
-            except:
-                return None
+    from tdwl.cache import default_cache
+    from tdwl.quotes import price_failures
+    from tdwl.valuation import valuate_upload
 
+    try:
+        # جلب الأسعار الحالية من Yahoo Finance دفعة واحدة لكل الرموز
         st.info("⏳ يتم الآن تحميل الأسعار الحالية للأسهم...")
-        df["current_price"] = df["symbol"].apply(get_price)
-        df["current_value"] = df["shares"] * df["current_price"]
-        df["initial_value"] = df["shares"] * df["buy_price"]
-        df["pnl"] = df["current_value"] - df["initial_value"]
-        df["pnl_percent"] = (df["pnl"] / df["initial_value"]) * 100
+        valuation = valuate_upload(uploaded_file.getvalue(), uploaded_file.name,
+                                   with_sector=False, cache=default_cache())
+    except ValueError as e:
+        st.error(str(e))
+    else:
+        df = valuation.holdings
 
         st.success("✅ تم حساب التقييم بنجاح")
+        unpriced = df.loc[df["current_price"].isna(), "symbol"]
+        if not unpriced.empty:
+            failures = price_failures(unpriced)
+            st.warning("⚠️ تعذر جلب سعر: " + "، ".join(
+                f"{s} ({failures[s].reason})" if s in failures else s for s in unpriced.unique()))
 
         st.subheader("📋 تفاصيل المحفظة")
         st.dataframe(df[["symbol", "shares", "buy_price", "current_price", "pnl", "pnl_percent"]].round(2))
 
         st.subheader("📈 ملخص المحفظة")
-        total_current = df["current_value"].sum()
-        total_initial = df["initial_value"].sum()
-        total_pnl = df["pnl"].sum()
-        total_pnl_percent = (total_pnl / total_initial) * 100 if total_initial > 0 else 0
+        total_initial, total_current, total_pnl, total_pnl_percent = valuation.totals
 
         st.markdown(f"""
         - 💼 **إجمالي قيمة الشراء:** {total_initial:,.2f} ريال  
@@ -56,3 +49,4 @@ if uploaded_file:
 else:
     st.warning("📁 يرجى تحميل ملف يحتوي على بيانات المحفظة لتقييمها.")
 
+profiling.debug_panel(profile)
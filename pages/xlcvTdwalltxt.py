@@ -1,44 +1,36 @@
 import streamlit as st
-import pandas as pd
-import matplotlib.pyplot as plt
-from fpdf import FPDF
-from io import BytesIO
+from tdwl import profiling
+from tdwl.warm import warm
+
+# pandas وبقية الوحدات تُحمّل في الخلفية وتُستورد عند رفع ملف فقط
+warm()
+profile = profiling.page("xlcvTdwalltxt")
+
 st.set_page_config(page_title="📊 تحليل المحفظة الاستثمارية", layout="wide")
 st.title("📈 تقييم محفظتك في السوق السعودي")
 
 uploaded_file = st.file_uploader("📥 قم بتحميل ملف Excel أو CSV يحتوي على بيانات المحفظة", type=["xlsx", "csv"])
 
 if uploaded_file:
-    # قراءة الملف مع دعم الفواصل الرقمية مثل "1,000"
-    if uploaded_file.name.endswith(".csv"):
-        df = pd.read_csv(uploaded_file, thousands=",")
-    else:
-        df = pd.read_excel(uploaded_file, thousands=",")
-
-    # الأعمدة المطلوبة
-    required_cols = {
-        "Code", "Stock", "Holding", "Pledge", "Average cost",
-        "Unsettled sell", "Unsettled buy", "Market Price",
-        "Total Cost", "Current Value", "Gain/Loss", "Return", "Closing Price"
-    }
-
-    # التحقق من الأعمدة
-    if not required_cols.issubset(df.columns):
-        st.error(f"❌ الملف يجب أن يحتوي على الأعمدة التالية: {required_cols}")
+    from tdwl.rebalance import TRADE_LABELS, equal_weights, rebalance
+    from tdwl.charts import pie_chart
+    from tdwl.holdings import DISPLAY_FIELDS, compact_export
+    from tdwl.ingest import check_layout
+    from tdwl.schemas import ENGLISH_BROKER
+    from tdwl.symbols import symbol_index
+
+    # التحقق من الأعمدة من صف العناوين فقط قبل قراءة الملف
+    missing_cols = check_layout(uploaded_file, ENGLISH_BROKER)
+
+    if missing_cols:
+        st.error(f"❌ الملف يجب أن يحتوي على الأعمدة التالية: {ENGLISH_BROKER.required}")
     else:
-        # تحويل الأعمدة الرقمية إلى أرقام صحيحة
-        numeric_cols = ["Holding", "Pledge", "Average cost", "Unsettled sell",
-                        "Unsettled buy", "Market Price", "Total Cost",
-                        "Current Value", "Gain/Loss", "Return", "Closing Price"]
-        
-        for col in numeric_cols:
-            df[col] = pd.to_numeric(df[col], errors="coerce")
+        # قراءة الملف مع دعم الفواصل الرقمية مثل "1,000" مرة واحدة لكل ملف في تمثيل مضغوط بقطاع
+        # كل رمز من فهرس الرموز؛ هو وحده المحفوظ مع الملف والجداول تُبنى منه للعرض
+        book = compact_export(uploaded_file, ENGLISH_BROKER)
 
         # حساب الإجماليات
-        total_cost = df["Total Cost"].sum()
-        total_value = df["Current Value"].sum()
-        total_gain = df["Gain/Loss"].sum()
-        total_return = (total_gain / total_cost) * 100 if total_cost else 0
+        total_cost, total_value, total_gain, total_return = book.totals()
 
         # عرض المؤشرات
         col1, col2, col3 = st.columns(3)
@@ -48,36 +40,58 @@ if uploaded_file:
 
         # جدول المحفظة
         st.subheader("📋 تفاصيل المحفظة")
-        display_df = df[[
-            "Code", "Stock", "Holding", "Average cost", "Market Price",
-            "Total Cost", "Current Value", "Gain/Loss", "Return"
-        ]].copy()
-        st.dataframe(display_df.round(2), use_container_width=True)
+        st.dataframe(book.frame(DISPLAY_FIELDS).round(2), use_container_width=True)
 
         # رسم دائري لتوزيع المحفظة
         st.subheader("📊 توزيع المحفظة حسب الأسهم")
-        weights = df.set_index("Stock")["Current Value"].dropna()
-        weights = weights[weights > 0]
+        weights = book.group_values("name")
         if not weights.empty:
-            fig, ax = plt.subplots()
-            ax.pie(weights, labels=weights.index, autopct="%1.1f%%", startangle=90)
-            ax.axis("equal")
-            st.pyplot(fig)
+            # المراكز الصغيرة تُجمع في "أخرى" والمواصفة تُعاد من الذاكرة لنفس البيانات
+            st.plotly_chart(pie_chart(weights), use_container_width=True)
         else:
             st.warning("⚠️ لا توجد بيانات صالحة للرسم البياني.")
 
+        # توزيع القطاعات دون طلبات شبكة
+        st.subheader("🏭 توزيع المحفظة حسب القطاعات")
+        sectors = book.group_values("sector")
+        if not sectors.empty:
+            st.plotly_chart(pie_chart(sectors), use_container_width=True)
+        else:
+            st.warning("⚠️ لا توجد بيانات صالحة للرسم البياني.")
+        st.caption(symbol_index().coverage(sectors))
+
+        # إعادة التوازن نحو أوزان مستهدفة بأسهم كاملة وأسعار أوامر على وحدة تغير السعر
+        with st.expander("⚖️ إعادة توازن المحفظة"):
+            held = book.where(book.column("shares") > 0).frame(["symbol", "shares", "price"])
+            col1, col2, col3 = st.columns(3)
+            mode = col1.radio("الأوزان المستهدفة", ["الحالية", "متساوية"], horizontal=True)
+            max_weight = col2.slider("الحد الأقصى للسهم (%)", 5, 100, 100) / 100
+            extra_cash = col3.number_input("نقد إضافي (ريال)", min_value=0.0, value=0.0, step=1000.0)
+            if held.empty:
+                st.warning("⚠️ لا توجد مراكز لإعادة توازنها.")
+            else:
+                plan = rebalance(held, None if mode == "الحالية" else equal_weights(held["Code"]),
+                                 max_weight=max_weight if max_weight < 1 else None, cash=extra_cash,
+                                 symbol="Code", shares="Holding", price="Market Price")
+                if plan.trades.empty:
+                    st.success("✅ المحفظة ضمن الأوزان المستهدفة ولا تحتاج صفقات.")
+                else:
+                    st.dataframe(plan.trades.rename(columns=TRADE_LABELS).round(2), use_container_width=True)
+                    st.caption(f"نسبة التداول {plan.turnover:.1%} — نقد متبقٍ {plan.cash:,.2f} ريال")
+
         # تصنيف الأسهم الرابحة والخاسرة
         st.subheader("🔍 الأسهم الرابحة والخاسرة")
-        winners = df[df["Gain/Loss"] > 0].sort_values("Gain/Loss", ascending=False)
-        losers = df[df["Gain/Loss"] < 0].sort_values("Gain/Loss")
+        winners, losers = book.winners(), book.losers()
 
         col1, col2 = st.columns(2)
         with col1:
             st.success("🟢 الأسهم الرابحة")
-            st.dataframe(winners[["Code", "Stock", "Gain/Loss", "Return"]].round(2))
+            st.dataframe(winners.frame(["symbol", "name", "pnl", "pnl_percent"]).round(2))
         with col2:
             st.error("🔴 الأسهم الخاسرة")
-            st.dataframe(losers[["Code", "Stock", "Gain/Loss", "Return"]].round(2))
+            st.dataframe(losers.frame(["symbol", "name", "pnl", "pnl_percent"]).round(2))
 
 else:
     st.info("👈 يرجى رفع الملف لبدء التحليل.")
+
+profiling.debug_panel(profile)
@@ -0,0 +1 @@
+"""وحدات مشتركة لصفحات تحليل المحافظ ومؤشر الخوف في السوق السعودي."""
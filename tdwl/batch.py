@@ -0,0 +1,174 @@
+"""تقييم دفعي لملفات محافظ العملاء دون واجهة (للتشغيل الليلي).
+
+python -m tdwl.batch exports/ --out reports/ --workers 8
+"""
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+from tdwl.ingest import has_module, read_canonical
+from tdwl.quotes import fetch_quotes
+from tdwl.valuation import group_values, portfolio_totals, value_holdings
+
+EXPORT_SUFFIXES = (".csv", ".xlsx", ".xls")
+SUMMARY_COLUMNS = ["client", "file", "positions", "cost", "value", "pnl", "pnl_percent", "unpriced", "error"]
+
+
+def discover(directory, suffixes=EXPORT_SUFFIXES):
+    return sorted(path for path in Path(directory).iterdir()
+                  if path.is_file() and path.suffix.lower() in suffixes)
+
+
+def parse_file(path):
+    """يعيد (المسار، الإطار الموحد، رسالة الخطأ)؛ ملف تالف لا يوقف الدفعة."""
+    path = Path(path)
+    try:
+        return str(path), read_canonical((path.read_bytes(), path.name)), None
+    except Exception as exc:
+        return str(path), None, f"{type(exc).__name__}: {exc}"
+
+
+def parse_all(paths, workers=None):
+    if workers == 1 or len(paths) < 2:
+        return [parse_file(path) for path in paths]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(parse_file, paths, chunksize=max(1, len(paths) // (4 * (workers or os.cpu_count())))))
+
+
+def client_ids(paths):
+    """اسم العميل من اسم الملف بلا امتداد، والاسم الكامل عندما يتكرر (a.csv و a.xlsx) حتى لا يُدمج عميلان."""
+    paths = [Path(path) for path in paths]
+    stems = pd.Series([path.stem for path in paths])
+    duplicated = stems.duplicated(keep=False)
+    return {str(path): path.name if duplicated[i] else path.stem for i, path in enumerate(paths)}
+
+
+def value_clients(parsed, quotes):
+    """يقيّم كل العملاء دفعة واحدة: إطار موحد للمراكز وملخص لكل عميل."""
+    clients = client_ids([path for path, _, _ in parsed])
+    frames = [df.assign(client=clients[path]) for path, df, error in parsed if error is None]
+    if not frames:
+        return pd.DataFrame(), pd.DataFrame(columns=SUMMARY_COLUMNS)
+    holdings = pd.concat(frames, ignore_index=True)
+    holdings["client"] = holdings["client"].astype("category")
+
+    symbols = holdings["symbol"].astype(str).str.strip()
+    fetched = symbols.map(quotes["price"])
+    holdings["unpriced"] = fetched.isna()
+    # عند تعذر الجلب يُستخدم سعر السوق الوارد في ملف الوسيط إن وجد
+    holdings["current_price"] = fetched.fillna(holdings["market_price"])
+    if "sector" in quotes:
+        holdings["sector"] = symbols.map(quotes["sector"])
+    holdings = value_holdings(holdings)
+
+    grouped = holdings.groupby("client", observed=True, sort=False)
+    summary = grouped.agg(
+        positions=("symbol", "size"),
+        cost=("initial_value", "sum"),
+        value=("current_value", "sum"),
+        pnl=("pnl", "sum"),
+        unpriced=("unpriced", "sum"),
+    ).reset_index()
+    summary["pnl_percent"] = (summary["pnl"] / summary["cost"].where(summary["cost"] != 0) * 100).fillna(0)
+    files = {clients[path]: Path(path).name for path, _, _ in parsed}
+    summary["file"] = summary["client"].astype(str).map(files)
+
+    failed = pd.DataFrame(
+        [{"client": clients[path], "file": Path(path).name, "error": error}
+         for path, _, error in parsed if error is not None],
+        columns=["client", "file", "error"],
+    )
+    summary = pd.concat([summary.assign(client=summary["client"].astype(str)), failed], ignore_index=True)
+    return holdings, summary.reindex(columns=SUMMARY_COLUMNS)
+
+
+def write_client_summaries(holdings, out_dir):
+    clients_dir = Path(out_dir) / "clients"
+    clients_dir.mkdir(parents=True, exist_ok=True)
+    for client, frame in holdings.groupby("client", observed=True, sort=False):
+        totals = portfolio_totals(frame)
+        sectors = group_values(frame) if "sector" in frame else pd.Series(dtype="float64")
+        report = {
+            "client": str(client),
+            "positions": len(frame),
+            **totals._asdict(),
+            "sectors": {str(name): float(value) for name, value in sectors.items()},
+        }
+        path = clients_dir / f"{client}.json"
+        path.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+
+
+def write_consolidated(holdings, out_dir, fmt="parquet"):
+    out_dir = Path(out_dir)
+    if fmt == "parquet" and has_module("pyarrow"):
+        path = out_dir / "holdings.parquet"
+        holdings.to_parquet(path, index=False)
+    else:
+        path = out_dir / "holdings.csv"
+        holdings.to_csv(path, index=False, encoding="utf-8-sig")
+    return path
+
+
+def run(directory, out_dir, workers=None, with_sector=True, fmt="parquet", cache=None, backend=None):
+    """يعيد (الملخص، أزمنة المراحل بالثواني)."""
+    timings = {}
+    start = time.perf_counter()
+    paths = discover(directory)
+    parsed = parse_all(paths, workers)
+    timings["parse"] = time.perf_counter() - start
+
+    # جلب واحد لكل الرموز الفريدة عبر جميع الملفات
+    stage = time.perf_counter()
+    symbols = pd.concat([df["symbol"] for _, df, error in parsed if error is None] or [pd.Series(dtype="string")])
+    quotes = fetch_quotes(symbols, backend=backend, with_sector=with_sector, cache=cache)
+    timings["quotes"] = time.perf_counter() - stage
+
+    stage = time.perf_counter()
+    holdings, summary = value_clients(parsed, quotes)
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    summary.to_csv(out_dir / "summary.csv", index=False, encoding="utf-8-sig")
+    if not holdings.empty:
+        write_client_summaries(holdings, out_dir)
+        write_consolidated(holdings, out_dir, fmt)
+    timings["value"] = time.perf_counter() - stage
+    timings["total"] = time.perf_counter() - start
+    timings["files"] = len(paths)
+    timings["symbols"] = len(quotes)
+    return summary, timings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="تقييم دفعي لمجلد من ملفات المحافظ (CSV/XLSX)")
+    parser.add_argument("directory", help="مجلد ملفات التصدير")
+    parser.add_argument("--out", default="batch_reports", help="مجلد النتائج")
+    parser.add_argument("--workers", type=int, default=None, help="عدد عمليات القراءة (الافتراضي عدد الأنوية)")
+    parser.add_argument("--format", choices=["parquet", "csv"], default="parquet", help="صيغة الملف الموحد")
+    parser.add_argument("--no-sector", action="store_true", help="بدون جلب القطاعات")
+    parser.add_argument("--no-cache", action="store_true", help="بدون الذاكرة المؤقتة للأسعار")
+    args = parser.parse_args(argv)
+
+    cache = None
+    if not args.no_cache:
+        from tdwl.cache import default_cache
+
+        cache = default_cache()
+    summary, timings = run(args.directory, args.out, workers=args.workers, with_sector=not args.no_sector,
+                           fmt=args.format, cache=cache)
+
+    failed = int(summary["error"].notna().sum())
+    files = timings["files"]
+    print(f"📁 {files} ملف ({failed} فشل) — {timings['symbols']} رمز فريد")
+    print(f"⏱️ قراءة {timings['parse']:.2f} ث، أسعار {timings['quotes']:.2f} ث، تقييم {timings['value']:.2f} ث")
+    rate = files / timings["total"] if timings["total"] else 0
+    print(f"🚀 {rate:.1f} ملف/ث — {Path(args.out).resolve()}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
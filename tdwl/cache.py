@@ -0,0 +1,157 @@
+"""ذاكرة مؤقتة من طبقتين للأسعار وبيانات القطاعات: LRU داخل العملية و SQLite على القرص."""
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from tdwl.memo import LRUDict
+
+PRICE = "price"
+# مجموعات تداول منذ توحيد القطاعات مع فهرس الرموز؛ الاسم تغيّر عن "sector" فلا تُقرأ قيم Yahoo
+# الإنجليزية المخزنة قبله، وتُحذف عند الفتح مع أي نوع لا يعرفه ttls
+SECTOR = "sector.tadawul"
+
+# الأسعار تتغير خلال الجلسة أما القطاع فنادراً ما يتغير
+DEFAULT_TTLS = {PRICE: 15 * 60, SECTOR: 7 * 24 * 3600}
+DEFAULT_MAX_ENTRIES = 20_000
+
+
+def default_cache_dir():
+    return Path(os.environ.get("TDWL_CACHE_DIR", Path.home() / ".cache" / "tdwl"))
+
+
+class QuoteCache:
+    def __init__(self, path=None, ttls=None, max_entries=DEFAULT_MAX_ENTRIES, memory_entries=4096):
+        self.path = Path(path) if path else default_cache_dir() / "quotes.sqlite3"
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.max_entries = max_entries
+        self._memory = LRUDict(memory_entries)
+        self._lock = threading.Lock()
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # اتصال واحد مشترك بين الخيوط؛ WAL يسمح بالقراءة من عدة عمليات Streamlit معاً
+        self._db = sqlite3.connect(self.path, check_same_thread=False, timeout=10)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " kind TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL,"
+            " stored_at REAL NOT NULL, accessed_at REAL NOT NULL,"
+            " PRIMARY KEY (kind, key))"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed_at)")
+        kinds = list(self.ttls)
+        self._db.execute(f"DELETE FROM entries WHERE kind NOT IN ({', '.join('?' * len(kinds))})", kinds)
+        self._db.commit()
+
+    def _fresh(self, kind, stored_at, now):
+        return now - stored_at <= self.ttls[kind]
+
+    def get_many(self, kind, keys):
+        """يعيد قاموساً بالقيم الصالحة فقط؛ المفاتيح الغائبة تعني الحاجة إلى جلبها."""
+        now = time.time()
+        found = {}
+        pending = []
+        for key in keys:
+            hit = self._memory.get((kind, key))
+            if hit is not None and self._fresh(kind, hit[1], now):
+                found[key] = hit[0]
+            else:
+                pending.append(key)
+
+        # العدادات تحت نفس القفل: الجلسات المتزامنة تفقد الزيادات بدونه
+        with self._lock:
+            fresh = []
+            if pending:
+                rows = []
+                for start in range(0, len(pending), 500):
+                    chunk = pending[start:start + 500]
+                    marks = ",".join("?" * len(chunk))
+                    rows += self._db.execute(
+                        f"SELECT key, value, stored_at FROM entries WHERE kind = ? AND key IN ({marks})",
+                        [kind, *chunk],
+                    ).fetchall()
+                fresh = [(key, value, stored_at) for key, value, stored_at in rows
+                         if self._fresh(kind, stored_at, now)]
+                if fresh:
+                    self._db.executemany(
+                        "UPDATE entries SET accessed_at = ? WHERE kind = ? AND key = ?",
+                        [(now, kind, key) for key, _, _ in fresh],
+                    )
+                    self._db.commit()
+            self.stats["memory_hits"] += len(found)
+            self.stats["disk_hits"] += len(fresh)
+            self.stats["misses"] += len(pending) - len(fresh)
+        for key, value, stored_at in fresh:
+            value = json.loads(value)
+            self._memory.put((kind, key), (value, stored_at))
+            found[key] = value
+        return found
+
+    def put_many(self, kind, mapping):
+        if not mapping:
+            return
+        now = time.time()
+        for key, value in mapping.items():
+            self._memory.put((kind, key), (value, now))
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO entries (kind, key, value, stored_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                [(kind, key, json.dumps(value), now, now) for key, value in mapping.items()],
+            )
+            self._evict()
+            self._db.commit()
+            self.stats["writes"] += len(mapping)
+
+    def _evict(self):
+        # حذف المنتهية أولاً ثم الأقدم استخداماً حتى نعود تحت الحد
+        now = time.time()
+        for kind, ttl in self.ttls.items():
+            self._db.execute("DELETE FROM entries WHERE kind = ? AND stored_at < ?", (kind, now - ttl))
+        (count,) = self._db.execute("SELECT COUNT(*) FROM entries").fetchone()
+        excess = count - self.max_entries
+        if excess > 0:
+            self._db.execute(
+                "DELETE FROM entries WHERE rowid IN"
+                " (SELECT rowid FROM entries ORDER BY accessed_at LIMIT ?)",
+                (excess,),
+            )
+            self.stats["evictions"] += excess
+
+    def get(self, kind, key):
+        return self.get_many(kind, [key]).get(key)
+
+    def put(self, kind, key, value):
+        self.put_many(kind, {key: value})
+
+    def clear(self):
+        self._memory.clear()
+        with self._lock:
+            self._db.execute("DELETE FROM entries")
+            self._db.commit()
+
+    def hit_ratio(self):
+        with self._lock:
+            hits = self.stats["memory_hits"] + self.stats["disk_hits"]
+            total = hits + self.stats["misses"]
+        return hits / total if total else 0.0
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+def default_cache():
+    """نسخة واحدة لكل عملية يتشاركها جميع المستخدمين."""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = QuoteCache()
+        return _default_cache
@@ -0,0 +1,59 @@
+"""مواصفات رسوم plotly للصفحات: قواميس جاهزة لـ st.plotly_chart دون استيراد مكتبة رسم أو تحويل لصورة."""
+import pandas as pd
+
+from tdwl import profiling
+from tdwl.memo import LRUDict
+from tdwl.render_queue import job_key
+
+OTHER_LABEL = "أخرى"
+# شرائح أكثر من ذلك لا تُقرأ؛ والمراكز الأصغر من MIN_SHARE تُجمع في "أخرى"
+MAX_SLICES = 12
+MIN_SHARE = 0.01
+
+_specs = LRUDict(256)
+
+
+def group_small(values, max_slices=MAX_SLICES, min_share=MIN_SHARE, other=OTHER_LABEL):
+    """أكبر الشرائح كما هي والباقي في شريحة واحدة؛ المجموع لا يتغير."""
+    values = pd.Series(values, dtype="float64").dropna()
+    values = values[values > 0]
+    values = values.groupby(level=0, sort=False).sum().sort_values(ascending=False)
+    if values.empty:
+        return values
+    keep = (values / values.sum() >= min_share).to_numpy(copy=True)
+    # شريحة محجوزة لـ "أخرى"
+    keep[max_slices - 1:] = False
+    rest = values[~keep]
+    if len(rest) < 2:
+        return values
+    return pd.concat([values[keep], pd.Series({other: rest.sum()})])
+
+
+@profiling.timed("chart")
+def pie_chart(values, title=None, height=450, **options):
+    """رسم دائري لسلسلة قيم مفهرسة بالتسميات؛ المواصفة تُحفظ ببصمة البيانات وتُعاد لكل إعادة تشغيل.
+
+    القاموس المعاد مشترك بين الجلسات فلا يُعدّل.
+    """
+    key = job_key("pie", values, title, height, sorted(options.items()))
+    spec = _specs.get(key)
+    if spec is not None:
+        profiling.count("cache.chart_hits")
+        return spec
+    grouped = group_small(values, **options)
+    spec = {
+        "data": [{
+            "type": "pie",
+            "labels": [str(label) for label in grouped.index],
+            "values": grouped.round(2).tolist(),
+            "textinfo": "percent",
+            "hovertemplate": "%{label}<br>%{value:,.2f} ريال<br>%{percent}<extra></extra>",
+            "sort": False,
+        }],
+        "layout": {"height": height, "margin": {"t": 40 if title else 10, "b": 10, "l": 10, "r": 10},
+                   "legend": {"orientation": "v"}},
+    }
+    if title:
+        spec["layout"]["title"] = {"text": title}
+    _specs.put(key, spec)
+    return spec
@@ -0,0 +1,115 @@
+"""محرك مؤشر الخوف: حساب درجات السوق والقطاعات كعمليات عمودية بدل apply صفاً صفاً."""
+import numpy as np
+import pandas as pd
+
+from tdwl import profiling
+
+# القيمة السوقية المرجعية (3 تريليون ريال) في معادلة app.py
+REFERENCE_MARKET_CAP = 3_000_000_000_000
+
+# أوزان app.py للمؤشر العام؛ noise هو العنصر العشوائي الذي يمثل التقلب
+APP_MARKET_WEIGHTS = {"down": 30, "volume": 20, "drop": 15, "cap": 15, "noise": 20}
+# نفس الأوزان دون العنصر العشوائي، للسجل التاريخي والبث حيث يجب أن تتكرر النتائج
+STABLE_MARKET_WEIGHTS = {k: v for k, v in APP_MARKET_WEIGHTS.items() if k != "noise"}
+# أوزان app2.py
+APP2_MARKET_WEIGHTS = {"down": 30, "volume": 20, "big_sell": 20, "drop": 8, "volatility": 10}
+# أوزان القطاعات في app.py
+SECTOR_WEIGHTS = {"down": 40, "drop": 30, "volatility": 30}
+
+SENTIMENT_BINS = [0, 25, 50, 75, 100]
+SENTIMENT_LABELS = ["🟢 مطمئن", "🟢 مستقر", "🟠 قلق", "🔴 خوف شديد"]
+
+
+def _columns(data):
+    # يقبل قاموس قيم مفردة أو مصفوفات أو DataFrame
+    if isinstance(data, pd.DataFrame):
+        return {col: data[col].to_numpy(dtype="float64") for col in data.columns
+                if pd.api.types.is_numeric_dtype(data[col])}
+    return {key: float(value) if np.isscalar(value) else np.asarray(value, dtype="float64")
+            for key, value in data.items() if not isinstance(value, str)}
+
+
+def _drop(change_percent):
+    return np.abs(np.minimum(0, change_percent))
+
+
+def market_features(data):
+    """عوامل المؤشر العام من بيانات خام (declines/advances/volume...) أو نسب جاهزة (down_ratio...)."""
+    cols = _columns(data)
+    features = {}
+    if "down_ratio" in cols:
+        features["down"] = cols["down_ratio"]
+    elif "declines" in cols and "advances" in cols:
+        features["down"] = cols["declines"] / (cols["declines"] + cols["advances"])
+    if "volume_ratio" in cols:
+        volume_ratio = cols["volume_ratio"]
+    elif "volume" in cols and "avg_volume" in cols:
+        volume_ratio = cols["volume"] / cols["avg_volume"]
+    else:
+        volume_ratio = None
+    if volume_ratio is not None:
+        features["volume"] = 1 - np.minimum(volume_ratio, 1)
+    if "change_percent" in cols:
+        features["drop"] = _drop(cols["change_percent"])
+    elif "tasi_drop" in cols:
+        features["drop"] = _drop(cols["tasi_drop"])
+    if "market_cap" in cols:
+        features["cap"] = 1 - cols["market_cap"] / REFERENCE_MARKET_CAP
+    if "big_sell_ratio" in cols:
+        features["big_sell"] = cols["big_sell_ratio"]
+    if "volatility_score" in cols:
+        features["volatility"] = cols["volatility_score"]
+    if "noise" in cols:
+        features["noise"] = cols["noise"]
+    return features
+
+
+def sector_features(data):
+    cols = _columns(data)
+    return {
+        "down": cols["declines"] / cols["total_stocks"],
+        "drop": _drop(cols["change_percent"]),
+        "volatility": cols["volatility"] / 5,
+    }
+
+
+def weighted_score(features, weights):
+    """مجموع موزون للعوامل بضرب مصفوفي واحد؛ العامل الغائب يساهم بصفر."""
+    names = list(weights)
+    size = np.broadcast(*features.values()).shape if features else ()
+    if size == ():
+        # مدخل مفرد (لقطة أو حدث بث): جمع عادي أسرع من بناء مصفوفة
+        raw = sum(weights[name] * float(features.get(name, 0.0)) for name in names)
+        return min(round(raw, 2), 100)
+    matrix = np.stack([np.broadcast_to(features.get(name, 0.0), size) for name in names], axis=-1)
+    raw = matrix @ np.array([weights[name] for name in names], dtype="float64")
+    return np.minimum(np.round(raw, 2), 100)
+
+
+def _unwrap(scores):
+    return float(scores) if np.ndim(scores) == 0 else scores
+
+
+@profiling.timed("fear")
+def market_fear(data, weights=APP_MARKET_WEIGHTS):
+    """درجة الخوف للسوق؛ تعيد رقماً لمدخل مفرد أو مصفوفة لعدة أيام."""
+    return _unwrap(weighted_score(market_features(data), weights))
+
+
+@profiling.timed("fear")
+def sector_fear(data, weights=SECTOR_WEIGHTS):
+    return _unwrap(weighted_score(sector_features(data), weights))
+
+
+def sentiment(score):
+    if score < 25:
+        return "🟢 السوق مطمئن جدًا"
+    if score < 50:
+        return "🟢 السوق مستقر"
+    if score < 75:
+        return "🟠 قلق في السوق"
+    return "🔴 خوف شديد في السوق"
+
+
+def sentiment_labels(scores):
+    return pd.cut(scores, bins=SENTIMENT_BINS, labels=SENTIMENT_LABELS)
@@ -0,0 +1,143 @@
+"""حساب مؤشر الخوف التاريخي لكل يوم تداول وحفظه في مخزن Parquet مقسّم حسب الشهر.
+
+python -m tdwl.fear_history --market market_daily.csv --sectors sector_daily.csv
+"""
+import argparse
+import os
+import time
+import uuid
+from pathlib import Path
+
+import pandas as pd
+
+from tdwl.fear import SECTOR_WEIGHTS, STABLE_MARKET_WEIGHTS, market_fear, sector_fear
+from tdwl.memo import LRUDict
+
+AVG_VOLUME_WINDOW = 20
+# أوزان درجات المخزن؛ أي مقارنة مع السجل (delta المؤشر) تحسب درجة اليوم بنفسها
+HISTORY_WEIGHTS = STABLE_MARKET_WEIGHTS
+
+MARKET = "market"
+SECTORS = "sectors"
+
+
+def default_store_dir():
+    return Path(os.environ.get("TDWL_FEAR_STORE", Path(__file__).resolve().parent.parent / "data" / "fear_history"))
+
+
+def backfill_market(daily, weights=HISTORY_WEIGHTS, window=AVG_VOLUME_WINDOW):
+    """daily: أعمدة date, declines, advances, volume, change_percent, market_cap (و avg_volume اختيارياً)."""
+    daily = daily.assign(date=pd.to_datetime(daily["date"])).sort_values("date", ignore_index=True)
+    if "avg_volume" not in daily:
+        # متوسط الأيام السابقة فقط حتى لا يدخل حجم اليوم في مرجعه
+        daily["avg_volume"] = daily["volume"].shift(1).rolling(window, min_periods=1).mean()
+        daily["avg_volume"] = daily["avg_volume"].fillna(daily["volume"])
+    daily["fear_score"] = market_fear(daily, weights)
+    return daily
+
+
+def backfill_sectors(daily, weights=SECTOR_WEIGHTS):
+    """daily: أعمدة date, sector, change_percent, declines, total_stocks, volatility."""
+    daily = daily.assign(date=pd.to_datetime(daily["date"])).sort_values(["date", "sector"], ignore_index=True)
+    daily["fear_score"] = sector_fear(daily, weights)
+    return daily
+
+
+class FearStore:
+    """مخزن إلحاقي: كل دفعة تُكتب كملف جديد داخل مجلد الشهر ولا يُعدّل ملف قائم."""
+
+    def __init__(self, root=None):
+        self.root = Path(root) if root else default_store_dir()
+        self._loaded = LRUDict(maxsize=16)
+
+    def _files(self, kind):
+        return sorted((self.root / kind).glob("month=*/*.parquet"))
+
+    def append(self, kind, frame):
+        if frame.empty:
+            return 0
+        frame = frame.assign(written_at=time.time_ns())
+        months = frame["date"].dt.strftime("%Y-%m")
+        for month, part in frame.groupby(months, sort=True):
+            folder = self.root / kind / f"month={month}"
+            folder.mkdir(parents=True, exist_ok=True)
+            part.to_parquet(folder / f"part-{uuid.uuid4().hex}.parquet", index=False)
+        return len(frame)
+
+    def load(self, kind=MARKET, start=None, end=None):
+        files = self._files(kind)
+        if not files:
+            return pd.DataFrame()
+        # المفتاح يتغير عند إضافة ملف جديد فقط، فالقراءة المتكررة من الذاكرة
+        signature = (kind, str(start), str(end), tuple((f.name, f.stat().st_mtime_ns) for f in files))
+        cached = self._loaded.get(signature)
+        if cached is not None:
+            return cached
+
+        import pyarrow.dataset as ds
+
+        dataset = ds.dataset([str(f) for f in files], format="parquet")
+        condition = None
+        if start is not None:
+            condition = ds.field("date") >= pd.Timestamp(start)
+        if end is not None:
+            upper = ds.field("date") <= pd.Timestamp(end)
+            condition = upper if condition is None else condition & upper
+        frame = dataset.to_table(filter=condition).to_pandas()
+        keys = ["date", "sector"] if kind == SECTORS else ["date"]
+        # فرز مستقر: الدفعات بنفس written_at تبقى بترتيب ملفاتها فيُحسم التكرار دائماً بنفس الطريقة
+        frame = (frame.sort_values("written_at", kind="stable")
+                 .drop_duplicates(keys, keep="last")
+                 .sort_values(keys, ignore_index=True)
+                 .drop(columns="written_at"))
+        self._loaded.put(signature, frame)
+        return frame
+
+    def last_date(self, kind=MARKET):
+        frame = self.load(kind)
+        return None if frame.empty else frame["date"].max()
+
+    def previous_score(self, before=None):
+        """آخر درجة محفوظة قبل التاريخ المحدد (مرجع delta في المؤشر)، محسوبة بـ HISTORY_WEIGHTS."""
+        frame = self.load(MARKET)
+        if frame.empty:
+            return None
+        if before is not None:
+            frame = frame[frame["date"] < pd.Timestamp(before).normalize()]
+        return None if frame.empty else float(frame["fear_score"].iloc[-1])
+
+
+def backfill_into(store, market_daily, sector_daily=None):
+    """يحسب كامل المدخلات (لأجل المتوسطات المتحركة) ويُلحق فقط الأيام الأحدث من المخزن."""
+    written = {}
+    for kind, daily, compute in ((MARKET, market_daily, backfill_market),
+                                 (SECTORS, sector_daily, backfill_sectors)):
+        if daily is None:
+            continue
+        scores = compute(daily)
+        last = store.last_date(kind)
+        if last is not None:
+            scores = scores[scores["date"] > last]
+        written[kind] = store.append(kind, scores)
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="حساب مؤشر الخوف التاريخي وحفظه")
+    parser.add_argument("--market", required=True, help="CSV يومي لاتساع السوق وحجم التداول")
+    parser.add_argument("--sectors", help="CSV يومي لبيانات القطاعات")
+    parser.add_argument("--store", help="مجلد المخزن (الافتراضي data/fear_history)")
+    args = parser.parse_args(argv)
+
+    store = FearStore(args.store)
+    sector_daily = pd.read_csv(args.sectors) if args.sectors else None
+    start = time.perf_counter()
+    written = backfill_into(store, pd.read_csv(args.market), sector_daily)
+    elapsed = time.perf_counter() - start
+    for kind, rows in written.items():
+        print(f"{kind}: {rows} صف جديد")
+    print(f"⏱️ {elapsed:.2f} ث — {store.root}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,280 @@
+"""تحديث مؤشر الخوف لحظياً من أحداث الاتساع وحجم التداول بتكلفة ثابتة لكل حدث.
+
+شكل الحدث (سطر JSON): {"kind": "decline", "sector": "البنوك", "value": 1}
+الأنواع: advance, decline, volume, index, market_cap, sector_change, sector_stocks, session_close
+الحدث التالف يُسجل ويُتجاوز؛ انقطاع المصدر أو نهايته يظهران في status للمؤشر.
+"""
+import json
+import logging
+import math
+import socket
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+
+import pandas as pd
+
+from tdwl.fear import SECTOR_WEIGHTS, STABLE_MARKET_WEIGHTS, market_fear, sector_fear
+from tdwl.fear_history import AVG_VOLUME_WINDOW
+
+log = logging.getLogger(__name__)
+
+MARKET_KINDS = frozenset({"advance", "decline", "volume", "index", "market_cap", "session_close"})
+# أحداث لا معنى لها دون قطاع
+SECTOR_KINDS = frozenset({"sector_change", "sector_stocks"})
+# حالة المستهلك: يستقبل، انتهى المصدر، أو توقف بخطأ
+LIVE = "live"
+ENDED = "ended"
+FAILED = "failed"
+# أخطاء سطر أو حدث واحد؛ لا توقف البث
+EVENT_ERRORS = (ValueError, KeyError, TypeError, AttributeError)
+
+
+@dataclass
+class BreadthEvent:
+    kind: str
+    value: float = 1.0
+    sector: str = None
+    ts: float = None
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["kind"], float(data.get("value", 1.0)), data.get("sector"), data.get("ts"))
+
+
+class SectorState:
+    __slots__ = ("declines", "advances", "total_stocks", "change_percent", "volume",
+                 "_count", "_mean", "_m2", "score")
+
+    def __init__(self):
+        self.declines = 0
+        self.advances = 0
+        self.total_stocks = 0
+        self.change_percent = 0.0
+        self.volume = 0.0
+        # تباين متحرك (Welford) لتغيرات القطاع خلال الجلسة
+        self._count = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+        self.score = 0.0
+
+    def observe_change(self, change):
+        self.change_percent = change
+        self._count += 1
+        delta = change - self._mean
+        self._mean += delta / self._count
+        self._m2 += delta * (change - self._mean)
+
+    @property
+    def volatility(self):
+        return math.sqrt(self._m2 / (self._count - 1)) if self._count > 1 else 0.0
+
+    def as_dict(self, name):
+        return {
+            "name": name,
+            "change_percent": round(self.change_percent, 2),
+            "volume": self.volume,
+            "declines": self.declines,
+            "total_stocks": max(self.total_stocks, self.declines + self.advances, 1),
+            "volatility": round(self.volatility, 2),
+        }
+
+
+class StreamingFearIndex:
+    """يحتفظ بمجاميع جارية ويعيد حساب درجة السوق والقطاع المتأثر فقط عند كل حدث."""
+
+    def __init__(self, window=AVG_VOLUME_WINDOW, market_weights=STABLE_MARKET_WEIGHTS,
+                 sector_weights=SECTOR_WEIGHTS, market_cap=None):
+        self.market_weights = market_weights
+        self.sector_weights = sector_weights
+        self.advances = 0
+        self.declines = 0
+        self.volume = 0.0
+        self.change_percent = 0.0
+        self.market_cap = market_cap
+        self._daily_volumes = deque(maxlen=window)
+        self._volume_sum = 0.0
+        self.sectors = {}
+        self.market_score = 0.0
+        self.events = 0
+        self.rejected = 0
+        self.last_rejection = None
+        self.status = LIVE
+        self.error = None
+        self._lock = threading.Lock()
+
+    @property
+    def avg_volume(self):
+        if not self._daily_volumes:
+            return self.volume or 1.0
+        return self._volume_sum / len(self._daily_volumes)
+
+    def _sector(self, name):
+        state = self.sectors.get(name)
+        if state is None:
+            state = self.sectors[name] = SectorState()
+        return state
+
+    def _rescore_market(self):
+        data = {
+            "declines": self.declines,
+            "advances": self.advances,
+            "volume": self.volume,
+            "avg_volume": self.avg_volume,
+            "change_percent": self.change_percent,
+        }
+        if self.declines + self.advances == 0:
+            data["down_ratio"] = 0.0
+        if self.market_cap is not None:
+            data["market_cap"] = self.market_cap
+        self.market_score = market_fear(data, self.market_weights)
+
+    def _rescore_sector(self, state):
+        data = state.as_dict(None)
+        del data["name"]
+        state.score = sector_fear(data, self.sector_weights)
+
+    def _close_session(self):
+        # حجم اليوم يدخل النافذة المتحركة؛ عند امتلائها يُطرح الأقدم من المجموع
+        if len(self._daily_volumes) == self._daily_volumes.maxlen:
+            self._volume_sum -= self._daily_volumes[0]
+        self._daily_volumes.append(self.volume)
+        self._volume_sum += self.volume
+        self.advances = self.declines = 0
+        self.volume = 0.0
+        self.change_percent = 0.0
+        for name, state in list(self.sectors.items()):
+            fresh = SectorState()
+            fresh.total_stocks = state.total_stocks
+            self.sectors[name] = fresh
+
+    def apply(self, event):
+        """يطبق حدثاً واحداً؛ ValueError لنوع غير معروف أو حدث قطاع بلا sector قبل أي تعديل."""
+        kind = event.kind
+        if kind in SECTOR_KINDS and not event.sector:
+            raise ValueError(f"الحدث {kind} يحتاج sector")
+        if kind not in MARKET_KINDS and kind not in SECTOR_KINDS:
+            raise ValueError(f"نوع حدث غير معروف: {kind}")
+        with self._lock:
+            sector = self._sector(event.sector) if event.sector else None
+            if kind == "advance":
+                self.advances += event.value
+                if sector:
+                    sector.advances += event.value
+            elif kind == "decline":
+                self.declines += event.value
+                if sector:
+                    sector.declines += event.value
+            elif kind == "volume":
+                self.volume += event.value
+                if sector:
+                    sector.volume += event.value
+            elif kind == "index":
+                self.change_percent = event.value
+            elif kind == "market_cap":
+                self.market_cap = event.value
+            elif kind == "sector_change":
+                sector.observe_change(event.value)
+            elif kind == "sector_stocks":
+                sector.total_stocks = int(event.value)
+            elif kind == "session_close":
+                self._close_session()
+            self.events += 1
+            self._rescore_market()
+            if sector is not None and kind != "session_close":
+                self._rescore_sector(sector)
+
+    def reject(self, error):
+        """سطر أو حدث تالف: يُسجل ويُعد ويستمر البث."""
+        log.warning("حدث مرفوض في بث مؤشر الخوف: %s", error)
+        with self._lock:
+            self.rejected += 1
+            self.last_rejection = str(error)
+
+    def close(self, error=None):
+        """نهاية المصدر (ENDED) أو توقفه بخطأ (FAILED)؛ اللقطة الأخيرة تبقى متاحة."""
+        if error is not None:
+            log.error("توقف بث مؤشر الخوف: %s", error)
+        with self._lock:
+            self.status = FAILED if error is not None else ENDED
+            self.error = None if error is None else f"{type(error).__name__}: {error}"
+
+    def snapshot(self):
+        """نفس شكل fetch_market_data في app.py: (بيانات المؤشر، DataFrame القطاعات)."""
+        with self._lock:
+            tasi = {
+                "change_percent": round(self.change_percent, 2),
+                "volume": int(self.volume),
+                "avg_volume": int(self.avg_volume),
+                "declines": int(self.declines),
+                "advances": int(self.advances),
+                "market_cap": self.market_cap or 0.0,
+            }
+            rows = [{**state.as_dict(name), "Fear Score": state.score} for name, state in self.sectors.items()]
+        return tasi, pd.DataFrame(rows)
+
+
+def parse_lines(lines, on_error=None):
+    """BreadthEvent لكل سطر JSON غير فارغ؛ السطر التالف يذهب إلى on_error (أو السجل) ويُتجاوز."""
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield BreadthEvent.from_dict(json.loads(line))
+        except EVENT_ERRORS as exc:
+            if on_error is None:
+                log.warning("سطر تالف في بث مؤشر الخوف: %s", exc)
+            else:
+                on_error(exc)
+
+
+def replay_file(path, speed=None, on_error=None):
+    """يقرأ أحداث JSON lines من ملف؛ مع speed يحترم الفروق الزمنية في ts مقسومة على speed."""
+    previous = None
+    with open(path, encoding="utf-8") as handle:
+        for event in parse_lines(handle, on_error):
+            if speed and event.ts is not None:
+                if previous is not None and event.ts > previous:
+                    time.sleep((event.ts - previous) / speed)
+                previous = event.ts
+            yield event
+
+
+def replay_socket(host, port, timeout=None, on_error=None):
+    """يقرأ أحداث JSON مفصولة بأسطر من اتصال TCP حتى يغلقه الطرف الآخر."""
+    with socket.create_connection((host, port), timeout=timeout) as conn:
+        with conn.makefile("r", encoding="utf-8") as stream:
+            yield from parse_lines(stream, on_error)
+
+
+def source_from_spec(spec, on_error=None):
+    # "host:port" لمصدر شبكي وإلا فهو مسار ملف
+    host, sep, port = spec.rpartition(":")
+    if sep and port.isdigit():
+        return replay_socket(host, int(port), on_error=on_error)
+    return replay_file(spec, on_error=on_error)
+
+
+def consume(source, index, stop=None):
+    """يطبق أحداث المصدر حتى نهايته؛ الحدث المرفوض لا يوقف الخيط، وانقطاع المصدر يُسجل في index.status."""
+    try:
+        for event in source:
+            if stop is not None and stop.is_set():
+                break
+            try:
+                index.apply(event)
+            except EVENT_ERRORS as exc:
+                index.reject(exc)
+    except Exception as exc:
+        index.close(exc)
+    else:
+        index.close()
+
+
+def start_consumer(source, index):
+    stop = threading.Event()
+    thread = threading.Thread(target=consume, args=(source, index, stop), daemon=True, name="fear-stream")
+    thread.start()
+    return thread, stop
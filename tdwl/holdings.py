@@ -0,0 +1,239 @@
+"""تمثيل مضغوط للمراكز في الكتب الكبيرة متعددة العملاء.
+
+الرمز والاسم والقطاع أكواد تصنيفية بدل نص كائن لكل صف، والكمية int32 والأسعار float32.
+مبالغ ملف الوسيط (التكلفة والقيمة والربح ونسبته) تُحفظ float64 كما هي، وبدونها تُشتق عند الطلب؛
+والقوائم المصفاة (الرابحة والخاسرة...) فهارس صفوف فوق نفس المصفوفات؛ لا يُبنى DataFrame إلا
+للأعمدة المعروضة.
+في صفحات الوسطاء الكتاب هو التمثيل الوحيد المحفوظ للملف: الإجماليات والجدول والرسوم منه.
+"""
+from dataclasses import dataclass, field, replace
+
+import numpy as np
+import pandas as pd
+
+from tdwl import profiling
+from tdwl.ingest import parse_export, upload_payload
+from tdwl.memo import LRUDict, content_hash
+from tdwl.symbols import DEFAULT_SECTOR, symbol_index
+from tdwl.valuation import Totals
+
+TEXT_FIELDS = ("symbol", "name", "sector")
+STORED_FIELDS = ("shares", "buy_price", "price")
+DERIVED_FIELDS = ("cost", "value", "pnl", "pnl_percent")
+# float32 يحفظ 7 أرقام معنوية؛ التقريب عند التوسيع يعيد سعر الملف نفسه (26.18 لا 26.1800003)
+# فتطابق الحسابات المشتقة حسابات إطار float64 حتى عند الحدود مثل +10% بالضبط
+PRICE_DECIMALS = 4
+# أسماء الحقول في المخطط الموحد لملفات الوسطاء
+EXPORT_FIELDS = {"symbol": "symbol", "name": "name", "shares": "shares", "buy_price": "buy_price",
+                 "price": "market_price", "cost": "cost", "value": "value", "pnl": "pnl",
+                 "pnl_percent": "return_pct"}
+
+# جدول صفحات الوسطاء وتقرير PDF بعناوين الملف نفسها
+DISPLAY_FIELDS = ("symbol", "name", "shares", "buy_price", "price", "cost", "value", "pnl", "pnl_percent")
+
+_books = LRUDict(maxsize=32)
+
+
+def _categorical(values):
+    # pandas يختار أصغر نوع للأكواد (int8 لأقل من 128 قيمة)
+    return pd.Categorical(pd.Series(values, dtype="string").str.strip())
+
+
+def _widen(prices):
+    return np.round(prices.astype("float64"), PRICE_DECIMALS)
+
+
+def _quantity(values):
+    values = np.asarray(values, dtype="float64")
+    # الكميات الصحيحة (كل ملفات الوسطاء) int32؛ الكسرية أو الناقصة float32
+    if np.isfinite(values).all() and (values == np.round(values)).all() and (np.abs(values) < 2**31).all():
+        return values.astype("int32")
+    return values.astype("float32")
+
+
+@dataclass(frozen=True)
+class HoldingsView:
+    """صفوف مختارة من CompactHoldings: مصفوفة فهارس فقط حتى يُطلب العرض."""
+    book: "CompactHoldings"
+    rows: np.ndarray
+
+    def __len__(self):
+        return len(self.rows)
+
+    @property
+    def empty(self):
+        return len(self.rows) == 0
+
+    def sort(self, by, ascending=True):
+        values = self.book.column(by)[self.rows]
+        order = np.argsort(values if ascending else -values, kind="stable")
+        return HoldingsView(self.book, self.rows[order])
+
+    def frame(self, fields):
+        return self.book.frame(fields, self.rows)
+
+
+@dataclass(frozen=True)
+class CompactHoldings:
+    symbol: pd.Categorical
+    shares: np.ndarray
+    buy_price: np.ndarray
+    price: np.ndarray
+    name: pd.Categorical = None
+    sector: pd.Categorical = None
+    # مبالغ ملف الوسيط كما هي (متوسط السعر فيه مقرّب، والقيمة تستثني المرهون وغير المسوّى...)؛
+    # float64 لأنها بالهللة، و None يعني الاشتقاق من الكمية والأسعار
+    cost: np.ndarray = None
+    value: np.ndarray = None
+    pnl: np.ndarray = None
+    pnl_percent: np.ndarray = None
+    # الحقل ← عنوان العمود عند العرض (عناوين ملف الوسيط الأصلية مثلاً)
+    labels: dict = field(default_factory=dict)
+
+    @classmethod
+    def from_frame(cls, df, symbol="symbol", name="name", sector="sector", shares="shares",
+                   buy_price="buy_price", price="current_price", cost=None, value=None, pnl=None,
+                   pnl_percent=None, labels=None):
+        """من DataFrame بأي أسماء أعمدة؛ name و sector اختياريان، والمبالغ غير الممررة تُشتق من الكمية والأسعار."""
+
+        def amounts(column):
+            # نسخة: to_numpy بلا نسخ يعيد عرضاً من كتلة float64 للإطار كله فيبقيها حية مع الكتاب
+            return df[column].to_numpy(dtype="float64", copy=True) if column is not None else None
+
+        return cls(
+            symbol=_categorical(df[symbol]),
+            shares=_quantity(df[shares]),
+            buy_price=df[buy_price].to_numpy(dtype="float32"),
+            price=df[price].to_numpy(dtype="float32"),
+            name=_categorical(df[name]) if name in df else None,
+            sector=_categorical(df[sector]) if sector in df else None,
+            cost=amounts(cost),
+            value=amounts(value),
+            pnl=amounts(pnl),
+            pnl_percent=amounts(pnl_percent),
+            labels=dict(labels or {}),
+        )
+
+    @classmethod
+    def from_export(cls, df, layout):
+        """من ملف وسيط مقروء بـ read_export؛ العرض يعيد عناوين الملف نفسها والقطاع من فهرس الرموز."""
+        columns = {canonical: column for column, canonical in layout.canonical.items()}
+        labels = {name: columns[canonical] for name, canonical in EXPORT_FIELDS.items() if canonical in columns}
+        book = cls.from_frame(df, symbol=labels["symbol"], name=labels.get("name", "name"), shares=labels["shares"],
+                              buy_price=labels["buy_price"], price=labels["price"], cost=labels.get("cost"),
+                              value=labels.get("value"), pnl=labels.get("pnl"),
+                              pnl_percent=labels.get("pnl_percent"), labels=labels)
+        return book if book.sector is not None else book.with_sectors()
+
+    def with_sectors(self, index=None):
+        """نسخة بقطاع من فهرس الرموز؛ البحث مرة لكل رمز فريد، والاسم للرموز غير المدرجة فيه."""
+        index = index or symbol_index()
+        codes = self.symbol.codes
+        symbols = self.symbol.categories.to_numpy()
+        names = None
+        if self.name is not None:
+            # اسم أول صف لكل رمز
+            names = np.full(len(symbols), "", dtype=object)
+            present, first = np.unique(codes, return_index=True)
+            keep = present >= 0
+            names[present[keep]] = np.asarray(self.name[first[keep]], dtype=object)
+        sectors = index.sector_column(symbols, names).to_numpy()
+        # الكود -1 (رمز ناقص) يقع على العنصر الأخير: القطاع الافتراضي
+        lookup = pd.Categorical(np.append(sectors, DEFAULT_SECTOR))
+        return replace(self, sector=pd.Categorical.from_codes(lookup.codes[codes], lookup.categories))
+
+    def __len__(self):
+        return len(self.symbol)
+
+    @property
+    def nbytes(self):
+        total = self.shares.nbytes + self.buy_price.nbytes + self.price.nbytes
+        for values in (self.cost, self.value, self.pnl, self.pnl_percent):
+            if values is not None:
+                total += values.nbytes
+        for values in (self.symbol, self.name, self.sector):
+            if values is not None:
+                total += values.codes.nbytes + values.categories.memory_usage(deep=True)
+        return total
+
+    def column(self, name):
+        """قيم حقل واحد لكل الصفوف؛ المبالغ غير المحفوظة float64 محسوبة الآن."""
+        if name in TEXT_FIELDS:
+            return getattr(self, name)
+        if name == "shares":
+            return self.shares if self.shares.dtype.kind == "i" else _widen(self.shares)
+        if name in STORED_FIELDS:
+            return _widen(getattr(self, name))
+        if name not in DERIVED_FIELDS:
+            raise KeyError(name)
+        stored = getattr(self, name)
+        if stored is not None:
+            return stored
+        qty = self.shares.astype("float64")
+        if name == "value":
+            return qty * _widen(self.price)
+        if name == "cost":
+            return qty * _widen(self.buy_price)
+        cost = self.column("cost")
+        pnl = self.column("value") - cost if self.pnl is None else self.pnl
+        # ملف الوسيط يعرض الربح بالهللة والعائد بخانتين؛ نفس التقريب للمشتق منهما يبقي نقطة
+        # التعادل وحد ±10% كما في أعمدة الملف
+        rounded = self.cost is not None
+        if name == "pnl":
+            return np.round(pnl, 2) if rounded else pnl
+        with np.errstate(divide="ignore", invalid="ignore"):
+            pnl_percent = np.where(cost != 0, pnl / cost * 100, np.nan)
+        return np.round(pnl_percent, 2) if rounded else pnl_percent
+
+    def frame(self, fields, rows=None):
+        """DataFrame للعرض بالأعمدة المطلوبة فقط؛ الصفوف المختارة تحتفظ بأرقامها الأصلية كفهرس."""
+        data = {}
+        for name in fields:
+            values = self.column(name)
+            data[self.labels.get(name, name)] = values if rows is None else values[rows]
+        return pd.DataFrame(data, index=rows)
+
+    def where(self, mask):
+        # فهارس int32: نصف ذاكرة الافتراضي وتكفي أي محفظة
+        return HoldingsView(self, np.flatnonzero(mask).astype("int32"))
+
+    def winners(self):
+        return self.where(self.column("pnl") > 0).sort("pnl", ascending=False)
+
+    def losers(self):
+        return self.where(self.column("pnl") < 0).sort("pnl")
+
+    def movers(self, threshold=10):
+        """(رابحة، خاسرة) بنسبة ربح ±threshold كما في valuation.movers."""
+        pnl_percent = self.column("pnl_percent")
+        return self.where(pnl_percent >= threshold), self.where(pnl_percent <= -threshold)
+
+    def totals(self):
+        # مثل portfolio_totals: الصفوف بلا سعر تدخل في التكلفة فقط
+        cost = float(np.nansum(self.column("cost")))
+        value = float(np.nansum(self.column("value")))
+        pnl = float(np.nansum(self.column("pnl")))
+        return Totals(cost, value, pnl, pnl / cost * 100 if cost else 0)
+
+    def group_values(self, by="sector", value="value"):
+        """مجموع القيمة لكل رمز أو قطاع بـ bincount على الأكواد؛ القيم غير الموجبة تُحذف كما في valuation."""
+        groups = getattr(self, by)
+        values = self.column(value)
+        valid = (groups.codes >= 0) & np.isfinite(values)
+        sums = np.bincount(groups.codes[valid], weights=values[valid], minlength=len(groups.categories))
+        summary = pd.Series(sums, index=pd.Index(groups.categories, name=by), name=value)
+        return summary[summary > 0]
+
+
+def compact_export(uploaded_file, layout):
+    """CompactHoldings لملف وسيط، محفوظ حسب بصمة المحتوى؛ الإطار المقروء لا يُحفظ (بخلاف read_export)."""
+    data, name = upload_payload(uploaded_file)
+    key = (content_hash(data), layout.name)
+    book = _books.get(key)
+    if book is None:
+        with profiling.stage("parse"):
+            book = CompactHoldings.from_export(parse_export(data, name, layout), layout)
+        _books.put(key, book)
+    else:
+        profiling.count("cache.holdings_hits")
+    return book
@@ -0,0 +1,240 @@
+"""قراءة ملفات المحافظ المرفوعة مع ذاكرة مؤقتة مفتاحها بصمة المحتوى."""
+import importlib.util
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+
+from tdwl import profiling
+from tdwl.memo import LRUDict, content_hash
+from tdwl.schemas import CANONICAL_COLUMNS, CANONICAL_NUMERIC, detect_layout
+
+_frames = LRUDict(maxsize=32)
+# Excel لا يُقرأ صف عناوينه وحده (المحرك يحلل المصنف كاملاً)؛ الورقة المقروءة للتحقق تنتظر
+# هنا حتى يأخذها parse_export، والعناوين تبقى لإعادات تشغيل الصفحة
+_sheets = LRUDict(maxsize=4)
+_headers = LRUDict(maxsize=256)
+
+
+def upload_payload(uploaded_file):
+    """يعيد (البايتات، الاسم) من كائن Streamlit المرفوع أو من زوج جاهز."""
+    if isinstance(uploaded_file, tuple):
+        return uploaded_file
+    return uploaded_file.getvalue(), uploaded_file.name
+
+
+def is_csv(name):
+    return name.lower().endswith(".csv")
+
+
+def has_module(name):
+    return importlib.util.find_spec(name) is not None
+
+
+def excel_engine():
+    # calamine (Rust) أسرع بكثير من openpyxl عند توفره
+    return "calamine" if has_module("python_calamine") else None
+
+
+def _read_sheet(data, key):
+    # قيم الخلايا كما هي (object): الأنواع تُحدد بعد معرفة المخطط دون قراءة ثانية
+    sheet = pd.read_excel(BytesIO(data), dtype=object, engine=excel_engine())
+    _headers.put(key, sheet.columns.tolist())
+    return sheet
+
+
+def read_header(data, name, encoding="utf-8-sig"):
+    """صف العناوين: سطر CSV الأول وحده، أما Excel فيُقرأ مرة وتُحفظ ورقته لـ parse_export."""
+    if is_csv(name):
+        first_line = data.split(b"\n", 1)[0].rstrip(b"\r")
+        return pd.read_csv(BytesIO(first_line), encoding=encoding, nrows=0).columns.tolist()
+    key = content_hash(data)
+    header = _headers.get(key)
+    if header is None:
+        _sheets.put(key, _read_sheet(data, key))
+        header = _headers.get(key)
+    return list(header)
+
+
+def read_excel(data, layout):
+    """إطار Excel بأنواع المخطط من قراءة واحدة للمصنف (الورقة المحفوظة من read_header إن وجدت)."""
+    key = content_hash(data)
+    sheet = _sheets.pop(key)
+    if sheet is None:
+        sheet = _read_sheet(data, key)
+    df = sheet.infer_objects()
+    text = [col for col in layout.text_columns if col in df.columns]
+    df[text] = df[text].astype("string")
+    return clean_numeric(df, layout.numeric_columns)
+
+
+def clean_numeric(df, columns):
+    """تنظيف كل الأعمدة النصية الرقمية في مرور واحد بدل حلقة pd.to_numeric لكل عمود."""
+    dirty = [col for col in columns if col in df.columns and not pd.api.types.is_numeric_dtype(df[col])]
+    if not dirty:
+        return df
+    block = df[dirty].to_numpy(dtype=object)
+    flat = pd.Series(block.ravel(), dtype="string").str.replace(",", "", regex=False).str.strip()
+    numbers = pd.to_numeric(flat, errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+    df[dirty] = numbers.reshape(block.shape)
+    return df
+
+
+def _clean_arrow(table, columns):
+    # الأعمدة الرقمية التي بقيت نصاً (بسبب فواصل الآلاف) تُدمج في مصفوفة واحدة
+    # وتُنظّف وتُحوّل بعملية واحدة ثم تُقسّم إلى أعمدتها
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    dirty = [col for col in columns
+             if col in table.column_names and pa.types.is_string(table.schema.field(col).type)]
+    if not dirty:
+        return table
+    stacked = pa.chunked_array([chunk for col in dirty for chunk in table[col].chunks], type=pa.string())
+    stripped = pc.utf8_trim_whitespace(pc.replace_substring(stacked, ",", ""))
+    try:
+        numbers = pc.cast(stripped, pa.float64())
+    except pa.ArrowInvalid:
+        # قيم غير رقمية: نفس سلوك errors="coerce"
+        numbers = pa.chunked_array([pd.to_numeric(stripped.to_pandas(), errors="coerce").to_numpy()])
+    numbers = numbers.combine_chunks()
+    rows = table.num_rows
+    for i, col in enumerate(dirty):
+        table = table.set_column(table.schema.get_field_index(col), col, numbers.slice(i * rows, rows))
+    return table
+
+
+def _read_csv_arrow(data, layout, header):
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+
+    options = pacsv.ConvertOptions(
+        column_types={col: pa.string() for col in layout.text_columns if col in header},
+        strings_can_be_null=True,
+    )
+    table = pacsv.read_csv(BytesIO(data), convert_options=options)
+    return _clean_arrow(table, layout.numeric_columns).to_pandas()
+
+
+def parse_export(data, name, layout):
+    if not is_csv(name):
+        return read_excel(data, layout)
+    header = read_header(data, name, layout.encoding)
+    if has_module("pyarrow"):
+        try:
+            return _read_csv_arrow(data, layout, header)
+        except Exception:
+            # صفوف غير منتظمة لا يقبلها pyarrow؛ نرجع إلى المحرك العادي
+            pass
+    df = pd.read_csv(BytesIO(data), encoding=layout.encoding, dtype=layout.dtypes(header), thousands=",")
+    return clean_numeric(df, layout.numeric_columns)
+
+
+def read_export(uploaded_file, layout):
+    """قراءة ملف تصدير معروف المخطط بأنواع صريحة، مع الحفظ المؤقت حسب بصمة المحتوى."""
+    data, name = upload_payload(uploaded_file)
+    key = (content_hash(data), is_csv(name), layout.name)
+    df = _frames.get(key)
+    if df is None:
+        with profiling.stage("parse"):
+            df = parse_export(data, name, layout)
+        _frames.put(key, df)
+    else:
+        profiling.count("cache.parse_hits")
+    return df.copy()
+
+
+def sniff_layout(uploaded_file):
+    data, name = upload_payload(uploaded_file)
+    return detect_layout(read_header(data, name))
+
+
+def check_layout(uploaded_file, layout):
+    """التحقق من الأعمدة المطلوبة قبل التحليل: سطر CSV الأول، أو ورقة Excel التي يعيد parse_export استخدامها."""
+    data, name = upload_payload(uploaded_file)
+    return layout.missing(read_header(data, name, layout.encoding))
+
+
+def to_ticker(codes):
+    # رموز الوسطاء أرقام مجردة (1120) أما Yahoo فيحتاج اللاحقة 1120.SR
+    codes = codes.astype("string").str.strip()
+    return codes.where(~codes.str.fullmatch(r"\d+").fillna(False), codes + ".SR")
+
+
+def to_canonical(df, layout):
+    out = df[list(layout.canonical)].rename(columns=layout.canonical)
+    for col in CANONICAL_COLUMNS:
+        if col not in out:
+            out[col] = np.nan if col in CANONICAL_NUMERIC else pd.NA
+    out = out[list(CANONICAL_COLUMNS)]
+    out["symbol"] = to_ticker(out["symbol"])
+    out["name"] = out["name"].astype("string")
+    out[list(CANONICAL_NUMERIC)] = out[list(CANONICAL_NUMERIC)].astype("float64")
+    # الصيغة البسيطة لا تحمل التكلفة الإجمالية
+    missing_cost = out["cost"].isna()
+    out.loc[missing_cost, "cost"] = out["shares"] * out["buy_price"]
+    return out
+
+
+def iter_canonical(uploaded_file, layout=None, chunksize=50_000):
+    """يبث صفوف الملف على دفعات بالمخطط الموحد بعد التعرف على صيغته من العناوين."""
+    data, name = upload_payload(uploaded_file)
+    header = read_header(data, name)
+    layout = layout or detect_layout(header)
+    columns = [col for col in header if col in layout.required]
+
+    if not is_csv(name):
+        # ملفات Excel لا تُقرأ على دفعات؛ الورقة نفسها التي قرأها read_header
+        yield to_canonical(read_excel(data, layout), layout)
+        return
+
+    if has_module("pyarrow"):
+        import pyarrow as pa
+        import pyarrow.csv as pacsv
+
+        # كل الأعمدة نصية عند البث حتى لا يختلف استنتاج النوع بين دفعة وأخرى
+        reader = pacsv.open_csv(
+            BytesIO(data),
+            read_options=pacsv.ReadOptions(block_size=1 << 22),
+            convert_options=pacsv.ConvertOptions(
+                column_types={col: pa.string() for col in columns},
+                include_columns=columns,
+                strings_can_be_null=True,
+            ),
+        )
+        for batch in reader:
+            table = _clean_arrow(pa.Table.from_batches([batch]), layout.numeric_columns)
+            yield to_canonical(table.to_pandas(), layout)
+        return
+
+    chunks = pd.read_csv(BytesIO(data), encoding=layout.encoding, usecols=columns,
+                         dtype=str, chunksize=chunksize)
+    for chunk in chunks:
+        yield to_canonical(clean_numeric(chunk, layout.numeric_columns), layout)
+
+
+def read_canonical(uploaded_file):
+    data, name = upload_payload(uploaded_file)
+    key = (content_hash(data), is_csv(name), "canonical")
+    df = _frames.get(key)
+    if df is None:
+        with profiling.stage("parse"):
+            parts = list(iter_canonical((data, name)))
+            df = pd.concat(parts, ignore_index=True) if len(parts) > 1 else parts[0]
+        _frames.put(key, df)
+    else:
+        profiling.count("cache.parse_hits")
+    return df.copy()
+
+
+def ingest_many(uploaded_files):
+    """يجمع ملفات بصيغ مختلفة في إطار واحد بالمخطط الموحد مع عمود source لاسم الملف."""
+    frames = []
+    for uploaded_file in uploaded_files:
+        data, name = upload_payload(uploaded_file)
+        frames.append(read_canonical((data, name)).assign(source=name))
+    if not frames:
+        return pd.DataFrame(columns=[*CANONICAL_COLUMNS, "source"])
+    combined = pd.concat(frames, ignore_index=True)
+    combined["source"] = combined["source"].astype("category")
+    return combined
@@ -0,0 +1,304 @@
+"""عميل أسعار غير متزامن: جلسة HTTP مشتركة، تزامن محدود، حد معدل، وإعادة محاولة لكل رمز.
+
+الواجهة المتزامنة (fetch_prices و AsyncYahooBackend) تمر بعميل واحد لكل عملية في خيط حلقة خاص،
+فكل جلسات Streamlit تتشارك مجمع الاتصالات ودلو حد المعدل نفسه.
+"""
+import asyncio
+import atexit
+import os
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+
+from tdwl.memo import LRUDict
+
+YAHOO_URL = "https://query1.finance.yahoo.com"
+CHART_PATH = "/v8/finance/chart/{symbol}"
+# Yahoo يبدأ برفض الطلبات (429) عند تجاوز بضعة طلبات في الثانية من نفس العنوان
+DEFAULT_RATE = 8.0
+DEFAULT_BURST = 16
+DEFAULT_CONCURRENCY = 8
+DEFAULT_TIMEOUT = 10.0
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+HEADERS = {"User-Agent": "Mozilla/5.0 (tdwl)", "Accept": "application/json"}
+
+
+class TokenBucket:
+    """حد معدل: rate طلب في الثانية مع سماح بدفعة burst."""
+
+    def __init__(self, rate=DEFAULT_RATE, burst=DEFAULT_BURST, clock=time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self._tokens = float(burst)
+        self._updated = clock()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = self.clock()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    attempts: int = 4
+    base_delay: float = 0.25
+    max_delay: float = 4.0
+
+    def delay(self, attempt, retry_after=None):
+        # تأخير أُسّي مع تشويش كامل حتى لا تعود كل الرموز الفاشلة في اللحظة نفسها
+        if retry_after is not None:
+            return min(retry_after, self.max_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+
+@dataclass(frozen=True)
+class SymbolFailure:
+    symbol: str
+    reason: str  # http / not_found / timeout / connection / parse / no_price
+    attempts: int
+    status: int = None
+    message: str = ""
+
+
+@dataclass
+class FetchReport:
+    prices: dict = field(default_factory=dict)
+    failures: dict = field(default_factory=dict)
+    requests: int = 0
+    elapsed: float = 0.0
+
+    def summary(self):
+        reasons = {}
+        for failure in self.failures.values():
+            reasons[failure.reason] = reasons.get(failure.reason, 0) + 1
+        return {"ok": len(self.prices), "failed": len(self.failures), "requests": self.requests,
+                "elapsed": round(self.elapsed, 3), "reasons": reasons}
+
+
+class _Retryable(Exception):
+    def __init__(self, reason, status=None, message="", retry_after=None):
+        super().__init__(message)
+        self.reason = reason
+        self.status = status
+        self.retry_after = retry_after
+
+
+def parse_chart(payload):
+    """آخر سعر من استجابة chart: regularMarketPrice وإلا آخر إغلاق غير فارغ."""
+    result = (payload.get("chart") or {}).get("result") or []
+    if not result:
+        return None
+    meta = result[0].get("meta") or {}
+    price = meta.get("regularMarketPrice")
+    if price is None:
+        quote = ((result[0].get("indicators") or {}).get("quote") or [{}])[0]
+        closes = [c for c in quote.get("close") or [] if c is not None]
+        price = closes[-1] if closes else None
+    return float(price) if price is not None else None
+
+
+class MarketDataClient:
+    """يُستخدم داخل async with: جلسة aiohttp واحدة بمجمع اتصالات محدود لكل الطلبات."""
+
+    def __init__(self, base_url=None, concurrency=DEFAULT_CONCURRENCY, rate=DEFAULT_RATE, burst=DEFAULT_BURST,
+                 retry=RetryPolicy(), timeout=DEFAULT_TIMEOUT):
+        self.base_url = (base_url or os.environ.get("TDWL_QUOTES_URL", YAHOO_URL)).rstrip("/")
+        self.concurrency = concurrency
+        self.rate = rate
+        self.burst = burst
+        self.retry = retry
+        self.timeout = timeout
+        self._session = None
+        self._bucket = None
+        self._semaphore = None
+        self.requests = 0
+
+    async def __aenter__(self):
+        import aiohttp
+
+        connector = aiohttp.TCPConnector(limit=self.concurrency, ttl_dns_cache=300)
+        self._session = aiohttp.ClientSession(
+            connector=connector, headers=HEADERS, timeout=aiohttp.ClientTimeout(total=self.timeout),
+        )
+        self._bucket = TokenBucket(self.rate, self.burst)
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self._session.close()
+        self._session = None
+
+    async def _get_json(self, path, params):
+        import aiohttp
+
+        await self._bucket.acquire()
+        async with self._semaphore:
+            self.requests += 1
+            try:
+                async with self._session.get(self.base_url + path, params=params) as response:
+                    if response.status in RETRY_STATUSES:
+                        retry_after = response.headers.get("Retry-After")
+                        raise _Retryable("http", response.status, response.reason or "",
+                                         float(retry_after) if retry_after and retry_after.isdigit() else None)
+                    if response.status != 200:
+                        return response.status, None
+                    return 200, await response.json(content_type=None)
+            except asyncio.TimeoutError as exc:
+                raise _Retryable("timeout", message=str(exc) or "timeout") from exc
+            except aiohttp.ClientError as exc:
+                raise _Retryable("connection", message=f"{type(exc).__name__}: {exc}") from exc
+
+    async def _fetch(self, symbol):
+        # (السعر، الفشل، عدد الطلبات)؛ العدد لكل رمز لأن العميل المشترك يخدم عدة استدعاءات معاً
+        last = None
+        for attempt in range(self.retry.attempts):
+            if attempt:
+                await asyncio.sleep(self.retry.delay(attempt - 1, last.retry_after))
+            try:
+                status, payload = await self._get_json(CHART_PATH.format(symbol=symbol),
+                                                       {"range": "5d", "interval": "1d"})
+            except _Retryable as exc:
+                last = exc
+                continue
+            if payload is None:
+                reason = "not_found" if status == 404 else "http"
+                return None, SymbolFailure(symbol, reason, attempt + 1, status), attempt + 1
+            try:
+                price = parse_chart(payload)
+            except (AttributeError, TypeError, ValueError, IndexError) as exc:
+                return None, SymbolFailure(symbol, "parse", attempt + 1, status, str(exc)), attempt + 1
+            if price is None:
+                return None, SymbolFailure(symbol, "no_price", attempt + 1, status), attempt + 1
+            return price, None, attempt + 1
+        failure = SymbolFailure(symbol, last.reason, self.retry.attempts, last.status, str(last))
+        return None, failure, self.retry.attempts
+
+    async def fetch_price(self, symbol):
+        """يعيد (السعر، None) أو (None، SymbolFailure) ولا يرفع استثناءً."""
+        price, failure, _ = await self._fetch(symbol)
+        return price, failure
+
+    async def fetch_prices(self, symbols):
+        start = time.perf_counter()
+        report = FetchReport()
+        results = await asyncio.gather(*(self._fetch(symbol) for symbol in symbols))
+        for symbol, (price, failure, requests) in zip(symbols, results):
+            report.requests += requests
+            if failure is None:
+                report.prices[symbol] = price
+            else:
+                report.failures[symbol] = failure
+        report.elapsed = time.perf_counter() - start
+        return report
+
+
+class SharedClient:
+    """MarketDataClient واحد طويل العمر في خيط حلقة asyncio خاص؛ الاستدعاءات من أي خيط تُرسل إليه.
+
+    الجلسة (واتصالاتها المفتوحة) ودلو حد المعدل يبقيان بين الاستدعاءات، فالجلسات المتزامنة
+    تتقاسم rate و burst بدل أن تأخذ كل واحدة دفعتها الكاملة.
+    """
+
+    def __init__(self, **options):
+        self.options = options
+        self.client = None
+        self._loop = None
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _start(self):
+        loop = asyncio.new_event_loop()
+        thread = threading.Thread(target=loop.run_forever, name="tdwl-market-client", daemon=True)
+        thread.start()
+        client = MarketDataClient(**self.options)
+        asyncio.run_coroutine_threadsafe(client.__aenter__(), loop).result()
+        self._loop, self._thread, self.client, self._pid = loop, thread, client, os.getpid()
+
+    def _ensure(self):
+        with self._lock:
+            # عملية ابنة (fork) ترث الكائن دون خيط الحلقة
+            if self._loop is None or self._pid != os.getpid():
+                self._start()
+            return self._loop
+
+    def run(self, coroutine_function, *args, timeout=None):
+        loop = self._ensure()
+        return asyncio.run_coroutine_threadsafe(coroutine_function(self.client, *args), loop).result(timeout)
+
+    def fetch_prices(self, symbols, timeout=None):
+        return self.run(MarketDataClient.fetch_prices, list(symbols), timeout=timeout)
+
+    def close(self):
+        with self._lock:
+            if self._loop is None or self._pid != os.getpid():
+                return
+            asyncio.run_coroutine_threadsafe(self.client.__aexit__(None, None, None), self._loop).result()
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._loop.close()
+            self._loop = self._thread = self.client = None
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def shared_client(**options):
+    """العميل المشترك لهذه الخيارات في العملية (عنوان المصدر، rate، burst...)."""
+    key = tuple(sorted(options.items()))
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = _clients[key] = SharedClient(**options)
+        return client
+
+
+@atexit.register
+def close_clients():
+    with _clients_lock:
+        clients = list(_clients.values())
+        _clients.clear()
+    for client in clients:
+        client.close()
+
+
+def fetch_prices(symbols, **options):
+    """واجهة متزامنة لسكربتات Streamlit عبر العميل المشترك (خيط الصفحة لا يملك حلقة asyncio جارية)."""
+    return shared_client(**options).fetch_prices(symbols)
+
+
+class AsyncYahooBackend:
+    """مصدر أسعار عبر MarketDataClient؛ آخر سبب فشل لكل رمز محفوظ في failures."""
+
+    def __init__(self, info_backend=None, **options):
+        self.options = options
+        self.info_backend = info_backend
+        self.failures = LRUDict(4096)
+        self.last_report = None
+
+    def download_prices(self, symbols):
+        report = fetch_prices(symbols, **self.options)
+        for symbol in report.prices:
+            self.failures.pop(symbol)
+        for symbol, failure in report.failures.items():
+            self.failures.put(symbol, failure)
+        self.last_report = report
+        return report.prices
+
+    def fetch_info(self, symbol):
+        # بيانات الشركة (القطاع) تحتاج جلسة Yahoo بملفات تعريف؛ تبقى عبر yfinance
+        if self.info_backend is None:
+            from tdwl.quotes import YahooBackend
+
+            self.info_backend = YahooBackend()
+        return self.info_backend.fetch_info(symbol)
@@ -0,0 +1,170 @@
+"""مزودو بيانات السوق لمؤشر الخوف: مولّد تجريبي حتمي قابل للبذر ومحوّل لمصدر حقيقي بنفس الواجهة."""
+import os
+from dataclasses import dataclass
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from tdwl import fear_history
+
+SECTORS = ("البنوك", "البتروكيماويات", "التأمين", "الاتصالات", "الطاقة", "الأسمنت", "التجزئة", "الخدمات")
+
+MARKET_FIELDS = ("change_percent", "volume", "avg_volume", "declines", "advances", "market_cap",
+                 "big_sell_ratio", "volatility_score", "noise")
+SECTOR_FIELDS = ("change_percent", "volume", "declines", "total_stocks", "volatility")
+
+
+# الحقل ← (الأدنى، الأعلى، التقريب) بنفس توزيعات app.py: "int" عدد صحيح شامل للحدين،
+# رقم = خانات عشرية، None بلا تقريب
+MARKET_DRAWS = {
+    "change_percent": (-2.5, 1.5, 2),
+    "volume": (10_000_000, 30_000_000, "int"),
+    "avg_volume": (15_000_000, 25_000_000, "int"),
+    "declines": (50, 200, "int"),
+    "advances": (20, 150, "int"),
+    "market_cap": (2e12, 3e12, None),
+    "big_sell_ratio": (0.1, 0.6, None),
+    "volatility_score": (0, 1, None),
+    # العنصر العشوائي في معادلة app.py يُسحب هنا من نفس البذرة لا وقت الحساب
+    "noise": (0, 1, None),
+}
+SECTOR_DRAWS = {
+    "change_percent": (-3.0, 2.0, 2),
+    "volume": (1_000_000, 5_000_000, "int"),
+    "declines": (5, 30, "int"),
+    "total_stocks": (10, 40, "int"),
+    "volatility": (0.5, 3.5, 2),
+}
+
+
+def _scale(uniform, low, high, rounding):
+    if rounding == "int":
+        return (low + np.floor(uniform * (high - low + 1))).astype("int64")
+    values = low + uniform * (high - low)
+    return values if rounding is None else values.round(rounding)
+
+
+@dataclass(frozen=True)
+class MarketPanel:
+    """بيانات N يوم × M قطاع كمصفوفات: market[field] بطول N و sector[field] بشكل (N, M)."""
+    dates: pd.DatetimeIndex
+    sectors: tuple
+    market: dict
+    sector: dict
+
+    def __len__(self):
+        return len(self.dates)
+
+    def day(self, i):
+        """لقطة يوم واحد بنفس شكل fetch_market_data: (قاموس المؤشر، DataFrame القطاعات)."""
+        tasi = {field: values[i].item() for field, values in self.market.items()}
+        sectors = pd.DataFrame({"name": list(self.sectors),
+                                **{field: values[i] for field, values in self.sector.items()}})
+        return tasi, sectors
+
+    def market_frame(self):
+        return pd.DataFrame({"date": self.dates, **self.market})
+
+    def sector_frame(self):
+        days, count = len(self.dates), len(self.sectors)
+        return pd.DataFrame({
+            "date": np.repeat(self.dates.to_numpy(), count),
+            "sector": np.tile(np.array(self.sectors, dtype=object), days),
+            **{field: values.reshape(-1) for field, values in self.sector.items()},
+        })
+
+
+class MarketDataProvider:
+    def snapshot(self, day=None):
+        raise NotImplementedError
+
+    def panel(self, n_days, end=None):
+        raise NotImplementedError
+
+
+class SyntheticProvider(MarketDataProvider):
+    """بيانات تجريبية بنفس توزيعات app.py؛ أرقام كل يوم تُسحب من بذرة (seed، التاريخ) وحدهما،
+    فلقطة اليوم تطابق صفه في أي panel يشمله."""
+
+    synthetic = True
+
+    def __init__(self, seed=0, sectors=SECTORS):
+        self.seed = seed
+        self.sectors = tuple(sectors)
+
+    def panel(self, n_days, end=None):
+        end = pd.Timestamp(end or date.today()).normalize()
+        dates = pd.bdate_range(end=end, periods=n_days, freq="C", weekmask="Sun Mon Tue Wed Thu")
+        count = len(self.sectors)
+        width = len(MARKET_DRAWS) + len(SECTOR_DRAWS) * count
+        # متجه منتظم واحد لكل يوم من بذرته، ثم تحويل كل الأيام إلى مدى كل حقل دفعة واحدة
+        draws = np.array([np.random.default_rng([self.seed, day.toordinal()]).random(width) for day in dates])
+        draws = draws.reshape(n_days, width)
+        market = {field: _scale(draws[:, i], *spec) for i, (field, spec) in enumerate(MARKET_DRAWS.items())}
+        offset = len(MARKET_DRAWS)
+        sector = {}
+        for field, spec in SECTOR_DRAWS.items():
+            sector[field] = _scale(draws[:, offset:offset + count], *spec)
+            offset += count
+        return MarketPanel(dates, self.sectors, market, sector)
+
+    def snapshot(self, day=None):
+        return self.panel(1, end=day).day(0)
+
+
+class FeedProvider(MarketDataProvider):
+    """محوّل لمصدر JSON حقيقي بالشكل {"tasi": {...}, "sectors": [{"name": ..., ...}]}.
+
+    المصدر اللحظي لا يوفر تاريخاً، فـ panel يُقرأ من مخزن tdwl.fear_history.
+    fetch_json يمكن استبداله بدالة محلية في الاختبارات.
+    """
+
+    synthetic = False
+
+    def __init__(self, url, fetch_json=None, timeout=10, store=None):
+        self.url = url
+        self.timeout = timeout
+        self._fetch_json = fetch_json or self._http_json
+        self.store = store
+
+    def _http_json(self, url):
+        import requests
+
+        response = requests.get(url, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def snapshot(self, day=None):
+        url = self.url if day is None else f"{self.url}?date={pd.Timestamp(day):%Y-%m-%d}"
+        payload = self._fetch_json(url)
+        tasi = {field: payload["tasi"][field] for field in MARKET_FIELDS if field in payload["tasi"]}
+        sectors = pd.DataFrame(payload["sectors"])[["name", *SECTOR_FIELDS]]
+        return tasi, sectors
+
+    def panel(self, n_days, end=None):
+        """آخر n_days يوم محفوظ حتى end (أقل إذا كان السجل أقصر)؛ الحقول غير المخزنة لا تظهر."""
+        store = self.store or fear_history.FearStore()
+        end = pd.Timestamp(end or date.today()).normalize()
+        market = store.load(fear_history.MARKET, end=end).tail(n_days)
+        if market.empty:
+            return MarketPanel(pd.DatetimeIndex([]), (), {}, {})
+        dates = pd.DatetimeIndex(market["date"])
+        history = store.load(fear_history.SECTORS, start=dates[0], end=dates[-1])
+        names = tuple(pd.unique(history["sector"])) if not history.empty else ()
+        sector = {}
+        for field in SECTOR_FIELDS:
+            if field in history:
+                table = history.pivot(index="date", columns="sector", values=field)
+                sector[field] = table.reindex(index=dates, columns=list(names)).to_numpy()
+        return MarketPanel(dates, names,
+                           {field: market[field].to_numpy() for field in MARKET_FIELDS if field in market},
+                           sector)
+
+
+def get_provider():
+    """TDWL_MARKET_FEED_URL يفعّل المصدر الحقيقي، وإلا فالمولد التجريبي ببذرة TDWL_SEED."""
+    url = os.environ.get("TDWL_MARKET_FEED_URL")
+    if url:
+        return FeedProvider(url)
+    return SyntheticProvider(seed=int(os.environ.get("TDWL_SEED", "0")))
@@ -0,0 +1,50 @@
+"""أدوات ذاكرة مؤقتة صغيرة داخل العملية."""
+import threading
+from collections import OrderedDict
+
+
+class LRUDict:
+    """قاموس محدود الحجم يطرد الأقدم استخداماً عند الامتلاء."""
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._data:
+                return default
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            return self._data.pop(key, default)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._data
+
+    def __len__(self):
+        return len(self._data)
+
+
+def content_hash(data):
+    """بصمة ثابتة لمحتوى ملف مرفوع تُستخدم مفتاحاً للذاكرة المؤقتة."""
+    import hashlib
+
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
@@ -0,0 +1,258 @@
+"""محاكاة مونت كارلو لقيمة المحفظة: مسارات عوائد مترابطة على دفعات كبيرة موزعة على الأنوية.
+
+python -m tdwl.montecarlo --paths 1000000 --symbols 50
+"""
+import argparse
+import atexit
+import os
+import threading
+import time
+from dataclasses import dataclass, replace
+
+import numpy as np
+import pandas as pd
+
+from tdwl import profiling
+from tdwl.ohlcv import default_store
+from tdwl.risk import MIN_HISTORY, TRADING_DAYS, holding_weights, returns_matrix
+
+DEFAULT_PATHS = 100_000
+DEFAULT_HORIZON = 21
+DEFAULT_BATCH = 20_000
+# نقطة في المروحة لكل أسبوع تداول؛ تجميع الزيادات اللوغاريتمية دقيق فلا حاجة لخطوات يومية
+STEP_DAYS = 5
+PERCENTILES = (5, 25, 50, 75, 95)
+# درجة الخوف التي يبدأ عندها الضغط على السيناريو (حد "قلق" في tdwl.fear)
+STRESS_FROM = 50
+
+
+@dataclass(frozen=True)
+class Scenario:
+    """تعديل على التوزيع التاريخي: تضخيم التقلب، إزاحة العائد السنوي، ودفع الارتباطات نحو 1.
+
+    mask: أصول السيناريو (مثلاً أسهم قطاع واحد)؛ None تعني كل المحفظة.
+    """
+    name: str = "الأساس"
+    vol_scale: float = 1.0
+    drift_shift: float = 0.0
+    correlation_blend: float = 0.0
+    mask: tuple = None
+
+
+BASE = Scenario()
+
+
+def scenario_from_fear(score, sector=None, mask=None):
+    """سيناريو ضغط من درجة مؤشر الخوف (app.py): لا ضغط تحت 50 وأقصاه عند 100.
+
+    عند 100: تقلب مضاعف، عائد سنوي أقل بـ 30 نقطة، ونصف المسافة نحو ارتباط تام.
+    """
+    stress = float(np.clip((score - STRESS_FROM) / (100 - STRESS_FROM), 0, 1))
+    label = f"خوف {score:.0f}" + (f" في {sector}" if sector else "")
+    return Scenario(label, 1 + stress, -0.30 * stress, 0.5 * stress,
+                    tuple(bool(m) for m in mask) if mask is not None else None)
+
+
+@dataclass(frozen=True)
+class SimulationInputs:
+    values: np.ndarray  # القيمة الحالية لكل أصل
+    mu: np.ndarray  # متوسط العائد اللوغاريتمي اليومي
+    cov: np.ndarray  # تباين مشترك يومي للعوائد اللوغاريتمية
+    symbols: tuple = ()
+    # نسبة قيمة المحفظة في الأصول المحاكاة (الرموز بلا تاريخ أسعار خارج المحاكاة)
+    coverage: float = 1.0
+
+    @classmethod
+    def from_prices(cls, prices, values):
+        """prices: أسعار عريضة تاريخية (الأيام × الرموز)، values: سلسلة قيمة مفهرسة بالرمز."""
+        symbols = [s for s in values.index if s in prices.columns]
+        log_returns = np.log1p(returns_matrix(prices[symbols]).to_numpy())
+        covered = values.reindex(symbols).to_numpy(dtype="float64")
+        return cls(covered, log_returns.mean(axis=0),
+                   np.cov(log_returns, rowvar=False).reshape(len(symbols), len(symbols)), tuple(symbols),
+                   float(covered.sum() / values.sum()))
+
+    def stressed(self, scenario):
+        if scenario == BASE:
+            return self
+        mask = np.ones(len(self.mu), bool) if scenario.mask is None else np.asarray(scenario.mask, bool)
+        std = np.sqrt(np.diag(self.cov))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            corr = np.nan_to_num(self.cov / np.outer(std, std))
+        # الارتباط يرتفع فقط بين أصول السيناريو
+        pair = np.outer(mask, mask)
+        corr = np.where(pair, (1 - scenario.correlation_blend) * corr + scenario.correlation_blend, corr)
+        np.fill_diagonal(corr, 1.0)
+        std = np.where(mask, std * scenario.vol_scale, std)
+        mu = np.where(mask, self.mu + scenario.drift_shift / TRADING_DAYS, self.mu)
+        return replace(self, mu=mu, cov=corr * np.outer(std, std))
+
+
+def holdings_inputs(holdings, store=None, symbol="symbol", value="current_value", years=3, end=None):
+    """مدخلات المحاكاة من مخزن الأسعار المحلي؛ None إذا لم يكن التاريخ كافياً (مثل holdings_risk).
+
+    الرموز بلا تاريخ محلي خارج المحاكاة ونسبة القيمة المحاكاة في coverage.
+    """
+    store = store or default_store()
+    weights = holding_weights(holdings, symbol, value)
+    if weights.empty:
+        return None
+    end = pd.Timestamp(end) if end is not None else pd.Timestamp.today().normalize()
+    prices = store.matrix(weights.index, end - pd.DateOffset(years=years), end).dropna(axis=1, how="all")
+    if len(prices) < MIN_HISTORY or prices.empty:
+        return None
+    values = holdings.groupby(symbol, sort=False)[value].sum().reindex(weights.index)
+    return SimulationInputs.from_prices(prices, values)
+
+
+def _factor(cov):
+    """جذر Cholesky مع تسوية بسيطة إذا لم تكن المصفوفة موجبة تماماً (أصول متطابقة)."""
+    jitter = 0.0
+    scale = float(np.mean(np.diag(cov))) or 1.0
+    for _ in range(6):
+        try:
+            return np.linalg.cholesky(cov + np.eye(len(cov)) * jitter)
+        except np.linalg.LinAlgError:
+            jitter = scale * 1e-10 if jitter == 0 else jitter * 100
+    values, vectors = np.linalg.eigh(cov)
+    return vectors * np.sqrt(np.clip(values, 0, None))
+
+
+def simulate_batch(seed, paths, values, mu, factor, steps, step_days):
+    """قيمة المحفظة في نهاية كل خطوة لدفعة مسارات: مصفوفة (paths × steps) float32."""
+    rng = np.random.default_rng(seed)
+    n = len(values)
+    shocks = rng.standard_normal((paths * steps, n), dtype=np.float32)
+    # زيادات لوغاريتمية مترابطة: mu*dt + sqrt(dt) * L z
+    increments = shocks @ (factor.T.astype(np.float32) * np.float32(np.sqrt(step_days)))
+    increments += (mu * step_days).astype(np.float32)
+    increments = increments.reshape(paths, steps, n)
+    np.cumsum(increments, axis=1, out=increments)
+    np.exp(increments, out=increments)
+    return increments @ values.astype(np.float32)
+
+
+def _run_chunk(args):
+    return simulate_batch(*args)
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def _pool(workers):
+    """مجمع عمليات طويل العمر لكل عدد عمليات: بدء عمليات spawn يكلف ثوانٍ فلا يُعاد لكل تشغيل."""
+    with _pools_lock:
+        pool = _pools.get(workers)
+        if pool is None:
+            # spawn بدل fork: خادم Streamlit متعدد الخيوط ونسخه بـ fork غير آمن
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+
+            pool = _pools[workers] = ProcessPoolExecutor(max_workers=workers,
+                                                         mp_context=multiprocessing.get_context("spawn"))
+        return pool
+
+
+@atexit.register
+def shutdown_pools():
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+@dataclass(frozen=True)
+class SimulationResult:
+    days: np.ndarray  # أيام نهاية كل خطوة
+    fan: pd.DataFrame  # النسب المئوية لقيمة المحفظة لكل خطوة
+    terminal: np.ndarray  # القيمة في نهاية الأفق لكل مسار
+    initial: float
+    scenario: Scenario
+    elapsed: float
+
+    def loss_probability(self):
+        return float((self.terminal < self.initial).mean())
+
+    def value_at_risk(self, level=0.95):
+        return float(self.initial - np.quantile(self.terminal, 1 - level))
+
+    def expected_shortfall(self, level=0.95):
+        cutoff = np.quantile(self.terminal, 1 - level)
+        return float(self.initial - self.terminal[self.terminal <= cutoff].mean())
+
+
+@profiling.timed("montecarlo")
+def simulate(inputs, paths=DEFAULT_PATHS, horizon=DEFAULT_HORIZON, steps=None, scenario=BASE, seed=0,
+             workers=None, batch=DEFAULT_BATCH, percentiles=PERCENTILES):
+    """المسارات تُقسم إلى دفعات ثابتة الحجم لكل منها تيار RNG مستقل من SeedSequence.spawn،
+    فالنتيجة نفسها بأي عدد من العمليات.
+    """
+    start = time.perf_counter()
+    inputs = inputs.stressed(scenario)
+    steps = steps or max(1, -(-horizon // STEP_DAYS))
+    step_days = horizon / steps
+    factor = _factor(inputs.cov)
+    sizes = [batch] * (paths // batch) + ([paths % batch] if paths % batch else [])
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    jobs = [(s, size, inputs.values, inputs.mu, factor, steps, step_days) for s, size in zip(seeds, sizes)]
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(jobs) == 1:
+        chunks = [_run_chunk(job) for job in jobs]
+    else:
+        from concurrent.futures.process import BrokenProcessPool
+
+        pool = _pool(workers)
+        try:
+            chunks = list(pool.map(_run_chunk, jobs))
+        except BrokenProcessPool:
+            # عملية ماتت (نفاد الذاكرة مثلاً): المجمع لا يُستخدم بعدها فيُبنى من جديد في الاستدعاء التالي
+            with _pools_lock:
+                if _pools.get(workers) is pool:
+                    del _pools[workers]
+            raise
+    values = np.concatenate(chunks)
+
+    days = np.arange(1, steps + 1) * step_days
+    fan = pd.DataFrame(np.percentile(values, percentiles, axis=0).T, index=pd.Index(days, name="day"),
+                       columns=[f"p{p}" for p in percentiles])
+    fan.loc[0.0] = float(inputs.values.sum())
+    fan = fan.sort_index()
+    return SimulationResult(days, fan, values[:, -1], float(inputs.values.sum()), scenario,
+                            time.perf_counter() - start)
+
+
+def synthetic_inputs(symbols=50, seed=0):
+    rng = np.random.default_rng(seed)
+    loadings = rng.uniform(0.5, 1.2, symbols)
+    vol = rng.uniform(0.012, 0.025, symbols)
+    corr = np.outer(loadings, loadings) * 0.35
+    np.fill_diagonal(corr, 1.0)
+    return SimulationInputs(rng.uniform(10_000, 100_000, symbols), rng.normal(0.0003, 0.0002, symbols),
+                            corr * np.outer(vol, vol))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="محاكاة مونت كارلو لقيمة محفظة تجريبية")
+    parser.add_argument("--paths", type=int, default=1_000_000)
+    parser.add_argument("--symbols", type=int, default=50)
+    parser.add_argument("--horizon", type=int, default=DEFAULT_HORIZON)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--fear", type=float, default=None, help="سيناريو ضغط من درجة مؤشر الخوف")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    scenario = scenario_from_fear(args.fear) if args.fear is not None else BASE
+    result = simulate(synthetic_inputs(args.symbols, args.seed), paths=args.paths, horizon=args.horizon,
+                      scenario=scenario, seed=args.seed, workers=args.workers)
+    print(result.fan.iloc[[0, len(result.fan) // 2, -1]].round(0).to_string())
+    print(f"🎲 {args.paths:,} مسار × {args.symbols} سهم × {args.horizon} يوم — {result.elapsed:.2f} ث "
+          f"({scenario.name})")
+    print(f"احتمال الخسارة {result.loss_probability():.1%} — VaR 95% {result.value_at_risk():,.0f} "
+          f"— ES 95% {result.expected_shortfall():,.0f}")
+
+
+if __name__ == "__main__":
+    main()
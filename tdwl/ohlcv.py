@@ -0,0 +1,226 @@
+"""مخزن محلي لتاريخ الأسعار اليومي (OHLCV): ملف Parquet لكل رمز مع إلحاق الأيام الناقصة فقط.
+
+python -m tdwl.ohlcv 1120.SR 2010.SR --start 2015-01-01
+python -m tdwl.ohlcv --file portfolio_sample.csv
+"""
+import argparse
+import os
+import time
+import zlib
+from collections import defaultdict
+from datetime import date
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from tdwl.memo import LRUDict
+from tdwl.quotes import unique_symbols
+
+FIELDS = ("open", "high", "low", "close", "adj_close", "volume")
+# مؤشر السوق الرئيسي (مرجع beta)؛ يُحدّث دائماً مع رموز المحفظة
+TASI_SYMBOL = "^TASI.SR"
+DEFAULT_START = "2015-01-01"
+# أيام تداول تداول: الأحد إلى الخميس (قناع numpy يبدأ بالاثنين)
+WEEKMASK = "1111001"
+
+
+def default_store_dir():
+    return Path(os.environ.get("TDWL_OHLCV_STORE", Path(__file__).resolve().parent.parent / "data" / "ohlcv"))
+
+
+def trading_days(start, end):
+    # is_busday أسرع بكثير من bdate_range بقناع مخصص
+    days = np.arange(np.datetime64(pd.Timestamp(start).date(), "D"), np.datetime64(pd.Timestamp(end).date(), "D") + 1)
+    return pd.DatetimeIndex(days[np.is_busday(days, weekmask=WEEKMASK)], name="date")
+
+
+def _normalize(frame):
+    """فهرس تاريخي مرتب بلا تكرار وأعمدة FIELDS بأنواع ثابتة."""
+    frame = frame.copy()
+    frame.index = pd.DatetimeIndex(pd.to_datetime(frame.index).tz_localize(None).normalize(), name="date")
+    frame = frame[~frame.index.duplicated(keep="last")].sort_index()
+    for field in FIELDS:
+        if field not in frame:
+            frame[field] = frame["close"] if field == "adj_close" else np.nan
+    frame = frame[list(FIELDS)].astype("float64")
+    return frame.dropna(subset=["close"])
+
+
+class OHLCVStore:
+    """ملف لكل رمز يُعاد كتابته ذرياً عند الإلحاق؛ القراءة من الذاكرة ما لم يتغير الملف."""
+
+    def __init__(self, root=None, memory_entries=512):
+        self.root = Path(root) if root else default_store_dir()
+        self._frames = LRUDict(memory_entries)
+        self._matrices = LRUDict(32)
+
+    def path(self, symbol):
+        return self.root / f"{symbol}.parquet"
+
+    def symbols(self):
+        return sorted(p.stem for p in self.root.glob("*.parquet"))
+
+    def _read(self, symbol):
+        path = self.path(symbol)
+        try:
+            stamp = path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+        hit = self._frames.get(symbol)
+        if hit is not None and hit[0] == stamp:
+            return hit[1]
+        frame = pd.read_parquet(path)
+        frame = frame.set_index("date")
+        self._frames.put(symbol, (stamp, frame))
+        return frame
+
+    def last_date(self, symbol):
+        path = self.path(symbol)
+        hit = self._frames.get(symbol)
+        if hit is not None and hit[0] == self._stamp(symbol):
+            frame = hit[1]
+            return None if frame.empty else frame.index[-1]
+        if not path.exists():
+            return None
+        # من إحصاءات Parquet مباشرة دون قراءة الملف (التحديث الليلي يبدأ بذاكرة فارغة)
+        import pyarrow.parquet as pq
+
+        metadata = pq.ParquetFile(path).metadata
+        column = metadata.schema.names.index("date")
+        maxima = [metadata.row_group(i).column(column).statistics.max for i in range(metadata.num_row_groups)]
+        maxima = [value for value in maxima if value is not None]
+        return pd.Timestamp(max(maxima)) if maxima else None
+
+    def append(self, symbol, frame):
+        """يلحق الأيام الأحدث من آخر يوم محفوظ فقط ويعيد عدد الصفوف الجديدة."""
+        frame = _normalize(frame)
+        existing = self._read(symbol)
+        if existing is not None and not existing.empty:
+            frame = frame[frame.index > existing.index[-1]]
+        if frame.empty:
+            return 0
+        combined = frame if existing is None else pd.concat([existing, frame])
+        self.root.mkdir(parents=True, exist_ok=True)
+        path = self.path(symbol)
+        tmp = path.with_suffix(".parquet.tmp")
+        combined.reset_index().to_parquet(tmp, index=False)
+        os.replace(tmp, path)
+        self._frames.put(symbol, (path.stat().st_mtime_ns, combined))
+        return len(frame)
+
+    def load(self, symbol, start=None, end=None):
+        """شريحة تاريخية بالبحث الثنائي على الفهرس المرتب (دون نسخ الملف كاملاً)."""
+        frame = self._read(symbol)
+        if frame is None:
+            return pd.DataFrame(columns=list(FIELDS), index=pd.DatetimeIndex([], name="date"))
+        return frame.loc[start:end]
+
+    def matrix(self, symbols, start=None, end=None, field="adj_close"):
+        """مصفوفة عريضة (الأيام × الرموز) لحقل واحد؛ الأيام الغائبة لرمز ما تبقى NaN."""
+        symbols = unique_symbols(symbols)
+        signature = (tuple(symbols), str(start), str(end), field,
+                     tuple(self._stamp(symbol) for symbol in symbols))
+        cached = self._matrices.get(signature)
+        if cached is not None:
+            return cached
+        columns = {symbol: self.load(symbol, start, end)[field] for symbol in symbols}
+        wide = pd.DataFrame(columns).sort_index() if columns else pd.DataFrame()
+        wide.index.name = "date"
+        self._matrices.put(signature, wide)
+        return wide
+
+    def _stamp(self, symbol):
+        try:
+            return self.path(symbol).stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+
+@lru_cache(maxsize=None)
+def default_store():
+    """المخزن الافتراضي مرة لكل عملية خادم؛ ذاكرتا الإطارات والمصفوفات تبقيان بين إعادات تشغيل الصفحات."""
+    return OHLCVStore()
+
+
+def update(store, symbols, backend=None, start=DEFAULT_START, end=None):
+    """يجلب لكل رمز الأيام التالية لآخر يوم محفوظ فقط.
+
+    الرموز التي تشترك في نفس يوم البداية تُجلب في طلب واحد (عادةً كل الرموز).
+    """
+    if backend is None:
+        from tdwl.quotes import YahooBackend
+
+        backend = YahooBackend()
+    end = pd.Timestamp(end or date.today()).normalize()
+    groups = defaultdict(list)
+    for symbol in unique_symbols(symbols):
+        last = store.last_date(symbol)
+        begin = pd.Timestamp(start) if last is None else last + pd.Timedelta(days=1)
+        if begin <= end:
+            groups[begin].append(symbol)
+
+    written = {}
+    for begin, group in groups.items():
+        frames = backend.download_history(group, begin, end)
+        for symbol in group:
+            frame = frames.get(symbol)
+            written[symbol] = 0 if frame is None or frame.empty else store.append(symbol, frame)
+    return written
+
+
+class SyntheticHistoryBackend:
+    """تاريخ أسعار حتمي لكل رمز (مسار عشوائي ثابت منذ DEFAULT_START) للقياس والعرض."""
+
+    def __init__(self, seed=0, origin=DEFAULT_START):
+        self.seed = seed
+        self.origin = pd.Timestamp(origin)
+        self.calls = 0
+
+    def _path(self, symbol, end):
+        days = trading_days(self.origin, end)
+        rng = np.random.default_rng([self.seed, zlib.crc32(symbol.encode("utf-8"))])
+        returns = rng.normal(0.0003, 0.018, len(days))
+        close = 50 * np.exp(np.cumsum(returns))
+        spread = np.abs(rng.normal(0, 0.01, len(days)))
+        return pd.DataFrame({
+            "open": close * (1 + rng.normal(0, 0.005, len(days))),
+            "high": close * (1 + spread),
+            "low": close * (1 - spread),
+            "close": close,
+            "adj_close": close,
+            "volume": rng.integers(50_000, 5_000_000, len(days)).astype("float64"),
+        }, index=days)
+
+    def download_history(self, symbols, start, end):
+        self.calls += 1
+        return {symbol: self._path(symbol, end).loc[start:end] for symbol in symbols}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="تحديث مخزن تاريخ الأسعار المحلي")
+    parser.add_argument("symbols", nargs="*", help="رموز مثل 1120.SR")
+    parser.add_argument("--file", help="ملف محفظة (أي صيغة معروفة) تُؤخذ منه الرموز")
+    parser.add_argument("--start", default=DEFAULT_START)
+    parser.add_argument("--store", help="مجلد المخزن (الافتراضي data/ohlcv)")
+    parser.add_argument("--synthetic", type=int, metavar="SEED", help="بيانات تجريبية بدل Yahoo")
+    args = parser.parse_args(argv)
+
+    symbols = list(args.symbols)
+    if args.file:
+        from tdwl.ingest import read_canonical
+
+        path = Path(args.file)
+        symbols += read_canonical((path.read_bytes(), path.name))["symbol"].tolist()
+    symbols.append(TASI_SYMBOL)
+    store = OHLCVStore(args.store)
+    backend = SyntheticHistoryBackend(args.synthetic) if args.synthetic is not None else None
+    started = time.perf_counter()
+    written = update(store, symbols, backend=backend, start=args.start)
+    elapsed = time.perf_counter() - started
+    print(f"📈 {len(written)} رمز، {sum(written.values())} يوم جديد — {elapsed:.2f} ث — {store.root}")
+
+
+if __name__ == "__main__":
+    main()
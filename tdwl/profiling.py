@@ -0,0 +1,235 @@
+"""قياس مراحل الصفحة: مؤقتات، عدادات للذاكرة المؤقتة والشبكة، وذروة الذاكرة، مع تصدير JSON lines.
+
+الصفحة تبدأ القياس بـ page() وتنهيه بـ debug_panel()؛ وحدات tdwl تستدعي stage() و count()
+دون تمرير أي كائن، وبلا قياس نشط تكون الاستدعاءات شبه مجانية.
+
+python -m tdwl.profiling profile.jsonl   # p50/p95 لكل صفحة ومرحلة
+"""
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+
+try:
+    import resource
+except ImportError:  # ويندوز
+    resource = None
+
+# ملف JSON lines يُلحق به سجل كل تشغيل للصفحة (فارغ = لا تصدير)
+LOG_ENV = "TDWL_PROFILE_LOG"
+# تتبع ذروة الذاكرة لكل مرحلة عبر tracemalloc (يبطئ التخصيص، فلا يُفعّل افتراضياً)
+MEMORY_ENV = "TDWL_PROFILE_MEMORY"
+# لوحة التوقيتات تظهر مع هذا المتغير أو ?debug=1 في الرابط
+DEBUG_ENV = "TDWL_DEBUG"
+RECENT_RECORDS = 1000
+
+_current = contextvars.ContextVar("tdwl_profiler", default=None)
+_NULL = nullcontext()
+_log_lock = threading.Lock()
+recent = deque(maxlen=RECENT_RECORDS)
+
+
+class Profiler:
+    """قياس تشغيل واحد للصفحة. المراحل مسطحة بالاسم: التكرار يُجمع والتداخل بنفس الاسم يُحسب مرة."""
+
+    def __init__(self, name, memory=False):
+        self.name = name
+        self.memory = memory
+        self.started = time.perf_counter()
+        self.stages = {}
+        self.counters = {}
+        self.peaks = {}
+        self._active = []
+        self.record = None
+
+    @contextmanager
+    def stage(self, name):
+        if name in self._active:
+            yield
+            return
+        self._active.append(name)
+        if self.memory:
+            import tracemalloc
+
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - start
+            self._active.remove(name)
+            if self.memory:
+                import tracemalloc
+
+                peak = tracemalloc.get_traced_memory()[1]
+                self.peaks[name] = max(self.peaks.get(name, 0), peak)
+                # إعادة ضبط الذروة داخل المرحلة الفرعية لا تُخفي ذروة المرحلة الأم
+                for parent in self._active:
+                    self.peaks[parent] = max(self.peaks.get(parent, 0), peak)
+
+    def count(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def finish(self):
+        """يغلق القياس مرة واحدة ويعيد السجل المصدّر."""
+        if self.record is not None:
+            return self.record
+        record = {
+            "ts": round(time.time(), 3),
+            "page": self.name,
+            "seconds": round(time.perf_counter() - self.started, 6),
+            "stages": {name: round(seconds, 6) for name, seconds in self.stages.items()},
+            "counters": dict(self.counters),
+        }
+        if self.memory:
+            record["memory_peak"] = dict(self.peaks)
+        if resource is not None:
+            # ذروة الذاكرة المقيمة للعملية كلها (كيلوبايت على لينكس)
+            record["rss_max_kb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        self.record = record
+        with _log_lock:
+            recent.append(record)
+        path = os.environ.get(LOG_ENV)
+        if path:
+            with _log_lock, open(path, "a", encoding="utf-8") as log:
+                log.write(json.dumps(record, ensure_ascii=False) + "\n")
+        if _current.get() is self:
+            _current.set(None)
+        return record
+
+
+def page(name, memory=None):
+    """يبدأ قياس تشغيل الصفحة الحالي (خيط Streamlit الحالي) ويعيده."""
+    if memory is None:
+        memory = os.environ.get(MEMORY_ENV) == "1"
+    if memory:
+        import tracemalloc
+
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+    profiler = Profiler(name, memory=memory)
+    _current.set(profiler)
+    return profiler
+
+
+def current():
+    return _current.get()
+
+
+def stage(name):
+    profiler = _current.get()
+    return _NULL if profiler is None else profiler.stage(name)
+
+
+def count(name, amount=1):
+    profiler = _current.get()
+    if profiler is not None and amount:
+        profiler.count(name, amount)
+
+
+def timed(name):
+    """مزخرف: الدالة كلها مرحلة بهذا الاسم."""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def percentile(values, q):
+    """أقرب رتبة: لا استيفاء، فالقيمة موجودة فعلاً في العينة."""
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * q // 100))
+    return ordered[int(rank) - 1]
+
+
+def latency_summary(records):
+    """p50/p95 بالثواني لكل صفحة (total) ولكل مرحلة فيها."""
+    samples = {}
+    for record in records:
+        samples.setdefault((record["page"], "total"), []).append(record["seconds"])
+        for name, seconds in record["stages"].items():
+            samples.setdefault((record["page"], name), []).append(seconds)
+    return {key: {"count": len(values), "p50": percentile(values, 50), "p95": percentile(values, 95)}
+            for key, values in sorted(samples.items())}
+
+
+def load(path):
+    with open(path, encoding="utf-8") as log:
+        return [json.loads(line) for line in log if line.strip()]
+
+
+def history(page=None):
+    """نسخة من السجلات الأخيرة (لصفحة واحدة عند تمرير page)؛ الجلسات الأخرى تضيف إلى recent أثناء القراءة."""
+    with _log_lock:
+        snapshot = list(recent)
+    return snapshot if page is None else [record for record in snapshot if record["page"] == page]
+
+
+def export(records):
+    return "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records)
+
+
+def debug_enabled():
+    if os.environ.get(DEBUG_ENV) == "1":
+        return True
+    import streamlit as st
+
+    try:
+        return st.query_params.get("debug") == "1"
+    except AttributeError:  # إصدارات Streamlit قبل query_params
+        return False
+
+
+def debug_panel(profiler):
+    """ينهي قياس الصفحة ويعرض لوحة التوقيتات عند تفعيل وضع التصحيح."""
+    record = profiler.finish()
+    if not debug_enabled():
+        return record
+    import streamlit as st
+
+    with st.expander("🛠️ التوقيتات والذاكرة (debug)"):
+        stages = sorted(record["stages"].items(), key=lambda item: -item[1])
+        st.table({"المرحلة": ["الصفحة كاملة"] + [name for name, _ in stages],
+                  "ms": [round(record["seconds"] * 1000, 1)] + [round(s * 1000, 1) for _, s in stages]})
+        if record["counters"]:
+            st.json(record["counters"])
+        if "memory_peak" in record:
+            st.caption("ذروة tracemalloc: " + "، ".join(
+                f"{name} {peak / 2**20:.1f}MB" for name, peak in record["memory_peak"].items()))
+        if "rss_max_kb" in record:
+            st.caption(f"ذروة ذاكرة العملية: {record['rss_max_kb'] / 1024:.0f}MB")
+        records = history(record["page"])
+        summary = latency_summary(records)
+        st.caption(f"آخر {len(records)} تشغيل لهذه الصفحة:")
+        st.table({"المرحلة": [name for (_, name) in summary],
+                  "p50 ms": [round(v["p50"] * 1000, 1) for v in summary.values()],
+                  "p95 ms": [round(v["p95"] * 1000, 1) for v in summary.values()]})
+        st.download_button("📥 تصدير JSON lines", data=export(records), file_name="profile.jsonl",
+                           mime="application/x-ndjson")
+    return record
+
+
+def main(argv=None):
+    # الصفحات تستورد هذه الوحدة في أعلاها: أدوات السطر الأوامر تُستورد هنا فقط
+    import argparse
+    from pathlib import Path
+
+    parser = argparse.ArgumentParser(description="p50/p95 لكل صفحة ومرحلة من سجل JSON lines")
+    parser.add_argument("log", type=Path)
+    args = parser.parse_args(argv)
+    summary = latency_summary(load(args.log))
+    print(f"{'page':<28} {'stage':<16} {'n':>6} {'p50 ms':>9} {'p95 ms':>9}")
+    for (page_name, name), values in summary.items():
+        print(f"{page_name:<28} {name:<16} {values['count']:>6} {values['p50'] * 1000:>9.1f} "
+              f"{values['p95'] * 1000:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""جلب أسعار الأسهم وقطاعاتها دفعة واحدة بدلاً من طلبين لكل صف."""
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from tdwl import profiling
+from tdwl.symbols import DEFAULT_SECTOR, symbol_index
+
+DEFAULT_WORKERS = 8
+
+
+class YahooBackend:
+    """مصدر البيانات الافتراضي عبر yfinance."""
+
+    def download_prices(self, symbols):
+        import yfinance as yf
+
+        # طلب واحد لكل الرموز؛ نستخدم فترة 5 أيام ونأخذ آخر إغلاق متاح
+        # حتى لا يضيع سعر رمز لم يُتداول في آخر جلسة
+        data = yf.download(
+            tickers=list(symbols), period="5d", interval="1d",
+            progress=False, threads=True, auto_adjust=False,
+        )
+        if data is None or data.empty:
+            return {}
+        close = data["Close"]
+        if isinstance(close, pd.Series):
+            close = close.to_frame(symbols[0])
+        last = close.ffill().iloc[-1]
+        return {symbol: float(price) for symbol, price in last.items() if pd.notna(price)}
+
+    def fetch_info(self, symbol):
+        import yfinance as yf
+
+        return yf.Ticker(symbol).info or {}
+
+    def download_history(self, symbols, start, end):
+        """تاريخ يومي لكل رمز بين start و end (شاملاً) بطلب واحد لكل الرموز."""
+        import yfinance as yf
+
+        data = yf.download(
+            tickers=list(symbols), start=start, end=pd.Timestamp(end) + pd.Timedelta(days=1),
+            interval="1d", progress=False, threads=True, auto_adjust=False, group_by="ticker",
+        )
+        if data is None or data.empty:
+            return {}
+        columns = {"Open": "open", "High": "high", "Low": "low", "Close": "close",
+                   "Adj Close": "adj_close", "Volume": "volume"}
+        frames = {}
+        for symbol in symbols:
+            if isinstance(data.columns, pd.MultiIndex):
+                if symbol not in data.columns.get_level_values(0):
+                    continue
+                frame = data[symbol]
+            else:
+                frame = data
+            frames[symbol] = frame.rename(columns=columns).dropna(how="all")
+        return frames
+
+
+class StubBackend:
+    """مصدر محلي ثابت يحل محل Yahoo في الاختبارات والقياس."""
+
+    def __init__(self, prices=None, sectors=None):
+        self.prices = dict(prices or {})
+        self.sectors = dict(sectors or {})
+        self.price_calls = 0
+        self.info_calls = 0
+
+    def download_prices(self, symbols):
+        self.price_calls += 1
+        return {s: self.prices[s] for s in symbols if s in self.prices}
+
+    def fetch_info(self, symbol):
+        self.info_calls += 1
+        if symbol in self.sectors:
+            return {"sector": self.sectors[symbol]}
+        return {}
+
+
+def default_backend():
+    # Yahoo خلف لقطة أسعار مشتركة: الجلسات المتزامنة تتشارك نفس الطلبات ونفس الأسعار
+    from tdwl.snapshot import default_snapshot_service
+
+    return default_snapshot_service()
+
+
+def unique_symbols(symbols):
+    # إزالة التكرار والفراغات مع الحفاظ على ترتيب الظهور
+    series = pd.Series(symbols, dtype="object").dropna().astype(str).str.strip()
+    return [s for s in pd.unique(series) if s]
+
+
+def _sector_of(backend, symbol):
+    # مجموعة تداول من info؛ None عند تعذر الطلب (لا يُخزّن فيُعاد لاحقاً)
+    try:
+        info = backend.fetch_info(symbol)
+    except Exception:
+        return None
+    return symbol_index().yahoo_sector(info)
+
+
+def _fetch_sectors(symbols, backend, max_workers):
+    symbols = list(symbols)
+    if not symbols:
+        return {}
+    workers = max(1, min(max_workers, len(symbols)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        sectors = pool.map(lambda s: _sector_of(backend, s), symbols)
+        return dict(zip(symbols, sectors))
+
+
+def fetch_sectors(symbols, backend=None, max_workers=DEFAULT_WORKERS):
+    """مجموعة تداول لكل رمز من بيانات المصدر؛ المتعذر وما لا يقابل مجموعة واحدة DEFAULT_SECTOR."""
+    fetched = _fetch_sectors(symbols, backend or default_backend(), max_workers)
+    return {symbol: sector or DEFAULT_SECTOR for symbol, sector in fetched.items()}
+
+
+def fetch_prices(symbols, backend=None):
+    backend = backend or default_backend()
+    symbols = list(symbols)
+    if not symbols:
+        return {}
+    try:
+        return backend.download_prices(symbols)
+    except Exception:
+        return {}
+
+
+@profiling.timed("quotes")
+def fetch_quotes(symbols, backend=None, with_sector=True, max_workers=DEFAULT_WORKERS, cache=None):
+    """يعيد DataFrame مفهرساً بالرمز يحتوي على price و sector لكل رمز فريد.
+
+    عند تمرير cache (QuoteCache) لا يُجلب من الشبكة إلا ما ليس في الذاكرة المؤقتة.
+    القطاع يُؤخذ أولاً من فهرس الرموز المضمّن، ولا يُطلب من المصدر إلا للرموز غير المدرجة فيه.
+    """
+    from tdwl.cache import PRICE, SECTOR
+
+    backend = backend or default_backend()
+    symbols = unique_symbols(symbols)
+
+    prices = cache.get_many(PRICE, symbols) if cache is not None else {}
+    missing = [s for s in symbols if s not in prices]
+    profiling.count("cache.price_hits", len(prices))
+    profiling.count("network.price_symbols", len(missing))
+    fetched = fetch_prices(missing, backend)
+    prices.update(fetched)
+    if cache is not None:
+        cache.put_many(PRICE, fetched)
+
+    quotes = pd.DataFrame(index=pd.Index(symbols, name="symbol"))
+    quotes["price"] = pd.Series(prices, dtype="float64").reindex(quotes.index)
+
+    if with_sector:
+        sectors = symbol_index().sectors(symbols)
+        profiling.count("index.sector_hits", len(sectors))
+        unknown = [s for s in symbols if s not in sectors]
+        cached = cache.get_many(SECTOR, unknown) if cache is not None and unknown else {}
+        sectors.update(cached)
+        missing = [s for s in unknown if s not in cached]
+        profiling.count("cache.sector_hits", len(cached))
+        profiling.count("network.sector_symbols", len(missing))
+        fetched = _fetch_sectors(missing, backend, max_workers)
+        sectors.update({s: v for s, v in fetched.items() if v is not None})
+        if cache is not None:
+            # الطلبات المتعذرة لا تُخزّن حتى يُعاد المحاولة لاحقاً؛ القطاع غير المعروف من info يُخزّن
+            cache.put_many(SECTOR, {s: v for s, v in fetched.items() if v is not None})
+        quotes["sector"] = pd.Series(sectors, dtype="object").reindex(quotes.index).fillna(DEFAULT_SECTOR)
+    return quotes
+
+
+def price_failures(symbols, backend=None):
+    """سبب تعذر السعر لكل رمز عندما يسجله المصدر (AsyncYahooBackend)."""
+    backend = backend or default_backend()
+    failures = getattr(backend, "failures", None)
+    if failures is None:
+        return {}
+    found = {symbol: failures.get(symbol) for symbol in unique_symbols(symbols)}
+    return {symbol: failure for symbol, failure in found.items() if failure is not None}
+
+
+def attach_quotes(df, quotes, symbol_col="symbol"):
+    # ربط نتائج الجلب بصفوف المحفظة (قد يتكرر الرمز في أكثر من صف)
+    keys = df[symbol_col].astype(str).str.strip()
+    df["current_price"] = keys.map(quotes["price"])
+    if "sector" in quotes:
+        df["sector"] = keys.map(quotes["sector"]).fillna(DEFAULT_SECTOR)
+    return df
@@ -0,0 +1,185 @@
+"""إعادة توازن المحفظة نحو أوزان مستهدفة أو حد أقصى للقطاع، بأسهم كاملة وأسعار على وحدة تغير السعر.
+
+كل الخطوات عمليات عمودية على كل المراكز، فمئات المراكز تُحل في أجزاء من الثانية دون حلال LP.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from tdwl import profiling
+
+# وحدات تغير السعر في تداول حسب شريحة السعر (ريال)
+TICK_BOUNDS = np.array([0, 10, 25, 50, 100, 250, 500], dtype="float64")
+TICK_SIZES = np.array([0.01, 0.02, 0.05, 0.10, 0.20, 0.50, 1.00])
+# الحد الأدنى للكمية في تداول سهم واحد
+DEFAULT_LOT = 1
+# فرق الوزن الذي لا يستحق صفقة
+DEFAULT_BAND = 0.005
+BUY, SELL = "شراء", "بيع"
+# عناوين جدول الصفقات في الصفحات
+TRADE_LABELS = {"side": "العملية", "shares": "الكمية", "price": "سعر الأمر", "value": "القيمة"}
+
+
+def tick_size(price):
+    price = np.asarray(price, dtype="float64")
+    return TICK_SIZES[np.clip(np.searchsorted(TICK_BOUNDS, price, side="right") - 1, 0, len(TICK_SIZES) - 1)]
+
+
+def round_to_tick(price, side=BUY):
+    """سعر أمر صالح: الشراء يُقرب للأعلى والبيع للأسفل حتى لا يقل النقد الفعلي عن المحسوب."""
+    price = np.asarray(price, dtype="float64")
+    tick = tick_size(price)
+    steps = price / tick
+    steps = np.ceil(steps - 1e-9) if side == BUY else np.floor(steps + 1e-9)
+    return np.round(steps * tick, 2)
+
+
+def cap_weights(weights, groups, cap):
+    """ملء مائي: المجموعات فوق الحد تُخفض إليه والفائض يُوزع نسبياً على البقية حتى لا تتجاوز أي مجموعة.
+
+    إذا امتلأت كل المجموعات يبقى الفائض نقداً (مجموع الأوزان أقل من 1).
+    """
+    w = np.asarray(weights, dtype="float64").copy()
+    codes, uniques = pd.factorize(pd.Series(groups), use_na_sentinel=False)
+    fixed = np.zeros(len(uniques), dtype=bool)
+    total = w.sum()
+    for _ in range(len(uniques)):
+        sums = np.bincount(codes, weights=w, minlength=len(uniques))
+        over = sums > cap + 1e-12
+        if not over.any():
+            break
+        with np.errstate(divide="ignore", invalid="ignore"):
+            scale = np.where(over, cap / sums, 1.0)
+        w *= scale[codes]
+        fixed |= over
+        free = ~fixed[codes]
+        room = w[free].sum()
+        if room <= 0:
+            break
+        w[free] += (total - w.sum()) * w[free] / room
+    return w
+
+
+def equal_weights(symbols):
+    symbols = pd.unique(pd.Series(symbols).dropna())
+    return pd.Series(1 / len(symbols), index=symbols) if len(symbols) else pd.Series(dtype="float64")
+
+
+@dataclass(frozen=True)
+class RebalancePlan:
+    trades: pd.DataFrame  # الصفقات فقط (الرمز، النوع، الكمية، السعر، القيمة)
+    positions: pd.DataFrame  # كل المراكز قبل وبعد
+    cash: float  # النقد المتبقي بعد التنفيذ
+    turnover: float  # قيمة الصفقات نسبة إلى إجمالي المحفظة
+
+
+@profiling.timed("rebalance")
+def rebalance(holdings, targets=None, sector_cap=None, max_weight=None, cash=0.0, prices=None,
+              symbol="symbol", shares="shares", price="price", sector=None,
+              lot=DEFAULT_LOT, band=DEFAULT_BAND, min_trade=0.0):
+    """خطة صفقات نحو الأوزان المستهدفة.
+
+    targets: أوزان مفهرسة بالرمز (الرموز غير المذكورة تُباع، وما دون 1 يبقى نقداً)؛ بدونها تُستخدم
+    الأوزان الحالية مع الحدود max_weight و sector_cap. prices: أسعار رموز مستهدفة غير موجودة في المحفظة.
+    المراكز التي يقل فرق وزنها عن band أو قيمة صفقتها عن min_trade لا تُلمس.
+    """
+    current = holdings.groupby(symbol, sort=False).agg(
+        shares=(shares, "sum"), price=(price, "first"),
+        **({"sector": (sector, "first")} if sector else {}))
+    if targets is not None:
+        targets = pd.Series(targets, dtype="float64")
+        new = targets.index.difference(current.index)
+        if len(new):
+            known = pd.Series(prices if prices is not None else {}, dtype="float64").reindex(new)
+            if known.isna().any():
+                raise ValueError(f"لا يوجد سعر للرموز: {', '.join(known[known.isna()].index)}")
+            current = pd.concat([current, pd.DataFrame({"shares": 0.0, "price": known})])
+    current = current[current["price"] > 0]
+
+    px = current["price"].to_numpy(dtype="float64")
+    held = current["shares"].fillna(0).to_numpy(dtype="float64")
+    values = held * px
+    total = values.sum() + cash
+    if total <= 0:
+        raise ValueError("المحفظة فارغة")
+    before = values / total
+
+    if targets is None:
+        # نفس المزيج الحالي مع استثمار النقد الإضافي
+        target = before / before.sum()
+    else:
+        target = targets.reindex(current.index).fillna(0).clip(lower=0).to_numpy()
+        if target.sum() > 1:
+            target = target / target.sum()
+    # الحدان يتداخلان: توزيع فائض القطاع قد يرفع سهماً فوق حده، فيُكرران حتى الاستقرار
+    for _ in range(10):
+        if max_weight is not None:
+            target = cap_weights(target, current.index, max_weight)
+        if sector_cap is not None and sector:
+            target = cap_weights(target, current["sector"].fillna("غير معروف").to_numpy(), sector_cap)
+        if max_weight is None or target.max() <= max_weight + 1e-9:
+            break
+
+    lots = np.broadcast_to(np.asarray(lot, dtype="float64"), px.shape)
+    buy_px = round_to_tick(px, BUY)
+    sell_px = round_to_tick(px, SELL)
+    ideal = target * total / px
+    frozen = (np.abs(target - before) < band) | (np.abs(ideal - held) * px < min_trade)
+    # التجميد لا يُبقي مركزاً فوق حده ولا قطاعاً تتجاوز مراكزه المجمدة مع البقية الحد
+    # والمراكز عند حدها لا تأخذ لوتاً إضافياً عند التقريب
+    at_cap = np.zeros(len(px), dtype=bool)
+    if max_weight is not None:
+        frozen &= before <= max_weight + 1e-9
+        at_cap |= target >= max_weight - 1e-9
+    if sector_cap is not None and sector:
+        codes, _ = pd.factorize(current["sector"].fillna("غير معروف"))
+        planned = np.bincount(codes, weights=np.where(frozen, before, target))
+        frozen &= planned[codes] <= sector_cap + 1e-9
+        at_cap |= np.bincount(codes, weights=target)[codes] >= sector_cap - 1e-9
+    ideal = np.where(frozen, held, ideal)
+    # المراكز المجمدة لا تُباع وأسعار الشراء مقربة للأعلى، فقد لا يكفي النقد: تُخفض المشتريات نسبياً
+    wanted = ideal - held
+    funds = cash + (np.clip(-wanted, 0, None) * sell_px).sum()
+    spend = (np.clip(wanted, 0, None) * buy_px).sum()
+    if spend > funds:
+        ideal = np.where(wanted > 0, held + wanted * funds / spend, ideal)
+    after = np.where(frozen, held, np.floor(ideal / lots) * lots)
+
+    def cash_left(after):
+        delta = after - held
+        return cash + (np.clip(-delta, 0, None) * sell_px).sum() - (np.clip(delta, 0, None) * buy_px).sum()
+
+    # تقريب الكسور لأسفل يترك نقداً: لوت إضافي للأكبر باقياً ما دام النقد يكفي
+    remainder = np.where(frozen | at_cap, -np.inf, ideal / lots - np.floor(ideal / lots))
+    cost = lots * np.where(after >= held, buy_px, sell_px)
+    left = cash_left(after)
+    order = np.argsort(-remainder, kind="stable")
+    order = order[np.isfinite(remainder[order]) & (remainder[order] > 0)]
+    extra = order[np.cumsum(cost[order]) <= left + 1e-9]
+    after[extra] += lots[extra]
+
+    delta = after - held
+    trade_px = np.where(delta > 0, buy_px, sell_px)
+    left = cash_left(after)
+    positions = pd.DataFrame({
+        "shares_before": held,
+        "shares_after": after,
+        "price": px,
+        "weight_before": before,
+        "weight_target": target,
+        "weight_after": after * px / total,
+    }, index=current.index.rename(symbol))
+    if sector:
+        positions.insert(0, "sector", current["sector"].to_numpy())
+    moved = delta != 0
+    trades = pd.DataFrame({
+        "side": np.where(delta[moved] > 0, BUY, SELL),
+        "shares": np.abs(delta[moved]),
+        "price": trade_px[moved],
+        "value": np.abs(delta[moved]) * trade_px[moved],
+    }, index=current.index[moved].rename(symbol))
+    # البيع أولاً حتى يتوفر نقد الشراء
+    trades = trades.sort_values("value", ascending=False)
+    trades = trades.iloc[np.argsort(trades["side"].to_numpy() != SELL, kind="stable")]
+    return RebalancePlan(trades, positions, float(left), float(trades["value"].sum() / total))
@@ -0,0 +1,170 @@
+"""خدمة رسم خلفية للتقارير: مجمع عمليات، تقدم مشترك، وذاكرة محدودة للنتائج الجاهزة."""
+import os
+import threading
+import time
+
+import pandas as pd
+
+from tdwl import profiling
+from tdwl.memo import LRUDict, content_hash
+
+PDF = "pdf"
+DEFAULT_WORKERS = 2
+DEFAULT_RESULTS = 64
+
+
+def job_key(kind, *parts):
+    """بصمة المهمة من محتوى المحفظة نفسها (لا من اسم الملف أو الجلسة)."""
+    digest = [kind]
+    for part in parts:
+        if isinstance(part, (pd.DataFrame, pd.Series)):
+            hashed = pd.util.hash_pandas_object(part, index=True).to_numpy()
+            columns = repr(list(part.columns)) if isinstance(part, pd.DataFrame) else repr(part.name)
+            digest.append(content_hash(hashed.tobytes() + columns.encode("utf-8")))
+        else:
+            digest.append(content_hash(repr(part)))
+    return ":".join(digest)
+
+
+def _render_pdf(progress, key, data, summary, options):
+    from tdwl.report import portfolio_report
+
+    def report_progress(ratio):
+        progress[key] = ratio
+
+    return portfolio_report(data, summary, progress=report_progress, **options)
+
+
+RENDERERS = {PDF: _render_pdf}
+
+
+class RenderService:
+    """مهام الرسم تعمل في عمليات منفصلة فلا تحجز خيط Streamlit ولا قفل GIL الخادم.
+
+    المهمة تُعرّف ببصمة محتواها: إعادة الطلب أثناء التنفيذ تنضم للمهمة نفسها،
+    وبعد انتهائها تُعاد البايتات من الذاكرة مباشرة.
+    """
+
+    def __init__(self, max_workers=DEFAULT_WORKERS, max_results=DEFAULT_RESULTS):
+        self.max_workers = max_workers
+        self._results = LRUDict(max_results)
+        self._pending = {}
+        self._errors = {}
+        self._lock = threading.Lock()
+        self._executor = None
+        self._manager = None
+        self._progress = None
+        self.stats = {"submitted": 0, "cache_hits": 0, "joined": 0, "failed": 0}
+
+    def _start(self):
+        # spawn بدل fork: خادم Streamlit متعدد الخيوط ونسخه بـ fork غير آمن
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+
+        context = multiprocessing.get_context("spawn")
+        self._manager = context.Manager()
+        self._progress = self._manager.dict()
+        self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=context)
+
+    def submit(self, kind, key, *args):
+        """يضيف مهمة (إن لم تكن جاهزة أو جارية) ويعيد مفتاحها."""
+        with self._lock:
+            if key in self._results:
+                self.stats["cache_hits"] += 1
+                profiling.count("cache.render_hits")
+                return key
+            if key in self._pending:
+                self.stats["joined"] += 1
+                return key
+            if self._executor is None:
+                self._start()
+            self._errors.pop(key, None)
+            self._progress[key] = 0.0
+            future = self._executor.submit(RENDERERS[kind], self._progress, key, *args)
+            self._pending[key] = future
+            self.stats["submitted"] += 1
+        future.add_done_callback(lambda done: self._finish(key, done))
+        return key
+
+    def _finish(self, key, future):
+        with self._lock:
+            self._pending.pop(key, None)
+            self._progress.pop(key, None)
+            if future.cancelled():
+                return
+            error = future.exception()
+            if error is None:
+                self._results.put(key, future.result())
+            else:
+                self._errors[key] = error
+                self.stats["failed"] += 1
+
+    def report(self, data, summary, **options):
+        """تقرير PDF للمحفظة (نفس معاملات tdwl.report.portfolio_report)."""
+        key = job_key(PDF, data, summary, sorted(options.items()))
+        return self.submit(PDF, key, data, list(summary), options)
+
+    def done(self, key):
+        return key in self._results
+
+    def progress(self, key):
+        if key in self._results:
+            return 1.0
+        with self._lock:
+            if self._progress is None or key not in self._pending:
+                return 0.0
+            return self._progress.get(key, 0.0)
+
+    def result(self, key, timeout=None):
+        """بايتات الناتج؛ ينتظر المهمة الجارية ويعيد رفع خطئها إن فشلت."""
+        with self._lock:
+            cached = self._results.get(key)
+            future = self._pending.get(key)
+            error = self._errors.get(key)
+        if cached is not None:
+            return cached
+        if error is not None:
+            raise error
+        if future is None:
+            raise KeyError(key)
+        return future.result(timeout)
+
+    @profiling.timed("pdf")
+    def wait(self, key, on_progress=None, interval=0.2, timeout=None):
+        """ينتظر المهمة مع تمرير نسبة التقدم (مثلاً إلى st.progress)."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self.done(key):
+            with self._lock:
+                future = self._pending.get(key)
+            if future is None or future.done():
+                break
+            if on_progress is not None:
+                on_progress(self.progress(key))
+            if deadline is not None and time.monotonic() > deadline:
+                raise TimeoutError(key)
+            time.sleep(interval)
+        data = self.result(key)
+        if on_progress is not None:
+            on_progress(1.0)
+        return data
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True, cancel_futures=True)
+                self._manager.shutdown()
+            self._executor = self._manager = self._progress = None
+
+
+_default_service = None
+_default_lock = threading.Lock()
+
+
+def default_service():
+    """خدمة واحدة لكل عملية Streamlit يتشاركها جميع المستخدمين."""
+    global _default_service
+    with _default_lock:
+        if _default_service is None:
+            workers = int(os.environ.get("TDWL_RENDER_WORKERS", DEFAULT_WORKERS))
+            _default_service = RenderService(max_workers=workers)
+        return _default_service
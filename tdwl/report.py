@@ -0,0 +1,207 @@
+"""تقارير PDF للمحفظة: تنسيق الأعمدة دفعة واحدة ثم رسم الجدول مباشرة مع تقسيم الصفحات."""
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+
+import pandas as pd
+
+FONT_DIR = Path(__file__).resolve().parent.parent
+FONT_FAMILY = "Cairo"
+REPORT_TITLE = "تقرير المحفظة الاستثمارية - السوق السعودي"
+
+# أبعاد A4 بالمليمتر
+PAGE_HEIGHT = 297
+MARGIN = 10
+ROW_HEIGHT = 6
+HEADER_HEIGHT = 8
+
+_ARABIC = re.compile("[؀-ۿ]")
+
+
+@dataclass(frozen=True)
+class Column:
+    key: str
+    title: str
+    width: float
+    kind: str = "text"  # text / int / num / pct
+    limit: int = None
+
+
+SIMPLE_REPORT_COLUMNS = (
+    Column("symbol", "السهم", 35),
+    Column("sector", "القطاع", 35, limit=15),
+    Column("shares", "الكمية", 25, "int"),
+    Column("buy_price", "سعر الشراء", 30, "num"),
+    Column("current_price", "السعر الحالي", 30, "num"),
+    Column("pnl_percent", "الربح %", 25, "pct"),
+)
+
+BROKER_REPORT_COLUMNS = (
+    Column("الرمز", "الرمز", 20),
+    Column("الشركة", "الشركة", 50, limit=28),
+    Column("المحفظة", "الكمية", 20, "int"),
+    Column("متوسط التكلفة", "متوسط السعر", 25, "num"),
+    Column("سعر السوق", "السعر السوقي", 25, "num"),
+    Column("الربح/الخسارة", "الربح/الخسارة", 30, "num"),
+    Column("العائد", "العائد", 20, "pct"),
+)
+
+
+@lru_cache(maxsize=None)
+def font_files():
+    """مسارات خطوط Cairo تُحدد مرة واحدة لكل عملية بغض النظر عن مجلد التشغيل."""
+    files = {"": FONT_DIR / "Cairo-Regular.ttf", "B": FONT_DIR / "Cairo-Bold.ttf"}
+    return {style: path for style, path in files.items() if path.exists()}
+
+
+@lru_cache(maxsize=8192)
+def visual(text):
+    """تشكيل الحروف العربية وترتيبها للعرض (عند توفر arabic-reshaper و python-bidi)."""
+    if not _ARABIC.search(text):
+        return text
+    try:
+        import arabic_reshaper
+        from bidi.algorithm import get_display
+    except ImportError:
+        return text
+    return get_display(arabic_reshaper.reshape(text))
+
+
+def format_column(values, column):
+    """تنسيق عمود كامل إلى نصوص قبل الرسم."""
+    series = pd.Series(values)
+    if column.kind == "text":
+        text = series.astype("string").fillna("")
+        if column.limit:
+            text = text.str.slice(0, column.limit)
+        # التشكيل مرة واحدة لكل قيمة فريدة (أسماء القطاعات والشركات تتكرر)
+        unique = pd.unique(text)
+        return text.map(dict(zip(unique, map(visual, unique)))).tolist()
+    numbers = pd.to_numeric(series, errors="coerce")
+    pattern = {"int": "{:,.0f}", "num": "{:,.2f}", "pct": "{:.2f}%"}[column.kind]
+    return numbers.map(pattern.format, na_action="ignore").fillna("—").tolist()
+
+
+SUMMARY_LABELS = ("إجمالي الشراء", "القيمة الحالية", "الربح / الخسارة")
+BROKER_SUMMARY_LABELS = ("إجمالي التكلفة", "القيمة السوقية", "الربح / الخسارة")
+
+
+def summary_lines(totals, labels=SUMMARY_LABELS):
+    cost, value, pnl, pnl_percent = totals
+    return [
+        f"{labels[0]}: {cost:,.2f} ريال",
+        f"{labels[1]}: {value:,.2f} ريال",
+        f"{labels[2]}: {pnl:,.2f} ريال ({pnl_percent:.2f}%)",
+    ]
+
+
+def _new_document():
+    from fpdf import FPDF
+
+    pdf = FPDF(format="A4")
+    pdf.set_auto_page_break(False)
+    for style, path in font_files().items():
+        pdf.add_font(FONT_FAMILY, style, str(path))
+    return pdf
+
+
+def _bold():
+    return "B" if "B" in font_files() else ""
+
+
+def _table_header(pdf, columns, y):
+    pdf.set_font(FONT_FAMILY, _bold(), 10)
+    pdf.set_xy(MARGIN, y)
+    for column in columns:
+        pdf.cell(column.width, HEADER_HEIGHT, visual(column.title), border=1, align="C")
+    pdf.set_font(FONT_FAMILY, "", 9)
+    return y + HEADER_HEIGHT
+
+
+def _text_row_writer(pdf, columns):
+    # الواجهة العامة: استدعاء text لكل قيمة (أبطأ لكنه لا يعتمد على داخليات fpdf2)
+    offsets = [MARGIN + 1.5]
+    for column in columns[:-1]:
+        offsets.append(offsets[-1] + column.width)
+
+    def write(values, y):
+        for x, value in zip(offsets, values):
+            pdf.text(x, y + ROW_HEIGHT - 1.8, value)
+
+    return write
+
+
+def _row_writer(pdf, columns, encoded=None):
+    """كاتب صفوف الصفحة الحالية: كل صف كائن نص واحد (BT ... ET) بإزاحات الأعمدة بدل text لكل قيمة.
+
+    _out و _set_font_for_page و encode_text داخلية في fpdf2 (ما يستخدمه pdf.text نفسه، والإصدار مثبت
+    في requirements.txt)؛ إذا تغيرت في إصدار آخر نرجع إلى pdf.text العامة.
+    """
+    try:
+        font_op = pdf._set_font_for_page(pdf.current_font, pdf.font_size_pt, wrap_in_text_object=False)
+        encode, out = pdf.current_font.encode_text, pdf._out
+    except (AttributeError, TypeError):
+        return _text_row_writer(pdf, columns)
+    k = pdf.k
+    steps = [0.0] + [column.width * k for column in columns[:-1]]
+    # ترميز القيم المتكررة يُحفظ لأن مخطط الخط المضمّن ثابت داخل المستند
+    encoded = {} if encoded is None else encoded
+
+    def write(values, y):
+        parts = [f"BT {font_op} {(MARGIN + 1.5) * k:.2f} {(pdf.h - y - ROW_HEIGHT + 1.8) * k:.2f} Td"]
+        for step, value in zip(steps, values):
+            glyphs = encoded.get(value)
+            if glyphs is None:
+                glyphs = encoded[value] = encode(value)
+            parts.append(f"{step:.2f} 0 Td {glyphs}")
+        parts.append("ET")
+        out(" ".join(parts))
+
+    return write
+
+
+def portfolio_report(data, summary, columns=SIMPLE_REPORT_COLUMNS, title=REPORT_TITLE, progress=None):
+    """يعيد بايتات PDF. progress(نسبة) اختياري لمتابعة التقدم في الجداول الكبيرة."""
+    pdf = _new_document()
+    pdf.add_page()
+    table_width = sum(column.width for column in columns)
+
+    pdf.set_font(FONT_FAMILY, _bold(), 14)
+    pdf.cell(0, 10, visual(title), align="C", new_x="LMARGIN", new_y="NEXT")
+    pdf.ln(4)
+    pdf.set_font(FONT_FAMILY, "", 12)
+    for line in summary:
+        pdf.cell(0, 8, visual(line), align="R", new_x="LMARGIN", new_y="NEXT")
+    pdf.ln(6)
+
+    formatted = [format_column(data[column.key], column) for column in columns]
+    edges = [MARGIN]
+    for column in columns:
+        edges.append(edges[-1] + column.width)
+    rows = len(data)
+
+    top = _table_header(pdf, columns, pdf.get_y())
+    y = top
+    bottom = PAGE_HEIGHT - MARGIN
+    encoded = {}
+    write_row = _row_writer(pdf, columns, encoded)
+    for index, values in enumerate(zip(*formatted)):
+        if y + ROW_HEIGHT > bottom:
+            # إغلاق الصفحة بخطوط الأعمدة ثم صفحة جديدة بنفس رؤوس الجدول
+            for x in edges:
+                pdf.line(x, top, x, y)
+            pdf.add_page()
+            top = y = _table_header(pdf, columns, MARGIN)
+            write_row = _row_writer(pdf, columns, encoded)
+            if progress is not None:
+                progress(index / rows)
+        write_row(values, y)
+        y += ROW_HEIGHT
+        pdf.line(MARGIN, y, MARGIN + table_width, y)
+    for x in edges:
+        pdf.line(x, top, x, y)
+
+    if progress is not None:
+        progress(1.0)
+    return bytes(pdf.output())
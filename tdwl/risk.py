@@ -0,0 +1,177 @@
+"""مقاييس مخاطر المحفظة على مصفوفة العوائد (الأيام × الرموز) بعمليات مصفوفية دون حلقات على الرموز."""
+from dataclasses import dataclass
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+from tdwl import profiling
+from tdwl.ohlcv import TASI_SYMBOL, default_store
+
+TRADING_DAYS = 252
+DEFAULT_LEVEL = 0.95
+CLUSTER_THRESHOLD = 0.7
+MIN_HISTORY = 60
+
+# حدود التنبيهات في صفحات المحفظة
+ALERT_VOLATILITY = 0.30
+ALERT_BETA = 1.2
+ALERT_VAR = 0.03
+ALERT_DRAWDOWN = -0.25
+ALERT_CLUSTER_WEIGHT = 0.5
+
+
+@dataclass(frozen=True)
+class RiskReport:
+    volatility: float  # سنوي
+    beta: float
+    var_historical: float  # خسارة يومية كنسبة موجبة
+    var_parametric: float
+    max_drawdown: float  # سالبة
+    clusters: pd.Series  # الرمز ← رقم المجموعة
+    cluster_weights: pd.Series  # وزن كل مجموعة مترابطة في المحفظة
+    days: int
+    # نسبة قيمة المحفظة في رموز لها تاريخ أسعار؛ المقاييس على هذا الجزء فقط بأوزان معاد توزيعها
+    coverage: float = 1.0
+
+
+def returns_matrix(prices):
+    """عوائد يومية بسيطة؛ اليوم الغائب لرمز يُعد بلا حركة حتى لا يسقط صف كامل."""
+    prices = prices.sort_index().ffill()
+    values = prices.to_numpy(dtype="float64")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns = values[1:] / values[:-1] - 1
+    returns = np.nan_to_num(returns, nan=0.0, posinf=0.0, neginf=0.0)
+    return pd.DataFrame(returns, index=prices.index[1:], columns=prices.columns)
+
+
+def holding_weights(holdings, symbol="symbol", value="current_value"):
+    """أوزان المحفظة حسب القيمة السوقية لكل رمز (تجمع الصفوف المكررة)."""
+    values = holdings.groupby(symbol, sort=False)[value].sum(min_count=1).dropna()
+    values = values[values > 0]
+    return values / values.sum() if not values.empty else values
+
+
+def covariance(returns):
+    centered = returns - returns.mean(axis=0)
+    return centered.T @ centered / (len(returns) - 1)
+
+
+def volatility(returns, weights, periods=TRADING_DAYS):
+    """الانحراف المعياري السنوي للمحفظة: sqrt(w' Σ w)."""
+    return float(np.sqrt(weights @ covariance(returns) @ weights * periods))
+
+
+def beta(portfolio, benchmark):
+    portfolio = portfolio - portfolio.mean()
+    benchmark = benchmark - benchmark.mean()
+    variance = benchmark @ benchmark
+    return float(portfolio @ benchmark / variance) if variance else float("nan")
+
+
+def historical_var(portfolio, level=DEFAULT_LEVEL):
+    return float(-np.quantile(portfolio, 1 - level))
+
+
+def parametric_var(portfolio, level=DEFAULT_LEVEL):
+    z = NormalDist().inv_cdf(1 - level)
+    return float(-(portfolio.mean() + z * portfolio.std(ddof=1)))
+
+
+def max_drawdown(portfolio):
+    wealth = np.cumprod(1 + portfolio)
+    peaks = np.maximum.accumulate(np.concatenate([[1.0], wealth]))[1:]
+    return float((wealth / peaks - 1).min()) if len(wealth) else 0.0
+
+
+def correlation_clusters(returns, threshold=CLUSTER_THRESHOLD):
+    """مجموعات الرموز المترابطة (ارتباط >= threshold مباشرة أو عبر سلسلة).
+
+    المكونات المتصلة بإغلاق متعدٍّ للمصفوفة المنطقية بالتربيع المتكرر (log2(n) ضربة مصفوفة).
+    رقم المجموعة هو فهرس أول رمز فيها.
+    """
+    std = returns.std(axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        normalized = (returns - returns.mean(axis=0)) / std
+    normalized = np.nan_to_num(normalized)
+    corr = normalized.T @ normalized / (len(returns) - 1)
+    reach = (corr >= threshold) | np.eye(len(corr), dtype=bool)
+    while True:
+        closed = (reach.astype(np.float32) @ reach.astype(np.float32)) > 0
+        if np.array_equal(closed, reach):
+            break
+        reach = closed
+    return reach.argmax(axis=1)
+
+
+def portfolio_risk(prices, weights, benchmark=None, level=DEFAULT_LEVEL, threshold=CLUSTER_THRESHOLD):
+    """prices: أسعار عريضة (الأيام × الرموز). weights: سلسلة أوزان مفهرسة بالرمز.
+
+    benchmark: سلسلة أسعار المؤشر (TASI) بنفس التواريخ تقريباً؛ بدونها beta = NaN.
+    """
+    symbols = [s for s in weights.index if s in prices.columns]
+    prices = prices[symbols]
+    returns = returns_matrix(prices)
+    matrix = returns.to_numpy()
+    w = weights.reindex(symbols).to_numpy(dtype="float64")
+    coverage = float(w.sum() / weights.sum())
+    w = w / w.sum()
+    portfolio = matrix @ w
+
+    bench_beta = float("nan")
+    if benchmark is not None:
+        bench = returns_matrix(benchmark.reindex(prices.index).to_frame()).to_numpy()[:, 0]
+        bench_beta = beta(portfolio, bench)
+
+    labels = correlation_clusters(matrix, threshold)
+    clusters = pd.Series(labels, index=symbols, name="cluster")
+    cluster_weights = pd.Series(np.bincount(labels, weights=w, minlength=len(symbols)), name="weight")
+    cluster_weights = cluster_weights[cluster_weights > 0].sort_values(ascending=False)
+    return RiskReport(
+        volatility=volatility(matrix, w),
+        beta=bench_beta,
+        var_historical=historical_var(portfolio, level),
+        var_parametric=parametric_var(portfolio, level),
+        max_drawdown=max_drawdown(portfolio),
+        clusters=clusters,
+        cluster_weights=cluster_weights,
+        days=len(matrix),
+        coverage=coverage,
+    )
+
+
+@profiling.timed("risk")
+def holdings_risk(holdings, store=None, symbol="symbol", value="current_value", years=3, end=None):
+    """مخاطر المحفظة من مخزن الأسعار المحلي؛ None إذا لم يكن التاريخ كافياً.
+
+    الرموز بلا تاريخ محلي تُستبعد ونسبة القيمة المغطاة في coverage.
+    """
+    store = store or default_store()
+    weights = holding_weights(holdings, symbol, value)
+    if weights.empty:
+        return None
+    end = pd.Timestamp(end) if end is not None else pd.Timestamp.today().normalize()
+    start = end - pd.DateOffset(years=years)
+    prices = store.matrix(weights.index, start, end).dropna(axis=1, how="all")
+    if len(prices) < MIN_HISTORY or prices.empty:
+        return None
+    benchmark = store.load(TASI_SYMBOL, start, end)["adj_close"]
+    return portfolio_risk(prices, weights, benchmark if not benchmark.empty else None)
+
+
+def risk_alerts(report):
+    """تنبيهات نصية للصفحات حسب حدود ALERT_*."""
+    alerts = []
+    if report.volatility >= ALERT_VOLATILITY:
+        alerts.append(f"⚠️ تقلب سنوي مرتفع: {report.volatility:.0%}")
+    if report.beta == report.beta and report.beta >= ALERT_BETA:
+        alerts.append(f"⚠️ المحفظة أكثر حساسية من السوق (Beta = {report.beta:.2f})")
+    if report.var_historical >= ALERT_VAR:
+        alerts.append(f"⚠️ خسارة يومية محتملة {report.var_historical:.1%} عند ثقة 95% (VaR)")
+    if report.max_drawdown <= ALERT_DRAWDOWN:
+        alerts.append(f"⚠️ أقصى تراجع تاريخي {report.max_drawdown:.0%}")
+    if not report.cluster_weights.empty and report.cluster_weights.iloc[0] >= ALERT_CLUSTER_WEIGHT:
+        members = report.clusters[report.clusters == report.cluster_weights.index[0]].index
+        if len(members) > 1:
+            alerts.append(f"⚠️ {report.cluster_weights.iloc[0]:.0%} من المحفظة في أسهم شديدة الترابط: {', '.join(members)}")
+    return alerts
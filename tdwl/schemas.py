@@ -0,0 +1,84 @@
+"""مخططات ملفات التصدير المعروفة: أسماء الأعمدة وأنواعها."""
+from dataclasses import dataclass, field
+
+# المخطط الموحد الذي تتحول إليه كل الصيغ
+CANONICAL_TEXT = ("symbol", "name")
+CANONICAL_NUMERIC = ("shares", "buy_price", "market_price", "cost", "value", "pnl", "return_pct")
+CANONICAL_COLUMNS = CANONICAL_TEXT + CANONICAL_NUMERIC
+
+
+@dataclass(frozen=True)
+class ExportLayout:
+    name: str
+    text_columns: tuple
+    numeric_columns: tuple
+    encoding: str = "utf-8-sig"
+    # اسم العمود في الملف -> اسمه في المخطط الموحد
+    canonical: dict = field(default_factory=dict)
+
+    @property
+    def columns(self):
+        return self.text_columns + self.numeric_columns
+
+    @property
+    def required(self):
+        return set(self.columns)
+
+    def dtypes(self, header=None):
+        # الرموز تُقرأ نصاً حتى لا تتحول إلى أرقام؛ الأعمدة الرقمية تُترك للمحرك أو للتنظيف
+        columns = self.text_columns if header is None else [c for c in self.text_columns if c in header]
+        return {col: "string" for col in columns}
+
+    def missing(self, header):
+        return self.required - set(header)
+
+
+# ملف الرموز البسيط مثل portfolio_sample.csv
+SIMPLE = ExportLayout(
+    name="simple",
+    text_columns=("symbol",),
+    numeric_columns=("shares", "buy_price"),
+    canonical={"symbol": "symbol", "shares": "shares", "buy_price": "buy_price"},
+)
+
+# تصدير الوسيط بالعناوين العربية (الراجحي / الرياض)
+ARABIC_BROKER = ExportLayout(
+    name="arabic_broker",
+    text_columns=("الرمز", "الشركة"),
+    numeric_columns=(
+        "المحفظة", "مرهون", "متوسط التكلفة", "بيع تحت التسوية", "شراء تحت التسوية",
+        "سعر السوق", "إجمالي التكلفة", "القيمة السوقية", "الربح/الخسارة", "العائد", "سعر الإغلاق",
+    ),
+    canonical={
+        "الرمز": "symbol", "الشركة": "name", "المحفظة": "shares", "متوسط التكلفة": "buy_price",
+        "سعر السوق": "market_price", "إجمالي التكلفة": "cost", "القيمة السوقية": "value",
+        "الربح/الخسارة": "pnl", "العائد": "return_pct",
+    },
+)
+
+# تصدير الوسيط بالعناوين الإنجليزية
+ENGLISH_BROKER = ExportLayout(
+    name="english_broker",
+    text_columns=("Code", "Stock"),
+    numeric_columns=(
+        "Holding", "Pledge", "Average cost", "Unsettled sell", "Unsettled buy",
+        "Market Price", "Total Cost", "Current Value", "Gain/Loss", "Return", "Closing Price",
+    ),
+    canonical={
+        "Code": "symbol", "Stock": "name", "Holding": "shares", "Average cost": "buy_price",
+        "Market Price": "market_price", "Total Cost": "cost", "Current Value": "value",
+        "Gain/Loss": "pnl", "Return": "return_pct",
+    },
+)
+
+# الأكثر أعمدة أولاً حتى يفوز المخطط الأدق عند التطابق
+LAYOUTS = (ARABIC_BROKER, ENGLISH_BROKER, SIMPLE)
+
+
+def detect_layout(header):
+    """يتعرف على صيغة الملف من صف العناوين فقط؛ يرفع ValueError إن لم تطابق أي صيغة."""
+    for layout in LAYOUTS:
+        if not layout.missing(header):
+            return layout
+    closest = min(LAYOUTS, key=lambda layout: len(layout.missing(header)) / len(layout.required))
+    raise ValueError(f"❌ الملف ينقصه الأعمدة التالية: {', '.join(sorted(closest.missing(header)))}")
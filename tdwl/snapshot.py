@@ -0,0 +1,170 @@
+"""لقطة أسعار مشتركة على مستوى العملية مع دمج الطلبات المتزامنة لنفس الرمز."""
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from types import MappingProxyType
+
+from tdwl import profiling
+
+DEFAULT_INTERVAL = 60
+
+
+class SingleFlight:
+    """طلب واحد جارٍ لكل مفتاح؛ من يطلب المفتاح نفسه أثناء التنفيذ ينتظر النتيجة ذاتها."""
+
+    def __init__(self):
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.stats = {"calls": 0, "shared": 0}
+
+    def _claim(self, keys):
+        owned, futures = [], {}
+        with self._lock:
+            for key in keys:
+                future = self._inflight.get(key)
+                if future is None:
+                    future = self._inflight[key] = Future()
+                    owned.append(key)
+                else:
+                    self.stats["shared"] += 1
+                futures[key] = future
+        return owned, futures
+
+    def _release(self, keys, values=None, error=None):
+        with self._lock:
+            futures = [self._inflight.pop(key) for key in keys]
+        for key, future in zip(keys, futures):
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(values.get(key))
+
+    def do(self, key, func):
+        return self.do_many([key], lambda keys: {key: func()})[key]
+
+    def do_many(self, keys, fetch_many):
+        """fetch_many تُستدعى مرة واحدة بالمفاتيح غير الجارية فقط وتعيد قاموساً.
+
+        المفتاح الغائب من ناتجها يعود None. خطأ fetch_many يُرفع للمالك ولكل من ينتظره.
+        """
+        owned, futures = self._claim(keys)
+        if owned:
+            self.stats["calls"] += 1
+            try:
+                values = fetch_many(owned)
+            except BaseException as exc:
+                self._release(owned, error=exc)
+                raise
+            self._release(owned, values or {})
+        return {key: future.result() for key, future in futures.items()}
+
+
+@dataclass(frozen=True)
+class PriceSnapshot:
+    epoch: int
+    taken_at: float
+    prices: MappingProxyType = field(default_factory=lambda: MappingProxyType({}))
+    # رموز طُلبت في هذه الفترة ولم يُعثر لها على سعر (لا يُعاد طلبها حتى الفترة التالية)
+    unavailable: frozenset = frozenset()
+
+
+class PriceSnapshotService:
+    """واجهة مصدر بيانات (download_prices / fetch_info) تتشاركها كل الجلسات.
+
+    كل فترة interval تبدأ لقطة جديدة غير قابلة للتعديل؛ الرموز التي تُطلب لأول مرة خلال
+    الفترة تُضاف بنسخ اللقطة ونشر نسخة جديدة، فلا يرى القارئ لقطة نصف محدثة.
+    """
+
+    def __init__(self, backend, interval=DEFAULT_INTERVAL, clock=time.time):
+        self.backend = backend
+        self.interval = interval
+        self.clock = clock
+        self._prices = SingleFlight()
+        self._info = SingleFlight()
+        self._lock = threading.Lock()
+        self._snapshot = PriceSnapshot(epoch=-1, taken_at=0.0)
+        self.stats = {"hits": 0, "fetched": 0}
+
+    def _epoch(self):
+        return int(self.clock() // self.interval)
+
+    def snapshot(self):
+        """اللقطة الحالية (فارغة إذا انقضت فترتها)."""
+        epoch = self._epoch()
+        snapshot = self._snapshot
+        if snapshot.epoch != epoch:
+            with self._lock:
+                if self._snapshot.epoch != epoch:
+                    self._snapshot = PriceSnapshot(epoch=epoch, taken_at=self.clock())
+                snapshot = self._snapshot
+        return snapshot
+
+    def _publish(self, epoch, requested, fetched):
+        with self._lock:
+            base = self._snapshot
+            if base.epoch != epoch:
+                # بدأت فترة جديدة أثناء الجلب؛ النتيجة صالحة لكنها لا تُدمج في لقطة أحدث
+                return
+            self._snapshot = PriceSnapshot(
+                epoch=epoch,
+                taken_at=self.clock(),
+                prices=MappingProxyType({**base.prices, **fetched}),
+                unavailable=base.unavailable | (frozenset(requested) - fetched.keys()),
+            )
+
+    def download_prices(self, symbols):
+        snapshot = self.snapshot()
+        found = {s: snapshot.prices[s] for s in symbols if s in snapshot.prices}
+        missing = [s for s in symbols if s not in found and s not in snapshot.unavailable]
+        self.stats["hits"] += len(found)
+        profiling.count("snapshot.hits", len(found))
+        if not missing:
+            return found
+
+        def fetch(owned):
+            # قد يكون طلب آخر نشر هذه الرموز بين قراءة اللقطة وحجزها
+            latest = self.snapshot()
+            ready = {s: latest.prices[s] for s in owned if s in latest.prices}
+            todo = [s for s in owned if s not in ready and s not in latest.unavailable]
+            if not todo:
+                return ready
+            fetched = self.backend.download_prices(todo)
+            self.stats["fetched"] += len(todo)
+            profiling.count("network.price_requests")
+            self._publish(latest.epoch, todo, fetched)
+            return {**ready, **fetched}
+
+        prices = self._prices.do_many(missing, fetch)
+        found.update({s: price for s, price in prices.items() if price is not None})
+        return found
+
+    def fetch_info(self, symbol):
+        return self._info.do(symbol, lambda: self.backend.fetch_info(symbol))
+
+    @property
+    def failures(self):
+        return getattr(self.backend, "failures", None)
+
+
+_default_service = None
+_default_lock = threading.Lock()
+
+
+def default_snapshot_service(backend=None):
+    global _default_service
+    with _default_lock:
+        if _default_service is None:
+            if backend is None:
+                from tdwl.ingest import has_module
+
+                if has_module("aiohttp"):
+                    from tdwl.market_client import AsyncYahooBackend
+
+                    backend = AsyncYahooBackend()
+                else:
+                    from tdwl.quotes import YahooBackend
+
+                    backend = YahooBackend()
+            _default_service = PriceSnapshotService(backend)
+        return _default_service
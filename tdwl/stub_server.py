@@ -0,0 +1,155 @@
+"""خادم HTTP محلي يحاكي نقطة chart في Yahoo لتجربة عميل الأسعار دون شبكة.
+
+python -m tdwl.stub_server --port 8765 --symbols 400
+TDWL_QUOTES_URL=http://127.0.0.1:8765 streamlit run app.py
+"""
+import argparse
+import json
+import threading
+import time
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlparse
+
+
+def chart_payload(symbol, price):
+    return {"chart": {"result": [{
+        "meta": {"symbol": symbol, "currency": "SAR", "regularMarketPrice": price},
+        "indicators": {"quote": [{"close": [price]}]},
+    }], "error": None}}
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # العميل يفتح مجمع اتصالاته دفعة واحدة؛ طابور listen الافتراضي (5) يُسقط SYN فينتظر الاتصال ثانية كاملة
+    request_queue_size = 128
+
+
+class StubQuoteServer:
+    """prices: رمز ← سعر. flaky: رمز ← عدد الردود 503 قبل النجاح. slow: ثوانٍ تأخير لكل طلب.
+
+    rate_limit (طلب/ث) يرد 429 مع Retry-After عند تجاوزه، كما يفعل Yahoo.
+    connections يعد اتصالات TCP المقبولة لقياس إعادة استخدام العميل لاتصالاته.
+    """
+
+    def __init__(self, prices, flaky=None, slow=0.0, rate_limit=None, host="127.0.0.1", port=0):
+        self.prices = dict(prices)
+        self.flaky = dict(flaky or {})
+        self.slow = slow
+        self.rate_limit = rate_limit
+        self.hits = defaultdict(int)
+        self.throttled = 0
+        self.connections = 0
+        self._window = []
+        self._lock = threading.Lock()
+        self._server = _Server((host, port), self._handler())
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _throttle(self):
+        if self.rate_limit is None:
+            return False
+        now = time.monotonic()
+        with self._lock:
+            self._window = [t for t in self._window if now - t < 1.0]
+            if len(self._window) >= self.rate_limit:
+                self.throttled += 1
+                return True
+            self._window.append(now)
+        return False
+
+    def _respond(self, symbol):
+        with self._lock:
+            self.hits[symbol] += 1
+            if self.flaky.get(symbol, 0) > 0:
+                self.flaky[symbol] -= 1
+                return 503, None
+        if symbol not in self.prices:
+            return 404, {"chart": {"result": None, "error": {"code": "Not Found"}}}
+        return 200, chart_payload(symbol, self.prices[symbol])
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # إبقاء الاتصال مفتوحاً لاختبار إعادة استخدامه
+            # العناوين والجسم يُكتبان منفصلين: مع Nagle و delayed ACK ينتظر كل طلب ~40ms على الاتصال المفتوح
+            disable_nagle_algorithm = True
+
+            def setup(self):
+                super().setup()
+                with stub._lock:
+                    stub.connections += 1
+
+            def do_GET(self):
+                path = urlparse(self.path).path
+                prefix = "/v8/finance/chart/"
+                if stub.slow:
+                    time.sleep(stub.slow)
+                if not path.startswith(prefix):
+                    status, payload = 404, {}
+                elif stub._throttle():
+                    status, payload = 429, None
+                else:
+                    status, payload = stub._respond(unquote(path[len(prefix):]))
+                body = json.dumps(payload).encode("utf-8") if payload is not None else b""
+                self.send_response(status)
+                if status == 429:
+                    self.send_header("Retry-After", "1")
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def synthetic_prices(count, seed=0):
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    codes = rng.choice(np.arange(1010, 9999), size=count, replace=False)
+    return {f"{code}.SR": round(float(price), 2) for code, price in zip(codes, rng.uniform(5, 300, count))}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="خادم أسعار محلي يحاكي Yahoo chart")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--symbols", type=int, default=400)
+    parser.add_argument("--rate-limit", type=float, default=None)
+    args = parser.parse_args(argv)
+    prices = synthetic_prices(args.symbols)
+    # الرموز المعروفة في ملف العينة حتى تعمل الصفحات مباشرة
+    prices.update({"1120.SR": 80.5, "2010.SR": 72.3, "2222.SR": 27.4})
+    server = StubQuoteServer(prices, rate_limit=args.rate_limit, port=args.port)
+    print(f"🧪 {server.url} — {len(prices)} رمز")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+"""فهرس مرجعي محلي لرموز تداول: الرمز الرقمي ورمز Yahoo والاسمان والقطاع، يُحمّل مرة لكل عملية.
+
+القطاع يُعرف من الفهرس دون طلب شبكة لكل رمز، وملفات الوسطاء التي لا تحمل قطاعاً تحصل عليه من الرمز
+(أو من اسم الشركة بمطابقة تقريبية للأسماء العربية عند غياب الرمز). قطاعات Yahoo للرموز غير المدرجة
+تُحوّل إلى مجموعات تداول نفسها حتى لا ينقسم الرسم إلى "البنوك" و "Financial Services".
+"""
+import csv
+import difflib
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+
+from tdwl.memo import LRUDict
+
+DATA_FILE = Path(__file__).resolve().parent / "data" / "tadawul_symbols.csv"
+DEFAULT_SECTOR = "غير معروف"
+# التقريب لأخطاء الكتابة فقط؛ حد أدنى يطابق "الاتصالات السعودية" مع "الكابلات السعودية"
+NAME_CUTOFF = 0.85
+
+_DIACRITICS = re.compile("[ؐ-ًؚ-ٰٟـ]")
+_LETTERS = str.maketrans({"أ": "ا", "إ": "ا", "آ": "ا", "ٱ": "ا", "ى": "ي", "ئ": "ي", "ؤ": "و", "ة": "ه"})
+_PUNCTUATION = re.compile(r"[^\w\s]")
+_VERSION = re.compile(r"version=(\S+)")
+_MISSING = object()
+# صناعة Yahoo (بادئة "Banks—Regional" أو "Banks - Regional") ← مجموعة تداول؛ تُقدَّم على القطاع
+# لأن قطاع Yahoo الواحد يجمع عدة مجموعات (Financial Services: البنوك والتأمين والخدمات المالية)
+YAHOO_INDUSTRIES = (
+    ("Banks", "البنوك"), ("Insurance", "التأمين"), ("REIT", "الصناديق العقارية المتداولة"),
+    ("Real Estate", "إدارة وتطوير العقارات"), ("Capital Markets", "الخدمات المالية"),
+    ("Credit Services", "الخدمات المالية"), ("Asset Management", "الخدمات المالية"),
+    ("Drug Manufacturers", "الأدوية"), ("Biotechnology", "الأدوية"), ("Medical", "الرعاية الصحية"),
+    ("Health", "الرعاية الصحية"), ("Telecom", "الاتصالات"), ("Grocery", "تجزئة الأغذية"),
+    ("Food Distribution", "تجزئة الأغذية"), ("Farm Products", "إنتاج الأغذية"),
+    ("Packaged Foods", "إنتاج الأغذية"), ("Beverages", "إنتاج الأغذية"), ("Airlines", "النقل"),
+    ("Airports", "النقل"), ("Marine Shipping", "النقل"), ("Railroads", "النقل"), ("Trucking", "النقل"),
+    ("Integrated Freight", "النقل"), ("Software", "التطبيقات وخدمات التقنية"),
+    ("Information Technology", "التطبيقات وخدمات التقنية"),
+)
+# قطاعات Yahoo التي تقابل مجموعة واحدة؛ الباقي (Industrials, Consumer Cyclical...) غير معروف
+YAHOO_SECTORS = {
+    "Basic Materials": "المواد الأساسية", "Energy": "الطاقة", "Utilities": "المرافق العامة",
+    "Communication Services": "الاتصالات", "Technology": "التطبيقات وخدمات التقنية",
+}
+# كلمات لا تميز شركة عن أخرى في أسماء ملفات الوسطاء
+STOP_WORDS = frozenset({"شركه", "مجموعه", "قابضه", "al", "co", "company", "group", "holding"})
+
+
+@dataclass(frozen=True)
+class Company:
+    code: str
+    name_ar: str
+    name_en: str
+    sector: str
+    sector_en: str
+    # أسماء بديلة أو سابقة (ساب، الأهلي التجاري...) مفصولة بـ |
+    aliases: str = ""
+
+    @property
+    def ticker(self):
+        return f"{self.code}.SR"
+
+    @property
+    def names(self):
+        return (self.name_ar, self.name_en, *filter(None, self.aliases.split("|")))
+
+
+def normalize_code(symbol):
+    """1120 و "1120" و "1120.SR" و 1120.0 (من Excel) كلها "1120"؛ غير ذلك None."""
+    text = str(symbol).strip().upper()
+    if text.endswith(".SR"):
+        text = text[:-3]
+    if text.endswith(".0"):
+        text = text[:-2]
+    return text if text.isdigit() else None
+
+
+def normalize_name(name):
+    """توحيد الهمزات والياء والتاء المربوطة وحذف التشكيل والتطويل وأل التعريف والكلمات العامة."""
+    text = _DIACRITICS.sub("", str(name)).translate(_LETTERS).lower()
+    words = []
+    for word in _PUNCTUATION.sub(" ", text).split():
+        if word.startswith("ال") and len(word) > 3:
+            word = word[2:]
+        if word not in STOP_WORDS:
+            words.append(word)
+    return " ".join(words)
+
+
+class SymbolIndex:
+    """بحث بالرمز والاسم في قواميس؛ المطابقة بالكلمات ثم التقريبية (difflib) فقط عند فشل المطابقة التامة."""
+
+    def __init__(self, companies, version=None):
+        self.version = version
+        self._by_code = {company.code: company for company in companies}
+        self.sector_names = frozenset(company.sector for company in self._by_code.values())
+        self._by_name = {}
+        for company in self._by_code.values():
+            for name in company.names:
+                key = normalize_name(name)
+                if key:
+                    self._by_name.setdefault(key, company)
+        self._names = list(self._by_name)
+        self._words = [(frozenset(name.split()), company) for name, company in self._by_name.items()]
+        # نتائج by_name السابقة: نفس الأسماء تتكرر في كل ملف من نفس الوسيط
+        self._matches = LRUDict(maxsize=4096)
+
+    @classmethod
+    def load(cls, path=DATA_FILE):
+        with open(path, encoding="utf-8") as source:
+            lines = source.read().splitlines()
+        version = next((match.group(1) for line in lines if line.startswith("#")
+                        for match in [_VERSION.search(line)] if match), None)
+        rows = csv.DictReader(line for line in lines if line and not line.startswith("#"))
+        return cls([Company(**row) for row in rows], version=version)
+
+    def __len__(self):
+        return len(self._by_code)
+
+    def __contains__(self, symbol):
+        return self.get(symbol) is not None
+
+    def __iter__(self):
+        return iter(self._by_code.values())
+
+    def get(self, symbol):
+        code = normalize_code(symbol)
+        return self._by_code.get(code) if code is not None else None
+
+    def _by_words(self, words):
+        """مطابقة بالكلمات: أطول اسم محتوى في النص ("مصرف الراجحي" ← الراجحي)، وإلا اسم وحيد
+        يحتوي النص ("ارامكو" ← ارامكو السعودية). التعادل بين شركتين لا يُحسم بالتخمين."""
+        contained = {}
+        for name, company in self._words:
+            if name <= words:
+                contained.setdefault(len(name), set()).add(company)
+        if contained:
+            best = contained[max(contained)]
+            return next(iter(best)) if len(best) == 1 else None
+        containing = {company for name, company in self._words if words < name}
+        return containing.pop() if len(containing) == 1 else None
+
+    def by_name(self, name, cutoff=NAME_CUTOFF):
+        """الشركة بالاسم العربي أو الإنجليزي مع تحمّل اختلاف الكتابة (الأهلى/الاهلي، بنك/مصرف ...).
+
+        الاسم الملتبس (Al Rajhi: المصرف أم الريت؟) يعيد None؛ قطاع غير معروف أفضل من قطاع خاطئ.
+        """
+        key = normalize_name(name)
+        if not key or key.replace(" ", "").isdigit():
+            # بلا حروف ("شركة 4339"): لا شيء يُطابق
+            return None
+        company = self._by_name.get(key)
+        if company is not None:
+            return company
+        company = self._matches.get((key, cutoff), _MISSING)
+        if company is _MISSING:
+            company = self._by_words(frozenset(key.split()))
+            if company is None:
+                match = difflib.get_close_matches(key, self._names, n=1, cutoff=cutoff)
+                company = self._by_name[match[0]] if match else None
+            self._matches.put((key, cutoff), company)
+        return company
+
+    def search(self, query, limit=5, cutoff=0.5):
+        """أقرب الشركات لنص حر: رمز مطابق أولاً ثم الأسماء بترتيب التشابه."""
+        company = self.get(query)
+        if company is not None:
+            return [company]
+        matches = difflib.get_close_matches(normalize_name(query), self._names, n=limit * 2, cutoff=cutoff)
+        found = []
+        for name in matches:
+            company = self._by_name[name]
+            if company not in found:
+                found.append(company)
+        return found[:limit]
+
+    def yahoo_sector(self, info, default=DEFAULT_SECTOR):
+        """مجموعة تداول لبيانات info من Yahoo: بالصناعة ثم بالقطاع؛ قطاع غير معروف أفضل من خاطئ."""
+        sector = info.get("sector")
+        if sector in self.sector_names:
+            return sector
+        industry = info.get("industry") or ""
+        for prefix, group in YAHOO_INDUSTRIES:
+            if industry.startswith(prefix):
+                return group
+        return YAHOO_SECTORS.get(sector, default)
+
+    def coverage(self, sectors):
+        """سطر للصفحات: حجم الفهرس وإصداره ونسبة القيمة في رموز غير مدرجة فيه (sectors من group_values)."""
+        note = f"ℹ️ القطاعات من فهرس رموز تاسي المضمّن ({len(self)} شركة، إصدار {self.version}) ولا يشمل كل الشركات المدرجة"
+        unknown = sectors.get(DEFAULT_SECTOR, 0) / sectors.sum() if len(sectors) else 0
+        if unknown:
+            note += f"؛ {unknown:.1%} من القيمة في رموز غير مدرجة فيه تظهر «{DEFAULT_SECTOR}»"
+        return note
+
+    def sector(self, symbol, default=DEFAULT_SECTOR):
+        company = self.get(symbol)
+        return company.sector if company is not None else default
+
+    def sectors(self, symbols):
+        """قاموس رمز ← قطاع للرموز المعروفة فقط؛ الرموز الأخرى تبقى لمصدر البيانات."""
+        found = {}
+        for symbol in symbols:
+            company = self.get(symbol)
+            if company is not None:
+                found[symbol] = company.sector
+        return found
+
+    def sector_column(self, symbols, names=None, default=DEFAULT_SECTOR):
+        """عمود قطاع بطول الإطار: بالرمز، ثم بالاسم عند تمرير names، وإلا default."""
+        import pandas as pd
+
+        symbols = pd.Series(symbols)
+        unique = pd.unique(symbols.astype(str))
+        lookup = {symbol: self.sector(symbol, None) for symbol in unique}
+        sectors = symbols.astype(str).map(lookup)
+        if names is not None and sectors.isna().any():
+            names = pd.Series(names, index=symbols.index)
+            missing = names[sectors.isna()].astype(str)
+            by_name = {name: getattr(self.by_name(name), "sector", None) for name in pd.unique(missing)}
+            sectors = sectors.fillna(missing.map(by_name))
+        return sectors.fillna(default)
+
+
+@lru_cache(maxsize=None)
+def symbol_index():
+    """الفهرس المضمّن مع الحزمة؛ يُقرأ مرة واحدة لكل عملية خادم."""
+    return SymbolIndex.load()
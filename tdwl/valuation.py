@@ -0,0 +1,94 @@
+"""محرك تقييم المحفظة: دوال متجهة بلا حالة يتشاركها كل الصفحات."""
+import time
+from dataclasses import dataclass
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from tdwl import profiling
+from tdwl.ingest import read_canonical
+from tdwl.memo import LRUDict, content_hash
+from tdwl.quotes import attach_quotes, fetch_quotes
+
+# أسماء أعمدة الإجماليات في ملفات الوسطاء
+SIMPLE_COLUMNS = {"cost": "initial_value", "value": "current_value", "pnl": "pnl"}
+ARABIC_COLUMNS = {"cost": "إجمالي التكلفة", "value": "القيمة السوقية", "pnl": "الربح/الخسارة"}
+ENGLISH_COLUMNS = {"cost": "Total Cost", "value": "Current Value", "pnl": "Gain/Loss"}
+
+# مدة صلاحية التقييم المحفوظ قبل إعادة جلب الأسعار
+DEFAULT_MAX_AGE = 15 * 60
+
+
+class Totals(NamedTuple):
+    cost: float
+    value: float
+    pnl: float
+    pnl_percent: float
+
+
+@dataclass(frozen=True)
+class Valuation:
+    holdings: pd.DataFrame
+    totals: Totals
+    sectors: pd.Series
+
+
+def value_holdings(df, shares="shares", buy_price="buy_price", price="current_price"):
+    """يضيف initial_value و current_value و pnl و pnl_percent في عمليات عمودية."""
+    qty = df[shares].to_numpy(dtype="float64")
+    initial = qty * df[buy_price].to_numpy(dtype="float64")
+    current = qty * df[price].to_numpy(dtype="float64")
+    pnl = current - initial
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pnl_percent = np.where(initial != 0, pnl / initial * 100, np.nan)
+    return df.assign(initial_value=initial, current_value=current, pnl=pnl, pnl_percent=pnl_percent)
+
+
+@profiling.timed("pnl")
+def portfolio_totals(df, cost="initial_value", value="current_value", pnl="pnl"):
+    total_cost = float(df[cost].sum())
+    total_value = float(df[value].sum())
+    total_pnl = float(df[pnl].sum())
+    pnl_percent = (total_pnl / total_cost) * 100 if total_cost else 0
+    return Totals(total_cost, total_value, total_pnl, pnl_percent)
+
+
+def group_values(df, by="sector", value="current_value"):
+    """مجموع القيمة لكل مجموعة بعد حذف القيم الفارغة وغير الموجبة (جاهز للرسم)."""
+    summary = df.groupby(by, sort=False)[value].sum(min_count=1).dropna()
+    return summary[summary > 0]
+
+
+def movers(df, column="pnl_percent", threshold=10):
+    column_values = df[column]
+    return df[column_values >= threshold], df[column_values <= -threshold]
+
+
+@profiling.timed("pnl")
+def value_portfolio(df, quotes):
+    holdings = value_holdings(attach_quotes(df.copy(), quotes))
+    sectors = group_values(holdings) if "sector" in holdings else pd.Series(dtype="float64")
+    return Valuation(holdings, portfolio_totals(holdings), sectors)
+
+
+_valuations = LRUDict(maxsize=64)
+
+
+def valuate_upload(data, name, with_sector=True, cache=None, backend=None, max_age=DEFAULT_MAX_AGE):
+    """يقيّم الملف المرفوع مرة واحدة ويعيد النتيجة نفسها لكل إعادة تشغيل بنفس المحتوى.
+
+    يرفع ValueError إذا لم تطابق عناوين الملف أي صيغة معروفة.
+    """
+    key = (content_hash(data), with_sector)
+    hit = _valuations.get(key)
+    if hit is not None and time.time() - hit[1] <= max_age:
+        profiling.count("cache.valuation_hits")
+        return hit[0]
+
+    # أي صيغة معروفة (بسيطة أو تصدير وسيط عربي/إنجليزي) تمر بنفس المسار
+    df = read_canonical((data, name))
+    quotes = fetch_quotes(df["symbol"], backend=backend, with_sector=with_sector, cache=cache)
+    valuation = value_portfolio(df, quotes)
+    _valuations.put(key, (valuation, time.time()))
+    return valuation
@@ -0,0 +1,64 @@
+"""تحميل مسبق للوحدات الثقيلة مرة واحدة لكل عملية خادم.
+
+الصفحات تستورد هذه الوحدة فقط في أعلاها وتستدعي warm()؛ الاستيراد يجري في خيط خلفي
+فتظهر الصفحة فوراً، وحين يرفع المستخدم ملفاً تكون pandas و fpdf و yfinance جاهزة في sys.modules.
+"""
+import importlib
+import threading
+import time
+
+# بترتيب الحاجة: التقييم أولاً ثم التقرير ثم الشبكة
+MODULES = (
+    "pandas",
+    "pyarrow",
+    "tdwl.ingest",
+    "tdwl.valuation",
+    "tdwl.cache",
+    "tdwl.charts",
+    "tdwl.symbols",
+    "tdwl.holdings",
+    "tdwl.render_queue",
+    "tdwl.report",
+    "fpdf",
+    "arabic_reshaper",
+    "bidi.algorithm",
+    "yfinance",
+    "tdwl.risk",
+)
+
+_thread = None
+_lock = threading.Lock()
+timings = {}
+
+
+def _load(modules):
+    for name in modules:
+        start = time.perf_counter()
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            # اعتماد اختياري غير مثبت: الصفحة التي تحتاجه تعرض خطأها بنفسها
+            continue
+        timings[name] = time.perf_counter() - start
+    from tdwl.report import font_files
+    from tdwl.symbols import symbol_index
+
+    font_files()
+    symbol_index()
+
+
+def warm(modules=MODULES):
+    """يبدأ التحميل الخلفي في أول استدعاء فقط ويعيد الخيط؛ الاستدعاءات التالية لا تكلف شيئاً."""
+    global _thread
+    with _lock:
+        if _thread is None:
+            _thread = threading.Thread(target=_load, args=(tuple(modules),), name="tdwl-warm", daemon=True)
+            _thread.start()
+        return _thread
+
+
+def wait(timeout=None):
+    """ينتظر انتهاء التحميل (للقياس والسكربتات)؛ True إذا اكتمل."""
+    thread = warm()
+    thread.join(timeout)
+    return not thread.is_alive()
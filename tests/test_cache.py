@@ -0,0 +1,50 @@
+import threading
+
+from tdwl.cache import PRICE, SECTOR, QuoteCache
+
+
+def test_memory_disk_and_miss(tmp_path):
+    cache = QuoteCache(tmp_path / "quotes.sqlite3")
+    cache.put_many(PRICE, {"1120.SR": 90.0})
+    assert cache.get_many(PRICE, ["1120.SR", "2222.SR"]) == {"1120.SR": 90.0}
+    reopened = QuoteCache(tmp_path / "quotes.sqlite3")
+    assert reopened.get(PRICE, "1120.SR") == 90.0
+    assert reopened.get(PRICE, "1120.SR") == 90.0
+    assert (reopened.stats["disk_hits"], reopened.stats["memory_hits"]) == (1, 1)
+    assert cache.stats["misses"] == 1 and cache.hit_ratio() == 0.5
+
+
+def test_expired_entries_miss(tmp_path):
+    cache = QuoteCache(tmp_path / "quotes.sqlite3", ttls={PRICE: -1})
+    cache.put(PRICE, "1120.SR", 90.0)
+    assert cache.get(PRICE, "1120.SR") is None
+
+
+def test_unknown_kinds_dropped_on_open(tmp_path):
+    """قيم القطاع الإنجليزية قبل توحيد القطاعات (النوع "sector") لا تُقرأ ولا تبقى."""
+    cache = QuoteCache(tmp_path / "quotes.sqlite3", ttls={"sector": 3600})
+    cache.put("sector", "9901.SR", "Financial Services")
+    reopened = QuoteCache(tmp_path / "quotes.sqlite3")
+    assert len(reopened) == 0
+    assert reopened.get_many(SECTOR, ["9901.SR"]) == {}
+
+
+def test_stats_under_concurrency(tmp_path):
+    cache = QuoteCache(tmp_path / "quotes.sqlite3", memory_entries=8)
+    symbols = [f"{code}.SR" for code in range(1000, 1040)]
+    cache.put_many(PRICE, {symbol: 1.0 for symbol in symbols[:20]})
+    sessions, rounds = 8, 200
+
+    def session():
+        for _ in range(rounds):
+            cache.get_many(PRICE, symbols)
+
+    threads = [threading.Thread(target=session) for _ in range(sessions)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    stats = cache.stats
+    assert stats["memory_hits"] + stats["disk_hits"] == sessions * rounds * 20
+    assert stats["misses"] == sessions * rounds * 20
+    assert cache.hit_ratio() == 0.5
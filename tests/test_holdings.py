@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from tdwl import ingest
+from tdwl.holdings import DISPLAY_FIELDS, CompactHoldings, compact_export
+from tdwl.ingest import read_export
+from tdwl.schemas import ARABIC_BROKER
+from tdwl.valuation import ARABIC_COLUMNS, portfolio_totals
+
+# قيمة الوسيط لا تساوي الكمية × السعر في الصف الأول (مرهون)، والثاني بلا سعر سوق
+BROKER_CSV = """الرمز,الشركة,المحفظة,مرهون,متوسط التكلفة,بيع تحت التسوية,شراء تحت التسوية,سعر السوق,إجمالي التكلفة,القيمة السوقية,الربح/الخسارة,العائد,سعر الإغلاق
+1120,مصرف الراجحي,100,5,80,0,0,90,"8,000","8,550",550,6.88,90
+2222,ارامكو السعودية,50,0,30,0,0,,"1,500","1,400",-100,-6.67,28
+7010,الاتصالات السعودية,10,0,40,0,0,46,400,460,60,15,46
+"""
+
+
+@pytest.fixture
+def payload():
+    return BROKER_CSV.encode("utf-8"), "broker.csv"
+
+
+@pytest.fixture
+def book(payload):
+    return CompactHoldings.from_export(read_export(payload, ARABIC_BROKER), ARABIC_BROKER)
+
+
+def test_totals_use_broker_amounts(payload, book):
+    expected = portfolio_totals(read_export(payload, ARABIC_BROKER), **ARABIC_COLUMNS)
+    assert book.totals() == expected
+    assert book.totals()[:3] == (9_900, 10_410, 510)
+
+
+def test_views_follow_broker_pnl(book):
+    assert book.winners().rows.tolist() == [0, 2]
+    assert book.losers().rows.tolist() == [1]
+    gainers, decliners = book.movers(10)
+    # 100 × 90 − 8000 = +12.5% لو اشتُق الربح؛ الملف يقول 6.88%
+    assert gainers.rows.tolist() == [2]
+    assert decliners.empty
+
+
+def test_display_frame_matches_file(payload, book):
+    raw = read_export(payload, ARABIC_BROKER)
+    table = book.frame(DISPLAY_FIELDS)
+    assert list(table.columns) == ["الرمز", "الشركة", "المحفظة", "متوسط التكلفة", "سعر السوق",
+                                   "إجمالي التكلفة", "القيمة السوقية", "الربح/الخسارة", "العائد"]
+    numeric = table.columns[2:]
+    np.testing.assert_array_equal(table[numeric].to_numpy(dtype="float64", na_value=np.nan),
+                                  raw[numeric].to_numpy(dtype="float64", na_value=np.nan))
+
+
+def test_amounts_derived_without_columns():
+    frame = pd.DataFrame({"symbol": ["1120.SR", "2222.SR"], "shares": [10, 4],
+                          "buy_price": [80.0, 30.0], "current_price": [90.0, 27.0]})
+    book = CompactHoldings.from_frame(frame)
+    np.testing.assert_allclose(book.column("value"), [900, 108])
+    np.testing.assert_allclose(book.column("pnl"), [100, -12])
+    np.testing.assert_allclose(book.column("pnl_percent"), [12.5, -10])
+
+
+def test_compact_export_keeps_only_the_book(payload):
+    ingest._frames.clear()
+    book = compact_export(payload, ARABIC_BROKER)
+    assert compact_export(payload, ARABIC_BROKER) is book
+    assert not ingest._frames
@@ -0,0 +1,85 @@
+"""عميل الأسعار مقابل خادم Yahoo المحلي: إعادة المحاولة، حد المعدل المشترك، وإعادة استخدام الاتصالات."""
+import threading
+import time
+
+import pytest
+
+from tdwl.market_client import RetryPolicy, close_clients, fetch_prices, shared_client
+from tdwl.stub_server import StubQuoteServer, synthetic_prices
+
+FAST_RETRY = RetryPolicy(base_delay=0.01, max_delay=2.0)
+
+
+@pytest.fixture(autouse=True)
+def clients():
+    # عميل مشترك لكل عنوان خادم؛ يُغلق حتى لا تبقى خيوط الحلقات بين الاختبارات
+    yield
+    close_clients()
+
+
+def test_retry():
+    """503 مؤقت يُعاد حتى النجاح، 503 دائم يفشل بعد attempts، و404 لا يُعاد."""
+    prices = synthetic_prices(20)
+    symbols = list(prices)
+    flaky = {symbols[0]: 2, symbols[1]: 10}
+    with StubQuoteServer(prices, flaky=flaky) as server:
+        report = fetch_prices(symbols + ["0000.SR"], base_url=server.url, rate=1000, burst=1000, retry=FAST_RETRY)
+        hits = dict(server.hits)
+    assert report.prices[symbols[0]] == prices[symbols[0]] and hits[symbols[0]] == 3
+    failure = report.failures[symbols[1]]
+    assert (failure.reason, failure.status, failure.attempts) == ("http", 503, FAST_RETRY.attempts)
+    assert hits[symbols[1]] == FAST_RETRY.attempts
+    assert report.failures["0000.SR"].reason == "not_found" and hits["0000.SR"] == 1
+    assert len(report.prices) == len(symbols) - 1
+    assert report.requests == sum(hits.values())
+
+
+def test_retry_after():
+    """429 من الخادم مع Retry-After: الرموز المرفوضة تنجح بعد الانتظار."""
+    prices = synthetic_prices(15)
+    with StubQuoteServer(prices, rate_limit=10) as server:
+        report = fetch_prices(list(prices), base_url=server.url, rate=1000, burst=1000, retry=FAST_RETRY)
+        throttled = server.throttled
+    assert throttled > 0
+    assert not report.failures and report.prices == prices
+    assert report.elapsed >= 0.9
+
+
+def test_shared_rate(sessions=3, symbols=20, rate=20, burst=4):
+    """جلسات متزامنة تتقاسم دلواً واحداً: مجموع طلباتها لا يتجاوز burst + rate في أي ثانية."""
+    prices = synthetic_prices(sessions * symbols)
+    names = list(prices)
+    reports = []
+    with StubQuoteServer(prices, rate_limit=burst + rate + 1) as server:
+        options = dict(base_url=server.url, rate=rate, burst=burst, retry=FAST_RETRY)
+
+        def session(i):
+            reports.append(fetch_prices(names[i * symbols:(i + 1) * symbols], **options))
+
+        start = time.perf_counter()
+        threads = [threading.Thread(target=session, args=(i,)) for i in range(sessions)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        throttled = server.throttled
+    assert throttled == 0, f"{throttled} × 429: الجلسات تجاوزت الحد معاً"
+    assert len(reports) == sessions and all(not report.failures for report in reports)
+    expected = (sessions * symbols - burst) / rate
+    assert elapsed >= expected * 0.9
+
+
+def test_connection_reuse(symbols=100, concurrency=8):
+    """الاتصالات محدودة بـ concurrency وتبقى مفتوحة بين استدعاءات العميل المشترك."""
+    prices = synthetic_prices(symbols)
+    with StubQuoteServer(prices) as server:
+        options = dict(base_url=server.url, rate=1000, burst=1000, concurrency=concurrency)
+        first = fetch_prices(list(prices), **options)
+        opened = server.connections
+        second = fetch_prices(list(prices), **options)
+        reopened = server.connections - opened
+        shared_client(**options).close()
+    assert not first.failures and not second.failures
+    assert opened <= concurrency
+    assert reopened == 0
@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from tdwl import montecarlo
+from tdwl.montecarlo import holdings_inputs, simulate, synthetic_inputs
+from tdwl.ohlcv import OHLCVStore, SyntheticHistoryBackend, update
+
+END = "2024-12-31"
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = OHLCVStore(tmp_path)
+    update(store, ["1120.SR", "2222.SR"], backend=SyntheticHistoryBackend(), start="2022-01-01", end=END)
+    return store
+
+
+def test_pool_reused_across_runs():
+    inputs = synthetic_inputs(5)
+    single = simulate(inputs, paths=4_000, batch=1_000, workers=1)
+    first = simulate(inputs, paths=4_000, batch=1_000, workers=2)
+    pool = montecarlo._pools[2]
+    second = simulate(inputs, paths=4_000, batch=1_000, workers=2)
+    assert montecarlo._pools[2] is pool
+    # نفس المسارات بأي عدد من العمليات
+    np.testing.assert_array_equal(first.terminal, single.terminal)
+    np.testing.assert_array_equal(second.terminal, single.terminal)
+    montecarlo.shutdown_pools()
+    assert not montecarlo._pools
+
+
+def test_inputs_coverage(store):
+    holdings = pd.DataFrame({"symbol": ["1120.SR", "2222.SR", "9999.SR", "1120.SR"],
+                             "current_value": [300.0, 400.0, 700.0, 300.0]})
+    inputs = holdings_inputs(holdings, store=store, end=END)
+    assert inputs.symbols == ("1120.SR", "2222.SR")
+    assert inputs.values.tolist() == [600.0, 400.0]
+    assert inputs.coverage == pytest.approx(1000 / 1700)
+
+
+def test_inputs_without_history(store):
+    holdings = pd.DataFrame({"symbol": ["9999.SR"], "current_value": [700.0]})
+    assert holdings_inputs(holdings, store=store, end=END) is None
@@ -0,0 +1,45 @@
+import json
+import threading
+
+import pytest
+
+from tdwl import profiling
+from tdwl.profiling import Profiler
+
+
+@pytest.fixture(autouse=True)
+def clean_recent():
+    profiling.recent.clear()
+    yield
+    profiling.recent.clear()
+
+
+def test_history_filters_page():
+    for name in ("a", "b", "a"):
+        Profiler(name).finish()
+    assert [record["page"] for record in profiling.history("a")] == ["a", "a"]
+    assert len(profiling.history()) == 3
+    lines = profiling.export(profiling.history("b")).splitlines()
+    assert [json.loads(line)["page"] for line in lines] == ["b"]
+
+
+def test_history_while_other_sessions_finish():
+    """جلسات أخرى تضيف سجلات بينما تُقرأ اللوحة: لا "deque mutated during iteration"."""
+    stop = threading.Event()
+
+    def session():
+        while not stop.is_set():
+            Profiler("other").finish()
+
+    threads = [threading.Thread(target=session) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    try:
+        for _ in range(200):
+            records = profiling.history("other")
+            profiling.latency_summary(records)
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+    assert profiling.history("other")
@@ -0,0 +1,89 @@
+import math
+
+import pandas as pd
+import pytest
+
+from tdwl.cache import PRICE, SECTOR, QuoteCache
+from tdwl.market_client import AsyncYahooBackend, RetryPolicy, close_clients
+from tdwl.quotes import StubBackend, attach_quotes, fetch_quotes, price_failures
+from tdwl.stub_server import StubQuoteServer
+from tdwl.symbols import DEFAULT_SECTOR, symbol_index
+
+LISTED = "1120.SR"  # مصرف الراجحي في فهرس الرموز
+CACHED = "9901.SR"
+FETCHED = "9902.SR"
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return QuoteCache(tmp_path / "quotes.sqlite3")
+
+
+def test_missing_prices_stay_nan():
+    backend = StubBackend({LISTED: 90.0})
+    quotes = fetch_quotes([LISTED, " 1120.SR", FETCHED, None], backend=backend, with_sector=False)
+    assert list(quotes.index) == [LISTED, FETCHED]
+    assert quotes.at[LISTED, "price"] == 90.0
+    assert math.isnan(quotes.at[FETCHED, "price"])
+    assert backend.price_calls == 1
+
+
+def test_attach_quotes_repeats_symbols():
+    backend = StubBackend({LISTED: 90.0}, {FETCHED: "Energy"})
+    quotes = fetch_quotes([LISTED, FETCHED], backend=backend)
+    df = attach_quotes(pd.DataFrame({"symbol": [LISTED, " 1120.SR ", FETCHED, "0000.SR"]}), quotes)
+    assert df["current_price"].iloc[:2].tolist() == [90.0, 90.0]
+    assert df["current_price"].iloc[2:].isna().all()
+    assert df["sector"].tolist() == ["البنوك", "البنوك", "الطاقة", DEFAULT_SECTOR]
+
+
+def test_prices_from_cache_skip_backend(cache):
+    backend = StubBackend({LISTED: 90.0, FETCHED: 12.5})
+    fetch_quotes([LISTED, FETCHED], backend=backend, with_sector=False, cache=cache)
+    backend.prices = {}
+    quotes = fetch_quotes([LISTED, FETCHED], backend=backend, with_sector=False, cache=cache)
+    assert backend.price_calls == 1
+    assert quotes["price"].tolist() == [90.0, 12.5]
+    assert cache.get_many(PRICE, [LISTED]) == {LISTED: 90.0}
+
+
+def test_sector_lookup_order(cache):
+    """الفهرس أولاً (يتقدم حتى على الذاكرة المؤقتة)، ثم الذاكرة المؤقتة، ثم المصدر للباقي فقط."""
+    cache.put_many(SECTOR, {LISTED: "التأمين", CACHED: "الاتصالات"})
+    backend = StubBackend({}, {LISTED: "Energy", CACHED: "Energy", FETCHED: "Utilities"})
+    quotes = fetch_quotes([LISTED, CACHED, FETCHED], backend=backend, cache=cache)
+    assert quotes["sector"].to_dict() == {LISTED: symbol_index().sector(LISTED), CACHED: "الاتصالات",
+                                          FETCHED: "المرافق العامة"}
+    assert backend.info_calls == 1
+    assert cache.get_many(SECTOR, [FETCHED]) == {FETCHED: "المرافق العامة"}
+
+    fetch_quotes([LISTED, CACHED, FETCHED], backend=backend, cache=cache)
+    assert backend.info_calls == 1
+
+
+def test_failed_info_not_cached(cache):
+    class FailingBackend(StubBackend):
+        def fetch_info(self, symbol):
+            super().fetch_info(symbol)
+            raise ConnectionError(symbol)
+
+    backend = FailingBackend()
+    quotes = fetch_quotes([FETCHED], backend=backend, cache=cache)
+    assert quotes.at[FETCHED, "sector"] == DEFAULT_SECTOR
+    assert cache.get_many(SECTOR, [FETCHED]) == {}
+    fetch_quotes([FETCHED], backend=backend, cache=cache)
+    assert backend.info_calls == 2
+
+
+def test_price_failures():
+    assert price_failures([LISTED], backend=StubBackend()) == {}
+    with StubQuoteServer({LISTED: 90.0}) as server:
+        backend = AsyncYahooBackend(info_backend=StubBackend(), base_url=server.url, rate=1000, burst=1000,
+                                    retry=RetryPolicy(base_delay=0.01))
+        try:
+            quotes = fetch_quotes([LISTED, "0000.SR"], backend=backend, with_sector=False)
+        finally:
+            close_clients()
+    assert quotes.at[LISTED, "price"] == 90.0
+    failures = price_failures([LISTED, "0000.SR"], backend=backend)
+    assert list(failures) == ["0000.SR"] and failures["0000.SR"].reason == "not_found"
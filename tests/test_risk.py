@@ -0,0 +1,42 @@
+import pandas as pd
+import pytest
+
+from tdwl.ohlcv import TASI_SYMBOL, OHLCVStore, SyntheticHistoryBackend, default_store, update
+from tdwl.risk import holdings_risk
+
+END = "2024-12-31"
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = OHLCVStore(tmp_path)
+    update(store, ["1120.SR", "2222.SR", TASI_SYMBOL], backend=SyntheticHistoryBackend(), start="2022-01-01", end=END)
+    return store
+
+
+def holdings(values):
+    return pd.DataFrame({"symbol": list(values), "current_value": list(values.values())})
+
+
+def test_full_coverage(store):
+    report = holdings_risk(holdings({"1120.SR": 600.0, "2222.SR": 400.0}), store=store, end=END)
+    assert report.coverage == pytest.approx(1.0)
+    assert report.days > 250
+    assert report.beta == report.beta
+
+
+def test_coverage_excludes_symbols_without_history(store):
+    """الرمز بلا تاريخ يُستبعد ولا يختفي: coverage تبلغ الصفحة بالجزء المحسوب."""
+    full = holdings_risk(holdings({"1120.SR": 600.0, "2222.SR": 400.0}), store=store, end=END)
+    partial = holdings_risk(holdings({"1120.SR": 600.0, "2222.SR": 400.0, "9999.SR": 1000.0}),
+                            store=store, end=END)
+    assert partial.coverage == pytest.approx(0.5)
+    assert partial.volatility == pytest.approx(full.volatility)
+
+
+def test_no_history(store):
+    assert holdings_risk(holdings({"9999.SR": 1000.0}), store=store, end=END) is None
+
+
+def test_default_store_is_shared():
+    assert default_store() is default_store()